@@ -303,3 +303,36 @@ SWAGGER_SETTINGS = {
     },
     "USE_SESSION_AUTH": False,
 }
+
+# ------------------------------------------------------------------------------
+# Registry statistics cache
+# ------------------------------------------------------------------------------
+# Seconds a cached statistics response is served before being recomputed.
+# Writes to the registry invalidate the cached responses earlier.
+STATS_CACHE_TIMEOUT = env.int("STATS_CACHE_TIMEOUT", 300)
+
+# Follow up worklist
+# ------------------------------------------------------------------------------
+# Days after the discharge date after which an episode without a follow up is
+# listed as overdue.
+FOLLOW_UP_DUE_DAYS = env.int("FOLLOW_UP_DUE_DAYS", 30)
+
+# Patient autocomplete
+# ------------------------------------------------------------------------------
+# Seconds the matches of a (hospital, prefix) pair are served from the cache.
+PATIENT_AUTOCOMPLETE_CACHE_TIMEOUT = env.int(
+    "PATIENT_AUTOCOMPLETE_CACHE_TIMEOUT", 30
+)
+
+# Patient list counts
+# ------------------------------------------------------------------------------
+# Seconds an exact patient list count is reused by later pages of the same
+# query. Writes to the registry invalidate the cached counts earlier.
+PATIENT_COUNT_CACHE_TIMEOUT = env.int("PATIENT_COUNT_CACHE_TIMEOUT", 300)
+
+# Idempotent POSTs
+# ------------------------------------------------------------------------------
+# Seconds the response of a POST with an Idempotency-Key header is replayed to
+# retries with the same key, and seconds a request in progress holds the key.
+IDEMPOTENCY_KEY_TIMEOUT = env.int("IDEMPOTENCY_KEY_TIMEOUT", 60 * 60 * 24)
+IDEMPOTENCY_LOCK_TIMEOUT = env.int("IDEMPOTENCY_LOCK_TIMEOUT", 60)
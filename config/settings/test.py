@@ -49,3 +49,7 @@ EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Responses are cached only in the tests that exercise the caches.
+STATS_CACHE_TIMEOUT = 0
+PATIENT_AUTOCOMPLETE_CACHE_TIMEOUT = 0
+PATIENT_COUNT_CACHE_TIMEOUT = 0
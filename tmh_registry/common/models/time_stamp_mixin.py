@@ -1,9 +1,9 @@
-from django.db.models import DateField, Model
+from django.db.models import DateField, DateTimeField, Model
 
 
 class TimeStampMixin(Model):
     created_at = DateField(auto_now_add=True)
-    updated_at = DateField(auto_now=True)
+    updated_at = DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
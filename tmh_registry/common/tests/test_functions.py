@@ -0,0 +1,21 @@
+from unittest import TestCase
+
+from tmh_registry.common.utils.functions import get_text_choices_codec
+from tmh_registry.registry.models import Episode
+
+
+class TestTextChoicesCodec(TestCase):
+    def setUp(self) -> None:
+        self.codec = get_text_choices_codec(Episode.SideChoices)
+
+    def test_get_value(self):
+        self.assertEqual("NA", self.codec.get_value("Not Applicable"))
+        self.assertEqual("LEFT", self.codec.get_value("left"))
+        self.assertIsNone(self.codec.get_value("Middle"))
+
+    def test_get_label(self):
+        self.assertEqual("Not Applicable", self.codec.get_label("NA"))
+        self.assertEqual("", self.codec.get_label(""))
+
+    def test_codec_is_built_once(self):
+        self.assertIs(self.codec, get_text_choices_codec(Episode.SideChoices))
@@ -1,14 +1,59 @@
-def get_text_choice_value_from_label(choices, label):
+import re
+from functools import lru_cache
+
+
+class TextChoicesCodec:
+    """
+    Map the labels of a `TextChoices` class to their values, case
+    insensitively, and the values back to their labels in constant time.
+    """
+
+    def __init__(self, choices_class):
+        self.labels = {
+            value: str(label) for value, label in choices_class.choices
+        }
+        self.values = {
+            label.upper(): value for value, label in self.labels.items()
+        }
+
+    def get_value(self, label):
+        """
+        :param str label: The label as typed
+        :return: The value of the label, `None` if it is not a choice
+        :rtype: str
+        """
+        return self.values.get(label.upper())
+
+    def get_label(self, value):
+        """
+        :param str value: The stored value
+        :return: The label of the value, the value itself if it is not a
+            choice, like `get_FOO_display`
+        :rtype: str
+        """
+        return self.labels.get(value, value)
 
-    if not label:
-        return None
 
-    values = [
-        choice[0] for choice in choices if choice[1].upper() == label.upper()
-    ]
-    if len(values) == 0:
-        raise IndexError(
-            'Unable to find label "{}" in choices "{}"'.format(label, choices)
-        )
+@lru_cache(maxsize=None)
+def get_text_choices_codec(choices_class):
+    """
+    Build the `TextChoicesCodec` of a `TextChoices` class once.
+
+    :param type choices_class: The `TextChoices` class
+    :rtype: TextChoicesCodec
+    """
+    return TextChoicesCodec(choices_class)
+
+
+def get_digits(value):
+    """
+    Strip everything but the digits from an identifier, e.g. a phone number.
+
+    :param str value: The identifier as typed
+    :return: The digits, `None` if there are none
+    :rtype: str
+    """
+    if not value:
+        return None
 
-    return values[0]
+    return re.sub(r"\D", "", value) or None
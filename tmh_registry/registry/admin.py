@@ -7,6 +7,7 @@ from tmh_registry.registry.models import (
     Announcement,
     Discharge,
     Episode,
+    EpisodeRollup,
     FollowUp,
     Hospital,
     HospitalRegionMapping,
@@ -15,6 +16,7 @@ from tmh_registry.registry.models import (
     PreferredHospital,
     Region,
     RegionZoneMapping,
+    SurgeonEpisodeRollup,
     Zone,
 )
 
@@ -54,6 +56,16 @@ class EpisodeAdmin(ExportMixin, admin.ModelAdmin):
     model = Episode
 
 
+@admin.register(EpisodeRollup)
+class EpisodeRollupAdmin(ExportMixin, admin.ModelAdmin):
+    model = EpisodeRollup
+
+
+@admin.register(SurgeonEpisodeRollup)
+class SurgeonEpisodeRollupAdmin(ExportMixin, admin.ModelAdmin):
+    model = SurgeonEpisodeRollup
+
+
 @admin.register(Zone)
 class ZoneAdmin(ExportMixin, admin.ModelAdmin):
     model = Zone
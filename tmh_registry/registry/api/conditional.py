@@ -0,0 +1,109 @@
+from datetime import datetime
+from hashlib import md5
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.utils.timezone import now
+
+
+def get_versions(queryset, pk, patient_path="", **aggregates):
+    """
+    Read what a response depends on in one aggregate query: the serialized
+    patient, its hospital mappings, the episodes in them and their surgeons,
+    plus any extra `aggregates` of the records around them.
+
+    Deleted mappings and episodes change the counts, every other write
+    changes one of the `updated_at` columns. Edits of a surgeon's user move
+    the surgeon's `updated_at`, see `users.signals`. Writes that bypass
+    `save()`, like `QuerySet.update()`, are not seen.
+
+    :param QuerySet queryset: The records of the requested model
+    :param str pk: The primary key of the requested record, as in the URL
+    :param str patient_path: The lookup path from the queried model to
+        `Patient`
+    :return: The versions, `None` if the record does not exist or `pk` is
+        not a valid primary key
+    :rtype: dict
+    """
+    try:
+        versions = queryset.filter(pk=pk).aggregate(
+            patient_updated_at=Max(f"{patient_path}updated_at"),
+            mapping_count=Count(
+                f"{patient_path}hospital_mappings", distinct=True
+            ),
+            episode_count=Count(
+                f"{patient_path}hospital_mappings__episode", distinct=True
+            ),
+            episodes_updated_at=Max(
+                f"{patient_path}hospital_mappings__episode__updated_at"
+            ),
+            surgeons_updated_at=Max(
+                f"{patient_path}hospital_mappings__episode__surgeons__"
+                "updated_at"
+            ),
+            **aggregates,
+        )
+    except (TypeError, ValueError):
+        return None
+
+    if versions["patient_updated_at"] is None:
+        return None
+    return versions
+
+
+def get_etag(request, versions):
+    # The query parameters select the fields of the response and the age of
+    # a patient moves with the current year.
+    key = repr(
+        (
+            sorted(versions.items()),
+            sorted(request.query_params.lists()),
+            now().year,
+        )
+    )
+    return quote_etag(md5(key.encode()).hexdigest())
+
+
+def conditional_get(request, versions, respond):
+    """
+    Answer a GET with `304 Not Modified` when the client's copy is still
+    current, without building the response.
+
+    :param Request request: The request, with `If-None-Match` or
+        `If-Modified-Since` headers
+    :param dict versions: The result of one aggregate query over the records
+        the response is built from, `None` if the record does not exist
+    :param callable respond: Builds the full response
+    :return: The response, with the `ETag` and `Last-Modified` headers
+    :rtype: Response
+    """
+    if versions is None:
+        return respond()
+
+    etag = get_etag(request, versions)
+    timestamps = [
+        value for value in versions.values() if isinstance(value, datetime)
+    ]
+    # `Last-Modified` has whole seconds, so it is only sent once the second
+    # of the newest change is over. Otherwise a later change in the same
+    # second would keep it, and a client sending only `If-Modified-Since`
+    # would get a stale `304`. The `ETag` has the exact timestamps.
+    last_modified = None
+    if timestamps:
+        newest = int(max(timestamps).timestamp())
+        if newest < int(now().timestamp()):
+            last_modified = newest
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = respond()
+
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+
+    return response
@@ -0,0 +1,57 @@
+from rest_framework.fields import ChoiceField, IntegerField, ListField
+
+from ...common.utils.functions import get_text_choices_codec
+
+
+class ChoiceLabelField(ChoiceField):
+    """
+    Read and write a `TextChoices` model field by its label.
+
+    Labels are matched case insensitively, so an unknown label fails the
+    field validation, before the serializer runs any query. Representations
+    are looked up by value, without the model's `get_FOO_display`.
+    """
+
+    def __init__(self, choices_class, **kwargs):
+        self.codec = get_text_choices_codec(choices_class)
+        super().__init__(choices=choices_class.labels, **kwargs)
+
+    def to_internal_value(self, data):
+        if data == "" and self.allow_blank:
+            return ""
+
+        value = self.codec.get_value(str(data))
+        if value is None:
+            self.fail("invalid_choice", input=data)
+        return value
+
+    def to_representation(self, value):
+        return self.codec.get_label(value)
+
+
+class PrimaryKeyListField(ListField):
+    """
+    Resolve a list of primary keys to their objects with one query, where
+    `PrimaryKeyRelatedField(many=True)` runs one query per key. Repeated keys
+    are resolved once and the objects keep the order of the keys.
+    """
+
+    default_error_messages = {
+        "does_not_exist": 'Invalid pk "{pk_value}" - object does not exist.'
+    }
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(child=IntegerField(), **kwargs)
+
+    def to_internal_value(self, data):
+        pks = list(dict.fromkeys(super().to_internal_value(data)))
+        if not pks:
+            return []
+
+        objects = self.queryset.in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                self.fail("does_not_exist", pk_value=pk)
+
+        return [objects[pk] for pk in pks]
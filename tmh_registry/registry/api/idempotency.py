@@ -0,0 +1,149 @@
+from functools import wraps
+from hashlib import md5
+from json import dumps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from drf_yasg.openapi import IN_HEADER, TYPE_STRING, Parameter
+from rest_framework.response import Response
+from rest_framework.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_409_CONFLICT,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+)
+
+from ...common.exceptions import ProjectAPIException
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+IDEMPOTENCY_KEY_PARAMETER = Parameter(
+    IDEMPOTENCY_KEY_HEADER,
+    IN_HEADER,
+    description="A unique client generated key, e.g. a UUID, sent again "
+    "with every retry of the request. A retry of a successful request "
+    "returns the first response instead of creating the records again.",
+    type=TYPE_STRING,
+)
+
+
+def get_idempotency_cache_key(request, key):
+    key_hash = md5(key.encode()).hexdigest()
+    return (
+        f"registry:idempotency:{request.user.pk}:{request.method}:"
+        f"{request.path}:{key_hash}"
+    )
+
+
+def get_request_fingerprint(request):
+    body = dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return md5(body.encode()).hexdigest()
+
+
+def replay(stored, fingerprint):
+    if stored["fingerprint"] != fingerprint:
+        raise ProjectAPIException(
+            f"{IDEMPOTENCY_KEY_HEADER} was already used with a different "
+            "request body.",
+            code=HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    return Response(
+        stored["data"],
+        status=stored["status"],
+        headers={IDEMPOTENCY_REPLAYED_HEADER: "true"},
+    )
+
+
+def idempotent(view_method):
+    """
+    Replay the first successful response of a POST retried with the same
+    `Idempotency-Key` header, without running the view again.
+
+    The key is scoped to the user and the endpoint. While the first request
+    runs, a lock taken with `cache.add` answers concurrent duplicates with
+    `409 Conflict`. The response is stored once the transaction commits, so
+    a rolled back write is never replayed, and failed requests are not
+    stored so they can be retried with the same key.
+
+    :param callable view_method: The view method handling the POST
+    :return: The wrapped view method
+    :rtype: callable
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise ProjectAPIException(
+                f"{IDEMPOTENCY_KEY_HEADER} must be 1 to "
+                f"{IDEMPOTENCY_KEY_MAX_LENGTH} characters long.",
+                code=HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = get_idempotency_cache_key(request, key)
+        lock_key = f"{cache_key}:lock"
+        fingerprint = get_request_fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+        # `add` returns None instead of False when the cache is down and its
+        # errors are ignored, then the request runs without the lock
+        locked = cache.add(
+            lock_key, fingerprint, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT
+        )
+        if locked is False:
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return replay(stored, fingerprint)
+            raise ProjectAPIException(
+                f"A request with the same {IDEMPOTENCY_KEY_HEADER} is still "
+                "in progress.",
+                code=HTTP_409_CONFLICT,
+            )
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(lock_key)
+            raise
+
+        if not 200 <= response.status_code < 300:
+            cache.delete(lock_key)
+            return response
+
+        stored = {
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "data": response.data,
+        }
+
+        def store():
+            cache.set(
+                cache_key, stored, timeout=settings.IDEMPOTENCY_KEY_TIMEOUT
+            )
+            cache.delete(lock_key)
+
+        transaction.on_commit(store)
+
+        return response
+
+    return wrapper
+
+
+class IdempotentCreateMixin:
+    """
+    Accept an `Idempotency-Key` header on `create`. Goes before
+    `CreateModelMixin` in the bases of the viewset.
+    """
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
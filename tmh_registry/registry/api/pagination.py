@@ -0,0 +1,270 @@
+import json
+from collections import OrderedDict
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    LimitOffsetPagination,
+    _reverse_ordering,
+)
+from rest_framework.response import Response
+
+from ..cache import get_stats_version
+
+PATIENT_ORDERINGS = ["full_name", "-full_name", "created_at", "-created_at"]
+
+
+class SurgeonLeaderboardPagination(CursorPagination):
+    ordering = ["-episode_count", "medical_personnel_id"]
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class PatientCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the ordering field and the id. The cursor holds
+    both, so rows sharing a `created_at` or `full_name` are paged by id
+    instead of by an offset into the tied rows.
+    """
+
+    ordering = ["-created_at", "-id"]
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Follow the `ordering` of `PatientFilterSet`, with the id as the
+        tiebreaker so that the pages stay stable.
+        """
+        fields = [
+            field.strip()
+            for field in request.query_params.get("ordering", "").split(",")
+            if field.strip() in PATIENT_ORDERINGS
+        ]
+        if not fields:
+            return self.ordering
+
+        return [fields[0], "-id" if fields[0].startswith("-") else "id"]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            field = order.lstrip("-")
+            value, pk = current_position
+
+            # The id is ordered in the same direction as the field
+            if self.cursor.reverse != order.startswith("-"):
+                lookup = "lt"
+            else:
+                lookup = "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{lookup}": value})
+                | Q(**{field: value, f"id__{lookup}": pk})
+            )
+
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = list(results[: self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+
+        # The id is last, the field value may contain the separator
+        value, _, pk = cursor.position.rpartition(",")
+        if not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=(value, int(pk)))
+
+    def encode_cursor(self, cursor):
+        if cursor.position is not None:
+            value, pk = cursor.position
+            cursor = cursor._replace(position=f"{value},{pk}")
+        return super().encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return (
+            super()._get_position_from_instance(instance, ordering),
+            instance.pk,
+        )
+
+
+def get_count_cache_key(queryset):
+    # the ordering does not change the count
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = md5(f"{sql}{params!r}".encode()).hexdigest()
+    return f"registry:patients:count:{get_stats_version()}:{digest}"
+
+
+def get_estimated_count(queryset):
+    """
+    Read the number of rows the query planner expects `queryset` to return.
+
+    :param QuerySet queryset: The filtered queryset
+    :return: The estimate, `None` when the database cannot provide one
+    :rtype: int
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class PatientPagination(LimitOffsetPagination):
+    """
+    Offset pagination, unless the request opts in to keyset pagination with
+    `?pagination=cursor`. Keyset pages skip the count query and cost the
+    same however deep the client pages.
+
+    Offset pages do not run an exact `COUNT(*)` unless the client asks for
+    it with `?count=exact`. The count is otherwise taken from the cached
+    exact count of the same query, which writes to the registry invalidate,
+    or else from the planner estimate. `count_is_exact` tells the two apart.
+    """
+
+    count_query_param = "count"
+    cursor_pagination = None
+    count_is_exact = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            request.query_params.get("pagination") == "cursor"
+            or "cursor" in request.query_params
+        ):
+            self.cursor_pagination = PatientCursorPagination()
+            return self.cursor_pagination.paginate_queryset(
+                queryset, request, view
+            )
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_offset(request)
+        self.request = request
+
+        if request.query_params.get(self.count_query_param) == "exact":
+            self.count = self.get_exact_count(queryset)
+            self.count_is_exact = True
+            if self.count == 0 or self.offset > self.count:
+                return []
+            return list(queryset[self.offset : self.offset + self.limit])
+
+        self.count = cache.get(get_count_cache_key(queryset))
+        self.count_is_exact = self.count is not None
+        if self.count is None:
+            self.count = get_estimated_count(queryset)
+        if self.count is None:
+            self.count = self.get_exact_count(queryset)
+            self.count_is_exact = True
+
+        # One extra row tells whether there is a next page, which keeps the
+        # links right however far off the estimate is
+        results = list(queryset[self.offset : self.offset + self.limit + 1])
+        if not self.count_is_exact:
+            if results and len(results) <= self.limit:
+                self.count = self.offset + len(results)
+                self.count_is_exact = True
+            elif results:
+                self.count = max(self.count, self.offset + len(results))
+            else:
+                self.count = min(self.count, self.offset)
+
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        return results[: self.limit]
+
+    def get_exact_count(self, queryset):
+        count = self.get_count(queryset)
+        cache.set(
+            get_count_cache_key(queryset),
+            count,
+            timeout=settings.PATIENT_COUNT_CACHE_TIMEOUT,
+        )
+        return count
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_paginated_response(data)
+
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("count_is_exact", self.count_is_exact),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_exact"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        return response_schema
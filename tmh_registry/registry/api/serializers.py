@@ -1,10 +1,17 @@
+from operator import attrgetter
+
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.timezone import now
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import (
     BooleanField,
     CharField,
     DateField,
+    DictField,
     IntegerField,
+    ListField,
 )
 from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.serializers import (
@@ -13,7 +20,6 @@ from rest_framework.serializers import (
     SerializerMethodField,
 )
 
-from ...common.utils.functions import get_text_choice_value_from_label
 from ...users.api.serializers import MedicalPersonnelSerializer
 from ...users.models import MedicalPersonnel
 from ..models import (
@@ -26,6 +32,106 @@ from ..models import (
     PatientHospitalMapping,
     PreferredHospital,
 )
+from ..rollups import record_bulk_created_episodes, update_surgeon_rollup
+from ..upserts import (
+    HOSPITAL_DOES_NOT_EXIST_ERROR,
+    InsertConflict,
+    create_mapping,
+    register_patient,
+)
+from .fields import ChoiceLabelField, PrimaryKeyListField
+
+
+class SparseFieldsetMixin:
+    """
+    Serialize only the `fields` passed to the serializer, see
+    `SparseFieldsetViewMixin`.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def get_only_fields(cls, fields):
+        """
+        Map serializer fields to the model fields to load with `.only()`.
+
+        Relations and computed fields are skipped, unless they are listed in
+        `Meta.only_dependencies`.
+
+        :param set fields: The serializer fields to render
+        :return: The model field names
+        :rtype: set
+        """
+        model_fields = {
+            field.name for field in cls.Meta.model._meta.concrete_fields
+        }
+        dependencies = getattr(cls.Meta, "only_dependencies", {})
+        declared_fields = cls().fields
+
+        only_fields = {"id"}
+        for field_name in fields:
+            source = declared_fields[field_name].source
+            if source in model_fields:
+                only_fields.add(source)
+            only_fields.update(dependencies.get(field_name, []))
+
+        return only_fields
+
+
+def set_prefetched(instance, name, objects):
+    """
+    Fill the prefetch cache of a many-to-many relation with objects already
+    in memory, the way `prefetch_related` does, so serializing the relation
+    runs no query.
+
+    :param Model instance: The record owning the relation
+    :param str name: The name of the relation
+    :param list objects: The related objects
+    """
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, "_prefetched_objects_cache"):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = queryset
+
+
+def is_prefetched(instance, name):
+    return name in getattr(instance, "_prefetched_objects_cache", {})
+
+
+def prefetch_episode_tree(episodes):
+    """
+    Load what `EpisodeReadSerializer` renders for `episodes`, whose mapping,
+    patient and hospital are already loaded: the mappings of the patients,
+    their episodes and the surgeons of those episodes, in three queries.
+
+    :param list episodes: The episodes to serialize
+    """
+    patients = [
+        episode.patient_hospital_mapping.patient for episode in episodes
+    ]
+    prefetch_related_objects(
+        patients,
+        Prefetch(
+            "hospital_mappings__episode_set__surgeons",
+            queryset=MedicalPersonnel.objects.select_related("user"),
+        ),
+    )
+
+    surgeons = {
+        episode.id: episode.surgeons.all()
+        for patient in patients
+        for mapping in patient.hospital_mappings.all()
+        for episode in mapping.episode_set.all()
+    }
+    for episode in episodes:
+        set_prefetched(episode, "surgeons", surgeons[episode.id])
 
 
 class HospitalSerializer(ModelSerializer):
@@ -36,15 +142,15 @@ class HospitalSerializer(ModelSerializer):
 
 class EpisodeSerializer(ModelSerializer):
     surgeons = MedicalPersonnelSerializer(many=True)
-    episode_type = CharField(source="get_episode_type_display")
-    cepod = CharField(source="get_cepod_display")
-    side = CharField(source="get_side_display")
-    occurence = CharField(source="get_occurence_display")
-    type = CharField(source="get_type_display")
-    size = CharField(source="get_size_display")
-    complexity = CharField(source="get_complexity_display")
-    mesh_type = CharField(source="get_mesh_type_display")
-    anaesthetic_type = CharField(source="get_anaesthetic_type_display")
+    episode_type = ChoiceLabelField(Episode.EpisodeChoices)
+    cepod = ChoiceLabelField(Episode.CepodChoices)
+    side = ChoiceLabelField(Episode.SideChoices)
+    occurence = ChoiceLabelField(Episode.OccurenceChoices)
+    type = ChoiceLabelField(Episode.TypeChoices)
+    size = ChoiceLabelField(Episode.SizeChoices)
+    complexity = ChoiceLabelField(Episode.ComplexityChoices)
+    mesh_type = ChoiceLabelField(Episode.MeshTypeChoices)
+    anaesthetic_type = ChoiceLabelField(Episode.AnaestheticChoices)
     comments = CharField()
 
     class Meta:
@@ -82,19 +188,41 @@ class PatientHospitalMappingPatientSerializer(ModelSerializer):
         return data
 
 
-class ReadPatientSerializer(ModelSerializer):
+class ReadPatientSerializer(SparseFieldsetMixin, ModelSerializer):
     age = IntegerField(allow_null=True)
     hospital_mappings = PatientHospitalMappingPatientSerializer(many=True)
     episodes = SerializerMethodField()
-    gender = CharField(source="get_gender_display")
+    gender = ChoiceLabelField(Patient.Gender)
 
     @swagger_serializer_method(serializer_or_field=EpisodeSerializer)
     def get_episodes(self, obj):
-        episodes = Episode.objects.filter(
-            patient_hospital_mapping__patient__id__in=obj.hospital_mappings.values_list(
-                "patient_id", flat=True
+        # Served from the `PatientViewSet` prefetches when available, other
+        # uses of the serializer load them with one query
+        if is_prefetched(obj, "hospital_mappings") and all(
+            is_prefetched(mapping, "episode_set")
+            for mapping in obj.hospital_mappings.all()
+        ):
+            episodes = sorted(
+                (
+                    episode
+                    for mapping in obj.hospital_mappings.all()
+                    for episode in mapping.episode_set.all()
+                ),
+                key=attrgetter("id"),
+            )
+        else:
+            episodes = (
+                Episode.objects.filter(patient_hospital_mapping__patient=obj)
+                .prefetch_related(
+                    Prefetch(
+                        "surgeons",
+                        queryset=MedicalPersonnel.objects.select_related(
+                            "user"
+                        ),
+                    )
+                )
+                .order_by("id")
             )
-        )
         return EpisodeSerializer(episodes, many=True).data
 
     class Meta:
@@ -115,6 +243,7 @@ class ReadPatientSerializer(ModelSerializer):
             "hospital_mappings",
             "episodes",
         ]
+        only_dependencies = {"age": ["year_of_birth"]}
 
     def to_representation(self, instance):
         data = super(ReadPatientSerializer, self).to_representation(instance)
@@ -124,10 +253,60 @@ class ReadPatientSerializer(ModelSerializer):
         # )
         # data["phone_1"] = int(data["phone_1"]) if data["phone_1"] else None
         # data["phone_2"] = int(data["phone_2"]) if data["phone_2"] else None
-        data["age"] = instance.age
+        if "age" in self.fields:
+            data["age"] = instance.age
         return data
 
 
+class PatientAutocompleteSerializer(Serializer):
+    id = IntegerField(source="patient_id")
+    full_name = CharField(source="patient__full_name")
+    patient_hospital_id = CharField()
+
+
+# Keys accepted by a single bulk lookup request
+PATIENT_BULK_LOOKUP_LIMIT = 5000
+
+
+class HospitalIdentifierSerializer(Serializer):
+    hospital_id = IntegerField()
+    patient_hospital_id = CharField()
+
+
+class PatientBulkLookupSerializer(Serializer):
+    ids = ListField(child=IntegerField(), required=False, default=list)
+    hospital_identifiers = HospitalIdentifierSerializer(
+        many=True, required=False, default=list
+    )
+
+    def validate(self, attrs):
+        keys = len(attrs["ids"]) + len(attrs["hospital_identifiers"])
+        if not keys:
+            raise ValidationError(
+                {"error": "Provide 'ids' or 'hospital_identifiers'."}
+            )
+        if keys > PATIENT_BULK_LOOKUP_LIMIT:
+            raise ValidationError(
+                {
+                    "error": f"Up to {PATIENT_BULK_LOOKUP_LIMIT} patients can "
+                    "be looked up at once."
+                }
+            )
+
+        return attrs
+
+
+class MatchedHospitalIdentifierSerializer(HospitalIdentifierSerializer):
+    patient_id = IntegerField()
+
+
+class PatientBulkLookupResultSerializer(Serializer):
+    patients = ReadPatientSerializer(many=True)
+    hospital_identifiers = MatchedHospitalIdentifierSerializer(many=True)
+    missing_ids = ListField(child=IntegerField())
+    missing_hospital_identifiers = HospitalIdentifierSerializer(many=True)
+
+
 class CreatePatientSerializer(ModelSerializer):
     age = IntegerField(allow_null=True)
     hospital_id = IntegerField(write_only=True)
@@ -135,7 +314,7 @@ class CreatePatientSerializer(ModelSerializer):
     day_of_birth = IntegerField(allow_null=True, required=False)
     month_of_birth = IntegerField(allow_null=True, required=False)
     year_of_birth = IntegerField(allow_null=True)
-    gender = CharField(allow_null=True)
+    gender = ChoiceLabelField(Patient.Gender, allow_null=True)
     phone_1 = CharField(allow_null=True)
 
     class Meta:
@@ -154,17 +333,20 @@ class CreatePatientSerializer(ModelSerializer):
             "hospital_id",
             "patient_hospital_id",
         ]
+        # Checked by the insert itself, see `upserts.register_patient`
+        extra_kwargs = {"national_id": {"validators": []}}
 
     def to_representation(self, instance):
         serializer = ReadPatientSerializer(instance)
         return serializer.data
 
-    def create(self, validated_data):
-
-        if not validated_data.get("year_of_birth", None):
-            if validated_data["age"]:
-                validated_data["year_of_birth"] = (
-                    Patient.get_year_of_birth_from_age(validated_data["age"])
+    def validate(self, attrs):
+        # Only checks of the row itself, so `imports.import_patients` can
+        # validate rows without a query each
+        if not attrs.get("year_of_birth", None):
+            if attrs["age"]:
+                attrs["year_of_birth"] = Patient.get_year_of_birth_from_age(
+                    attrs["age"]
                 )
             else:
                 raise ValidationError(
@@ -173,17 +355,21 @@ class CreatePatientSerializer(ModelSerializer):
                     }
                 )
 
+        if not attrs["patient_hospital_id"]:
+            raise ValidationError(
+                {"error": "The 'patient_hospital_id' should be provided."}
+            )
+
+        return attrs
+
+    def create(self, validated_data):
         if validated_data.get("hospital_id", None):
             try:
                 hospital = Hospital.objects.get(
                     id=validated_data["hospital_id"]
                 )
             except Hospital.DoesNotExist:
-                raise ValidationError(
-                    {
-                        "error": "The hospital you are trying to register this patient does not exist."
-                    }
-                )
+                raise ValidationError({"error": HOSPITAL_DOES_NOT_EXIST_ERROR})
             validated_data.pop("hospital_id", None)
         else:
             raise ValidationError(
@@ -191,40 +377,17 @@ class CreatePatientSerializer(ModelSerializer):
             )
 
         patient_hospital_id = validated_data.pop("patient_hospital_id")
-
-        if patient_hospital_id:
-            if PatientHospitalMapping.objects.filter(
-                hospital_id=hospital.id,
-                patient_hospital_id=patient_hospital_id,
-            ).exists():
-                raise ValidationError(
-                    {
-                        "error": f"The patient hospital id {patient_hospital_id} is already "
-                        f"registered to another patient of this hospital."
-                    }
-                )
-        else:
-            raise ValidationError(
-                {"error": "The 'patient_hospital_id' should be provided."}
-            )
-
-        validated_data["gender"] = (
-            get_text_choice_value_from_label(
-                Patient.Gender.choices, validated_data["gender"]
-            )
-            if validated_data["gender"]
-            else validated_data["gender"]
-        )
-
         validated_data.pop("age", None)
-        new_patient = super(CreatePatientSerializer, self).create(
-            validated_data
-        )
-        PatientHospitalMapping.objects.create(
-            patient=new_patient,
-            hospital=hospital,
-            patient_hospital_id=patient_hospital_id,
-        )
+        new_patient = Patient(**validated_data)
+        try:
+            register_patient(
+                new_patient,
+                PatientHospitalMapping(
+                    hospital=hospital, patient_hospital_id=patient_hospital_id
+                ),
+            )
+        except InsertConflict as exc:
+            raise ValidationError(exc.errors, code=exc.code)
 
         return new_patient
 
@@ -298,61 +461,31 @@ class PatientHospitalMappingWriteSerializer(ModelSerializer):
         validated_data["patient_hospital_id"] = str(
             validated_data["patient_hospital_id"]
         )
-        validated_data["patient_id"] = validated_data["patient_id"].id
-        validated_data["hospital_id"] = validated_data["hospital_id"].id
-
-        existing_mapping = PatientHospitalMapping.objects.filter(
-            patient_id=validated_data["patient_id"],
-            hospital_id=validated_data["hospital_id"],
-        )
-        if existing_mapping.exists():
-            raise ValidationError(
-                {
-                    "error": "PatientHospitalMapping for patient_id {patient_id} and hospital_id {hospital_id} "
-                    "already exists!".format(
-                        patient_id=validated_data["patient_id"],
-                        hospital_id=validated_data["hospital_id"],
-                    )
-                }
-            )
-
-        existing_patient_hospital_id = PatientHospitalMapping.objects.filter(
-            patient_hospital_id=validated_data["patient_hospital_id"],
-            hospital_id=validated_data["hospital_id"],
-        )
-        if existing_patient_hospital_id.exists():
-            raise ValidationError(
-                {
-                    "error": "Patient Hospital ID {patient_hospital_id} already exists for another patient in "
-                    "this hospital".format(
-                        patient_hospital_id=validated_data[
-                            "patient_hospital_id"
-                        ]
-                    )
-                }
-            )
-
-        new_mapping = PatientHospitalMapping.objects.create(
+        new_mapping = PatientHospitalMapping(
+            patient=validated_data["patient_id"],
+            hospital=validated_data["hospital_id"],
             patient_hospital_id=validated_data["patient_hospital_id"],
-            hospital_id=validated_data["hospital_id"],
-            patient_id=validated_data["patient_id"],
         )
+        try:
+            create_mapping(new_mapping)
+        except InsertConflict as exc:
+            raise ValidationError(exc.errors, code=exc.code)
 
         return new_mapping
 
 
-class EpisodeReadSerializer(ModelSerializer):
+class EpisodeReadSerializer(SparseFieldsetMixin, ModelSerializer):
     patient_hospital_mapping = PatientHospitalMappingReadSerializer()
     surgeons = MedicalPersonnelSerializer(many=True)
-    episode_type = CharField(source="get_episode_type_display")
-    cepod = CharField(source="get_cepod_display")
-    side = CharField(source="get_side_display")
-    occurence = CharField(source="get_occurence_display")
-    type = CharField(source="get_type_display")
-    size = CharField(source="get_size_display")
-    complexity = CharField(source="get_complexity_display")
-    mesh_type = CharField(source="get_mesh_type_display")
-    anaesthetic_type = CharField(source="get_anaesthetic_type_display")
+    episode_type = ChoiceLabelField(Episode.EpisodeChoices)
+    cepod = ChoiceLabelField(Episode.CepodChoices)
+    side = ChoiceLabelField(Episode.SideChoices)
+    occurence = ChoiceLabelField(Episode.OccurenceChoices)
+    type = ChoiceLabelField(Episode.TypeChoices)
+    size = ChoiceLabelField(Episode.SizeChoices)
+    complexity = ChoiceLabelField(Episode.ComplexityChoices)
+    mesh_type = ChoiceLabelField(Episode.MeshTypeChoices)
+    anaesthetic_type = ChoiceLabelField(Episode.AnaestheticChoices)
     antibiotic_type = CharField()
     comments = CharField()
 
@@ -380,25 +513,28 @@ class EpisodeReadSerializer(ModelSerializer):
         ]
 
 
+MISSING_MAPPING_ERROR = (
+    "PatientHospitalMapping for patient_id {patient_id} and hospital_id "
+    "{hospital_id} does not exist."
+)
+
+
 class EpisodeWriteSerializer(ModelSerializer):
-    patient_id = PrimaryKeyRelatedField(
-        write_only=True, queryset=Patient.objects.all()
-    )
-    hospital_id = PrimaryKeyRelatedField(
-        write_only=True, queryset=Hospital.objects.all()
-    )
-    surgeon_ids = PrimaryKeyRelatedField(
-        write_only=True, many=True, queryset=MedicalPersonnel.objects.all()
+    patient_id = IntegerField(write_only=True)
+    hospital_id = IntegerField(write_only=True)
+    surgeon_ids = PrimaryKeyListField(
+        write_only=True,
+        queryset=MedicalPersonnel.objects.select_related("user"),
     )
-    episode_type = CharField()
-    cepod = CharField()
-    side = CharField()
-    occurence = CharField()
-    type = CharField()
-    size = CharField()
-    complexity = CharField()
-    mesh_type = CharField()
-    anaesthetic_type = CharField()
+    episode_type = ChoiceLabelField(Episode.EpisodeChoices)
+    cepod = ChoiceLabelField(Episode.CepodChoices)
+    side = ChoiceLabelField(Episode.SideChoices)
+    occurence = ChoiceLabelField(Episode.OccurenceChoices)
+    type = ChoiceLabelField(Episode.TypeChoices)
+    size = ChoiceLabelField(Episode.SizeChoices)
+    complexity = ChoiceLabelField(Episode.ComplexityChoices)
+    mesh_type = ChoiceLabelField(Episode.MeshTypeChoices)
+    anaesthetic_type = ChoiceLabelField(Episode.AnaestheticChoices)
     antibiotic_type = CharField(required=False)
     comments = CharField(required=False)
 
@@ -428,76 +564,226 @@ class EpisodeWriteSerializer(ModelSerializer):
         serializer = EpisodeReadSerializer(instance)
         return serializer.data
 
+    @staticmethod
+    def get_episode_fields(validated_data):
+        """
+        Map the validated data to `Episode` fields.
+
+        :param dict validated_data: The validated data of one episode
+        :return: The field values, without the hospital mapping
+        :rtype: dict
+        """
+        return dict(
+            surgery_date=validated_data.get("surgery_date"),
+            episode_type=validated_data["episode_type"],
+            cepod=validated_data["cepod"],
+            side=validated_data["side"],
+            occurence=validated_data["occurence"],
+            type=validated_data["type"],
+            size=validated_data["size"],
+            complexity=validated_data["complexity"],
+            mesh_type=validated_data["mesh_type"],
+            anaesthetic_type=validated_data["anaesthetic_type"],
+            diathermy_used=validated_data["diathermy_used"],
+            antibiotic_used=validated_data["antibiotic_used"],
+            antibiotic_type=validated_data.get("antibiotic_type", ""),
+            comments=validated_data.get("comments", ""),
+        )
+
     def create(self, validated_data):
-        patient = validated_data["patient_id"]
-        hospital = validated_data["hospital_id"]
         surgeons = validated_data["surgeon_ids"]
 
-        patient_hospital_mapping = PatientHospitalMapping.objects.filter(
-            patient_id=patient.id,
-            hospital_id=hospital.id,
-        ).first()
+        patient_hospital_mapping = (
+            PatientHospitalMapping.objects.select_related(
+                "patient", "hospital"
+            )
+            .filter(
+                patient_id=validated_data["patient_id"],
+                hospital_id=validated_data["hospital_id"],
+            )
+            .first()
+        )
         if patient_hospital_mapping is None:
             raise ValidationError(
-                {
-                    "error": "PatientHospitalMapping for patient_id {patient_id} and hospital_id {hospital_id} "
-                    "does not exist.".format(
-                        patient_id=patient.id,
-                        hospital_id=hospital.id,
-                    )
-                }
+                {"error": MISSING_MAPPING_ERROR.format(**validated_data)}
             )
 
-        try:
-            episode = Episode.objects.create(
-                patient_hospital_mapping=patient_hospital_mapping,
-                surgery_date=validated_data["surgery_date"],
-                episode_type=get_text_choice_value_from_label(
-                    Episode.EpisodeChoices.choices,
-                    validated_data["episode_type"],
-                ),
-                cepod=get_text_choice_value_from_label(
-                    Episode.CepodChoices.choices, validated_data["cepod"]
-                ),
-                side=get_text_choice_value_from_label(
-                    Episode.SideChoices.choices, validated_data["side"]
-                ),
-                occurence=get_text_choice_value_from_label(
-                    Episode.OccurenceChoices.choices,
-                    validated_data["occurence"],
-                ),
-                type=get_text_choice_value_from_label(
-                    Episode.TypeChoices.choices, validated_data["type"]
-                ),
-                size=get_text_choice_value_from_label(
-                    Episode.SizeChoices.choices, validated_data["size"]
-                ),
-                complexity=get_text_choice_value_from_label(
-                    Episode.ComplexityChoices.choices,
-                    validated_data["complexity"],
-                ),
-                mesh_type=get_text_choice_value_from_label(
-                    Episode.MeshTypeChoices.choices,
-                    validated_data["mesh_type"],
-                ),
-                anaesthetic_type=get_text_choice_value_from_label(
-                    Episode.AnaestheticChoices.choices,
-                    validated_data["anaesthetic_type"],
-                ),
-                diathermy_used=validated_data["diathermy_used"],
-                antibiotic_used=validated_data["antibiotic_used"],
-                antibiotic_type=validated_data.get("antibiotic_type", ""),
-                comments=validated_data.get("comments", ""),
+        episode = Episode.objects.create(
+            patient_hospital_mapping=patient_hospital_mapping,
+            **self.get_episode_fields(validated_data),
+        )
+
+        # Inserted directly rather than with `surgeons.set`, which first reads
+        # the current surgeons, so the rollup receiver is applied here
+        EpisodeSurgeon = Episode.surgeons.through
+        EpisodeSurgeon.objects.bulk_create(
+            [
+                EpisodeSurgeon(
+                    episode_id=episode.id, medicalpersonnel_id=surgeon.id
+                )
+                for surgeon in surgeons
+            ]
+        )
+        update_surgeon_rollup(
+            [surgeon.id for surgeon in surgeons], episode.surgery_date, delta=1
+        )
+
+        prefetch_episode_tree([episode])
+
+        return episode
+
+
+# Episodes accepted by a single bulk import request
+EPISODE_BULK_IMPORT_LIMIT = 500
+
+
+class EpisodeImportItemSerializer(EpisodeWriteSerializer):
+    """
+    Validate one episode of a bulk import without querying the database. The
+    mappings and surgeons of the whole import are resolved at once by
+    `EpisodeBulkImportSerializer`.
+    """
+
+    surgeon_ids = ListField(child=IntegerField(), write_only=True)
+
+
+class EpisodeBulkImportSerializer(Serializer):
+    episodes = ListField(
+        child=DictField(),
+        allow_empty=False,
+        max_length=EPISODE_BULK_IMPORT_LIMIT,
+    )
+
+    def create(self, validated_data):
+        """
+        Insert the valid episodes and their surgeons with `bulk_create`.
+
+        Invalid episodes are reported and skipped, they do not prevent the
+        valid ones from being imported.
+
+        :return: One result per episode, in the order of the request
+        :rtype: list(dict)
+        """
+        results = []
+        valid_items = []
+        for index, item in enumerate(validated_data["episodes"]):
+            serializer = EpisodeImportItemSerializer(data=item)
+            try:
+                serializer.is_valid(raise_exception=True)
+                fields = serializer.get_episode_fields(
+                    serializer.validated_data
+                )
+            except ValidationError as exc:
+                results.append(
+                    {"index": index, "status": "failed", "errors": exc.detail}
+                )
+                continue
+
+            results.append(None)
+            valid_items.append((index, serializer.validated_data, fields))
+
+        mapping_ids = {}
+        for mapping_id, patient_id, hospital_id in (
+            PatientHospitalMapping.objects.filter(
+                patient_id__in={
+                    data["patient_id"] for _, data, _ in valid_items
+                },
+                hospital_id__in={
+                    data["hospital_id"] for _, data, _ in valid_items
+                },
             )
-        except IndexError:
-            raise ValidationError(
-                {"error": "Not supported value provided for ChoiceField."}
+            .order_by("id")
+            .values_list("id", "patient_id", "hospital_id")
+        ):
+            mapping_ids.setdefault((patient_id, hospital_id), mapping_id)
+        surgeon_ids = set(
+            MedicalPersonnel.objects.filter(
+                id__in={
+                    surgeon_id
+                    for _, data, _ in valid_items
+                    for surgeon_id in data["surgeon_ids"]
+                }
+            ).values_list("id", flat=True)
+        )
+
+        new_episodes = []
+        for index, data, fields in valid_items:
+            mapping_id = mapping_ids.get(
+                (data["patient_id"], data["hospital_id"])
             )
+            unknown_surgeon_ids = [
+                surgeon_id
+                for surgeon_id in data["surgeon_ids"]
+                if surgeon_id not in surgeon_ids
+            ]
+            if mapping_id is None:
+                errors = {"error": MISSING_MAPPING_ERROR.format(**data)}
+            elif unknown_surgeon_ids:
+                errors = {
+                    "surgeon_ids": [
+                        f'Invalid pk "{surgeon_id}" - object does not exist.'
+                        for surgeon_id in unknown_surgeon_ids
+                    ]
+                }
+            else:
+                new_episodes.append(
+                    (
+                        index,
+                        Episode(
+                            patient_hospital_mapping_id=mapping_id, **fields
+                        ),
+                        list(dict.fromkeys(data["surgeon_ids"])),
+                    )
+                )
+                continue
+
+            results[index] = {
+                "index": index,
+                "status": "failed",
+                "errors": errors,
+            }
+
+        if new_episodes:
+            self.insert_episodes(new_episodes, mapping_ids)
+
+        for index, episode, _ in new_episodes:
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "id": episode.id,
+            }
+
+        return results
+
+    @staticmethod
+    @transaction.atomic
+    def insert_episodes(new_episodes, mapping_ids):
+        Episode.objects.bulk_create(
+            [episode for _, episode, _ in new_episodes]
+        )
 
-        if surgeons:
-            episode.surgeons.set(surgeons)
+        EpisodeSurgeon = Episode.surgeons.through
+        EpisodeSurgeon.objects.bulk_create(
+            [
+                EpisodeSurgeon(
+                    episode_id=episode.id, medicalpersonnel_id=surgeon_id
+                )
+                for _, episode, surgeon_ids in new_episodes
+                for surgeon_id in surgeon_ids
+            ]
+        )
 
-        return episode
+        record_bulk_created_episodes(
+            [episode for _, episode, _ in new_episodes],
+            hospital_ids={
+                mapping_id: hospital_id
+                for (_, hospital_id), mapping_id in mapping_ids.items()
+            },
+            surgeon_ids={
+                episode.id: surgeon_ids
+                for _, episode, surgeon_ids in new_episodes
+            },
+        )
 
 
 class DischargeReadSerializer(ModelSerializer):
@@ -518,7 +804,11 @@ class DischargeReadSerializer(ModelSerializer):
 
 class DischargeWriteSerializer(ModelSerializer):
     episode_id = PrimaryKeyRelatedField(
-        write_only=True, queryset=Episode.objects.filter(discharge=None)
+        write_only=True,
+        queryset=Episode.objects.filter(discharge=None).select_related(
+            "patient_hospital_mapping__patient",
+            "patient_hospital_mapping__hospital",
+        ),
     )
     comments = CharField(required=False, allow_null=True, allow_blank=True)
     infection = CharField(required=False, allow_null=True, allow_blank=True)
@@ -549,7 +839,7 @@ class DischargeWriteSerializer(ModelSerializer):
             )
 
         discharge = Discharge.objects.create(
-            episode_id=episode.id,
+            episode=episode,
             date=validated_data["date"],
             aware_of_mesh=validated_data["aware_of_mesh"],
             infection=validated_data.get("infection", ""),
@@ -557,12 +847,14 @@ class DischargeWriteSerializer(ModelSerializer):
             comments=validated_data.get("comments", ""),
         )
 
+        prefetch_episode_tree([episode])
+
         return discharge
 
 
 class FollowUpReadSerializer(ModelSerializer):
     episode = EpisodeReadSerializer()
-    pain_severity = CharField(source="get_pain_severity_display")
+    pain_severity = ChoiceLabelField(FollowUp.PainSeverityChoices)
     attendees = MedicalPersonnelSerializer(many=True)
 
     class Meta:
@@ -585,12 +877,18 @@ class FollowUpReadSerializer(ModelSerializer):
 
 class FollowUpWriteSerializer(ModelSerializer):
     episode_id = PrimaryKeyRelatedField(
-        write_only=True, queryset=Episode.objects.exclude(discharge=None)
+        write_only=True,
+        queryset=Episode.objects.exclude(discharge=None).select_related(
+            "discharge",
+            "patient_hospital_mapping__patient",
+            "patient_hospital_mapping__hospital",
+        ),
     )
-    attendee_ids = PrimaryKeyRelatedField(
-        write_only=True, many=True, queryset=MedicalPersonnel.objects.all()
+    attendee_ids = PrimaryKeyListField(
+        write_only=True,
+        queryset=MedicalPersonnel.objects.select_related("user"),
     )
-    pain_severity = CharField()
+    pain_severity = ChoiceLabelField(FollowUp.PainSeverityChoices)
     surgery_comments_box = CharField(
         required=False, allow_blank=True, allow_null=True
     )
@@ -634,17 +932,10 @@ class FollowUpWriteSerializer(ModelSerializer):
                 }
             )
 
-        pain_severity = validated_data.get("pain_severity", "")
         follow_up = FollowUp.objects.create(
-            episode_id=episode.id,
+            episode=episode,
             date=validated_data["date"],
-            pain_severity=(
-                get_text_choice_value_from_label(
-                    FollowUp.PainSeverityChoices.choices, pain_severity
-                )
-                if pain_severity
-                else ""
-            ),
+            pain_severity=validated_data.get("pain_severity", ""),
             mesh_awareness=validated_data["mesh_awareness"],
             seroma=validated_data["seroma"],
             infection=validated_data["infection"],
@@ -656,7 +947,18 @@ class FollowUpWriteSerializer(ModelSerializer):
             ),
         )
 
-        follow_up.attendees.set(attendees)
+        FollowUpAttendee = FollowUp.attendees.through
+        FollowUpAttendee.objects.bulk_create(
+            [
+                FollowUpAttendee(
+                    followup_id=follow_up.id, medicalpersonnel_id=attendee.id
+                )
+                for attendee in attendees
+            ]
+        )
+
+        prefetch_episode_tree([episode])
+        set_prefetched(follow_up, "attendees", attendees)
 
         return follow_up
 
@@ -666,6 +968,25 @@ class SurgeonEpisodeSummarySerializer(Serializer):
     last_episode_date = DateField(allow_null=True)
 
 
+class SurgeonLeaderboardSerializer(Serializer):
+    medical_personnel_id = IntegerField()
+    username = CharField()
+    first_name = CharField()
+    last_name = CharField()
+    episode_count = IntegerField()
+    last_episode_date = DateField(allow_null=True)
+    discharged_episodes = IntegerField()
+    followed_up_episodes = IntegerField()
+    discharge_completion = SerializerMethodField()
+    follow_up_completion = SerializerMethodField()
+
+    def get_discharge_completion(self, obj):
+        return obj["discharged_episodes"] / obj["episode_count"]
+
+    def get_follow_up_completion(self, obj):
+        return obj["followed_up_episodes"] / obj["episode_count"]
+
+
 class OwnedEpisodeSerializer(ModelSerializer):
     patient_name = CharField(
         source="patient_hospital_mapping.patient.full_name", read_only=True
@@ -701,6 +1022,35 @@ class OwnedEpisodeSerializer(ModelSerializer):
         return discharge.date if discharge else None
 
 
+class FollowUpDueEpisodeSerializer(ModelSerializer):
+    patient_name = CharField(
+        source="patient_hospital_mapping.patient.full_name", read_only=True
+    )
+    patient_id = CharField(
+        source="patient_hospital_mapping.patient_id", read_only=True
+    )
+    patient_hospital_id = CharField(
+        source="patient_hospital_mapping.patient_hospital_id", read_only=True
+    )
+    discharge_date = DateField(read_only=True)
+    days_since_discharge = SerializerMethodField()
+
+    class Meta:
+        model = Episode
+        fields = [
+            "id",
+            "surgery_date",
+            "patient_name",
+            "patient_id",
+            "patient_hospital_id",
+            "discharge_date",
+            "days_since_discharge",
+        ]
+
+    def get_days_since_discharge(self, obj):
+        return (now().date() - obj.discharge_date).days
+
+
 class UnlinkedPatientSerializer(ModelSerializer):
     full_name = CharField()
     id = CharField()
@@ -0,0 +1,666 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import (
+    CharField,
+    DictField,
+    Field,
+    IntegerField,
+    ListField,
+)
+from rest_framework.serializers import Serializer
+
+from ...users.models import MedicalPersonnel
+from ..cache import bump_stats_version
+from ..models import (
+    Discharge,
+    Episode,
+    FollowUp,
+    Hospital,
+    Patient,
+    PatientHospitalMapping,
+)
+from ..rollups import record_bulk_created_episodes
+from .serializers import (
+    CreatePatientSerializer,
+    DischargeWriteSerializer,
+    EpisodeWriteSerializer,
+    FollowUpWriteSerializer,
+)
+
+# Records accepted by a single sync request, over all the sections
+SYNC_LIMIT = 2000
+
+NATIONAL_ID_EXISTS_ERROR = (
+    "A patient with national_id {national_id} already exists."
+)
+
+# Sections of a sync request, in the order they are created
+SYNC_SECTIONS = [
+    "patients",
+    "patient_hospital_mappings",
+    "episodes",
+    "discharges",
+    "follow_ups",
+]
+
+
+class SyncReferenceField(Field):
+    """
+    Reference an existing record by its integer id, or a record created by
+    the same sync request by its `temp_id` string.
+    """
+
+    default_error_messages = {
+        "invalid": "Expected an id or a temporary id string."
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail("invalid")
+        if data == "":
+            self.fail("invalid")
+        return data
+
+    def to_representation(self, value):
+        return value
+
+
+class SyncPatientSerializer(CreatePatientSerializer):
+    temp_id = CharField()
+    age = IntegerField(allow_null=True, required=False)
+    hospital_id = None
+    patient_hospital_id = None
+
+    class Meta(CreatePatientSerializer.Meta):
+        fields = [
+            "temp_id",
+            *[
+                field
+                for field in CreatePatientSerializer.Meta.fields
+                if field not in ["hospital_id", "patient_hospital_id"]
+            ],
+        ]
+        # Checked for the whole request at once by `SyncSerializer`
+        extra_kwargs = {"national_id": {"validators": []}}
+
+    def validate(self, attrs):
+        # The year of birth is checked by `SyncSerializer`, with the index of
+        # the record in the error
+        return attrs
+
+
+class SyncPatientHospitalMappingSerializer(Serializer):
+    temp_id = CharField()
+    patient = SyncReferenceField()
+    hospital_id = IntegerField()
+    patient_hospital_id = CharField()
+
+
+class SyncEpisodeSerializer(EpisodeWriteSerializer):
+    temp_id = CharField()
+    patient_hospital_mapping = SyncReferenceField()
+    surgeon_ids = ListField(child=IntegerField())
+    patient_id = None
+    hospital_id = None
+
+    class Meta(EpisodeWriteSerializer.Meta):
+        fields = [
+            "temp_id",
+            "patient_hospital_mapping",
+            *[
+                field
+                for field in EpisodeWriteSerializer.Meta.fields
+                if field not in ["patient_id", "hospital_id"]
+            ],
+        ]
+
+
+class SyncDischargeSerializer(DischargeWriteSerializer):
+    temp_id = CharField()
+    episode = SyncReferenceField()
+    episode_id = None
+
+    class Meta(DischargeWriteSerializer.Meta):
+        fields = [
+            "temp_id",
+            "episode",
+            *[
+                field
+                for field in DischargeWriteSerializer.Meta.fields
+                if field != "episode_id"
+            ],
+        ]
+
+
+class SyncFollowUpSerializer(FollowUpWriteSerializer):
+    temp_id = CharField()
+    episode = SyncReferenceField()
+    attendee_ids = ListField(child=IntegerField())
+    episode_id = None
+
+    class Meta(FollowUpWriteSerializer.Meta):
+        fields = [
+            "temp_id",
+            "episode",
+            *[
+                field
+                for field in FollowUpWriteSerializer.Meta.fields
+                if field != "episode_id"
+            ],
+        ]
+
+
+SYNC_ITEM_SERIALIZERS = {
+    "patients": SyncPatientSerializer,
+    "patient_hospital_mappings": SyncPatientHospitalMappingSerializer,
+    "episodes": SyncEpisodeSerializer,
+    "discharges": SyncDischargeSerializer,
+    "follow_ups": SyncFollowUpSerializer,
+}
+
+
+class SyncSerializer(Serializer):
+    """
+    Create the records a client collected offline in one transaction.
+
+    The records of a section may reference the records of the previous
+    sections by their `temp_id`, or existing records by their id. Every
+    section is validated with a fixed number of queries and inserted with
+    `bulk_create`. Nothing is created if any record is invalid.
+    """
+
+    patients = ListField(child=DictField(), required=False, default=list)
+    patient_hospital_mappings = ListField(
+        child=DictField(), required=False, default=list
+    )
+    episodes = ListField(child=DictField(), required=False, default=list)
+    discharges = ListField(child=DictField(), required=False, default=list)
+    follow_ups = ListField(child=DictField(), required=False, default=list)
+
+    def validate(self, attrs):
+        records = sum(len(attrs[section]) for section in SYNC_SECTIONS)
+        if not records:
+            raise ValidationError({"error": "There is nothing to sync."})
+        if records > SYNC_LIMIT:
+            raise ValidationError(
+                {
+                    "error": f"Up to {SYNC_LIMIT} records can be synced at "
+                    "once."
+                }
+            )
+
+        errors = {}
+        for section in SYNC_SECTIONS:
+            temp_ids = set()
+            for index, item in enumerate(attrs[section]):
+                serializer = SYNC_ITEM_SERIALIZERS[section](data=item)
+                if not serializer.is_valid():
+                    errors[f"{section}[{index}]"] = serializer.errors
+                    continue
+
+                temp_id = serializer.validated_data["temp_id"]
+                if temp_id in temp_ids:
+                    errors[f"{section}[{index}]"] = {
+                        "temp_id": f"Duplicate temporary id {temp_id}."
+                    }
+                temp_ids.add(temp_id)
+                attrs[section][index] = serializer.validated_data
+        if errors:
+            raise ValidationError(errors)
+
+        return attrs
+
+    def create(self, validated_data):
+        """
+        :return: The id of every created record, by section and `temp_id`
+        :rtype: dict
+        """
+        self.errors_by_item = {}
+        self.id_map = {section: {} for section in SYNC_SECTIONS}
+        # Hospital of the referenced mappings and surgery and discharge
+        # dates of the referenced episodes, for the checks
+        self.mapping_hospital_ids = {}
+        self.episode_dates = {}
+
+        with transaction.atomic():
+            self.sync_patients(validated_data["patients"])
+            self.sync_patient_hospital_mappings(
+                validated_data["patient_hospital_mappings"]
+            )
+            self.sync_episodes(validated_data["episodes"])
+            self.sync_discharges(validated_data["discharges"])
+            self.sync_follow_ups(validated_data["follow_ups"])
+
+            bump_stats_version()
+
+        return self.id_map
+
+    def add_error(self, section, index, error):
+        self.errors_by_item[f"{section}[{index}]"] = {"error": error}
+
+    def raise_errors(self):
+        # Raised inside the transaction, so the previous sections are rolled
+        # back too
+        if self.errors_by_item:
+            raise ValidationError(self.errors_by_item)
+
+    def resolve(self, section, reference, existing_ids):
+        """
+        :return: The id of the referenced record, `None` if it does not
+            exist
+        :rtype: int
+        """
+        if isinstance(reference, str):
+            return self.id_map[section].get(reference)
+        return reference if reference in existing_ids else None
+
+    @staticmethod
+    def get_existing_ids(items, field):
+        return {
+            item[field] for item in items if not isinstance(item[field], str)
+        }
+
+    def sync_patients(self, items):
+        national_ids = [
+            item["national_id"] for item in items if item.get("national_id")
+        ]
+        existing_national_ids = set(
+            Patient.objects.filter(national_id__in=national_ids).values_list(
+                "national_id", flat=True
+            )
+        )
+
+        patients = []
+        seen_national_ids = set()
+        for index, item in enumerate(items):
+            national_id = item.get("national_id")
+            if national_id and (
+                national_id in existing_national_ids
+                or national_id in seen_national_ids
+            ):
+                self.add_error(
+                    "patients",
+                    index,
+                    NATIONAL_ID_EXISTS_ERROR.format(national_id=national_id),
+                )
+                continue
+            seen_national_ids.add(national_id)
+
+            year_of_birth = item.get("year_of_birth")
+            if not year_of_birth and item.get("age"):
+                year_of_birth = Patient.get_year_of_birth_from_age(item["age"])
+            if not year_of_birth:
+                self.add_error(
+                    "patients",
+                    index,
+                    "Either 'age' or 'year_of_birth' should be populated.",
+                )
+                continue
+
+            patient = Patient(
+                full_name=item["full_name"],
+                national_id=national_id,
+                day_of_birth=item.get("day_of_birth"),
+                month_of_birth=item.get("month_of_birth"),
+                year_of_birth=year_of_birth,
+                gender=item["gender"],
+                phone_1=item["phone_1"],
+                phone_2=item.get("phone_2"),
+                address=item.get("address"),
+            )
+            patient.set_identifier_digits()
+            patients.append((item["temp_id"], patient))
+        self.raise_errors()
+
+        try:
+            with transaction.atomic():
+                Patient.objects.bulk_create(
+                    [patient for _, patient in patients]
+                )
+        except IntegrityError:
+            # A concurrent request registered one of the national ids after
+            # they were checked
+            registered_national_ids = set(
+                Patient.objects.filter(
+                    national_id__in=national_ids
+                ).values_list("national_id", flat=True)
+            )
+            if not registered_national_ids:
+                raise
+            for index, item in enumerate(items):
+                national_id = item.get("national_id")
+                if national_id in registered_national_ids:
+                    self.add_error(
+                        "patients",
+                        index,
+                        NATIONAL_ID_EXISTS_ERROR.format(
+                            national_id=national_id
+                        ),
+                    )
+            self.raise_errors()
+
+        for temp_id, patient in patients:
+            self.id_map["patients"][temp_id] = patient.id
+
+    def sync_patient_hospital_mappings(self, items):
+        existing_patient_ids = set(
+            Patient.objects.filter(
+                id__in=self.get_existing_ids(items, "patient")
+            ).values_list("id", flat=True)
+        )
+        hospital_ids = set(
+            Hospital.objects.filter(
+                id__in={item["hospital_id"] for item in items}
+            ).values_list("id", flat=True)
+        )
+
+        mappings = []
+        for index, item in enumerate(items):
+            patient_id = self.resolve(
+                "patients", item["patient"], existing_patient_ids
+            )
+            if patient_id is None:
+                self.add_error(
+                    "patient_hospital_mappings",
+                    index,
+                    f"Patient {item['patient']} does not exist.",
+                )
+            elif item["hospital_id"] not in hospital_ids:
+                self.add_error(
+                    "patient_hospital_mappings",
+                    index,
+                    f"Hospital {item['hospital_id']} does not exist.",
+                )
+            elif not item["patient_hospital_id"].isdigit():
+                self.add_error(
+                    "patient_hospital_mappings",
+                    index,
+                    "The 'patient_hospital_id' field should be an integer.",
+                )
+            else:
+                mappings.append(
+                    (
+                        index,
+                        item["temp_id"],
+                        PatientHospitalMapping(
+                            patient_id=patient_id,
+                            hospital_id=item["hospital_id"],
+                            patient_hospital_id=str(
+                                int(item["patient_hospital_id"])
+                            ),
+                        ),
+                    )
+                )
+
+        # Superset of the conflicting mappings, narrowed down below
+        # pylint: disable=unsupported-binary-operation
+        existing = PatientHospitalMapping.objects.filter(
+            Q(
+                patient_id__in={
+                    mapping.patient_id for _, _, mapping in mappings
+                }
+            )
+            | Q(
+                patient_hospital_id__in={
+                    mapping.patient_hospital_id for _, _, mapping in mappings
+                }
+            ),
+            hospital_id__in=hospital_ids,
+            # pylint: enable=unsupported-binary-operation
+        ).values_list("patient_id", "hospital_id", "patient_hospital_id")
+        patient_keys = set()
+        patient_hospital_id_keys = set()
+        for patient_id, hospital_id, patient_hospital_id in existing:
+            patient_keys.add((patient_id, hospital_id))
+            patient_hospital_id_keys.add((hospital_id, patient_hospital_id))
+
+        new_mappings = []
+        for index, temp_id, mapping in mappings:
+            patient_key = (mapping.patient_id, mapping.hospital_id)
+            patient_hospital_id_key = (
+                mapping.hospital_id,
+                mapping.patient_hospital_id,
+            )
+            if patient_key in patient_keys:
+                self.add_error(
+                    "patient_hospital_mappings",
+                    index,
+                    f"PatientHospitalMapping for patient_id "
+                    f"{mapping.patient_id} and hospital_id "
+                    f"{mapping.hospital_id} already exists!",
+                )
+            elif patient_hospital_id_key in patient_hospital_id_keys:
+                self.add_error(
+                    "patient_hospital_mappings",
+                    index,
+                    f"Patient Hospital ID {mapping.patient_hospital_id} "
+                    "already exists for another patient in this hospital",
+                )
+            else:
+                patient_keys.add(patient_key)
+                patient_hospital_id_keys.add(patient_hospital_id_key)
+                new_mappings.append((temp_id, mapping))
+        self.raise_errors()
+
+        PatientHospitalMapping.objects.bulk_create(
+            [mapping for _, mapping in new_mappings]
+        )
+        for temp_id, mapping in new_mappings:
+            self.id_map["patient_hospital_mappings"][temp_id] = mapping.id
+            self.mapping_hospital_ids[mapping.id] = mapping.hospital_id
+
+    def sync_episodes(self, items):
+        self.mapping_hospital_ids.update(
+            PatientHospitalMapping.objects.filter(
+                id__in=self.get_existing_ids(items, "patient_hospital_mapping")
+            ).values_list("id", "hospital_id")
+        )
+        surgeon_ids = set(
+            MedicalPersonnel.objects.filter(
+                id__in={
+                    surgeon_id
+                    for item in items
+                    for surgeon_id in item["surgeon_ids"]
+                }
+            ).values_list("id", flat=True)
+        )
+
+        episodes = []
+        for index, item in enumerate(items):
+            mapping_id = self.resolve(
+                "patient_hospital_mappings",
+                item["patient_hospital_mapping"],
+                self.mapping_hospital_ids,
+            )
+            unknown_surgeon_ids = set(item["surgeon_ids"]) - surgeon_ids
+            if mapping_id is None:
+                self.add_error(
+                    "episodes",
+                    index,
+                    f"PatientHospitalMapping "
+                    f"{item['patient_hospital_mapping']} does not exist.",
+                )
+                continue
+            if unknown_surgeon_ids:
+                self.add_error(
+                    "episodes",
+                    index,
+                    f"Surgeons {sorted(unknown_surgeon_ids)} do not exist.",
+                )
+                continue
+
+            fields = EpisodeWriteSerializer.get_episode_fields(item)
+            episodes.append(
+                (
+                    item["temp_id"],
+                    Episode(patient_hospital_mapping_id=mapping_id, **fields),
+                    list(dict.fromkeys(item["surgeon_ids"])),
+                )
+            )
+        self.raise_errors()
+
+        Episode.objects.bulk_create([episode for _, episode, _ in episodes])
+        EpisodeSurgeon = Episode.surgeons.through
+        EpisodeSurgeon.objects.bulk_create(
+            [
+                EpisodeSurgeon(
+                    episode_id=episode.id, medicalpersonnel_id=surgeon_id
+                )
+                for _, episode, episode_surgeon_ids in episodes
+                for surgeon_id in episode_surgeon_ids
+            ]
+        )
+        record_bulk_created_episodes(
+            [episode for _, episode, _ in episodes],
+            hospital_ids=self.mapping_hospital_ids,
+            surgeon_ids={
+                episode.id: episode_surgeon_ids
+                for _, episode, episode_surgeon_ids in episodes
+            },
+        )
+
+        for temp_id, episode, _ in episodes:
+            self.id_map["episodes"][temp_id] = episode.id
+            self.episode_dates[episode.id] = (episode.surgery_date, None)
+
+    def load_episode_dates(self, items):
+        for episode_id, surgery_date, discharge_date in Episode.objects.filter(
+            id__in=self.get_existing_ids(items, "episode")
+        ).values_list("id", "surgery_date", "discharge__date"):
+            self.episode_dates[episode_id] = (surgery_date, discharge_date)
+
+    def sync_discharges(self, items):
+        self.load_episode_dates(items)
+
+        discharges = []
+        for index, item in enumerate(items):
+            episode_id = self.resolve(
+                "episodes", item["episode"], self.episode_dates
+            )
+            if episode_id is None:
+                self.add_error(
+                    "discharges",
+                    index,
+                    f"Episode {item['episode']} does not exist.",
+                )
+                continue
+
+            surgery_date, discharge_date = self.episode_dates[episode_id]
+            if discharge_date is not None:
+                self.add_error(
+                    "discharges",
+                    index,
+                    f"Episode {item['episode']} is already discharged.",
+                )
+                continue
+            if surgery_date and surgery_date > item["date"]:
+                self.add_error(
+                    "discharges",
+                    index,
+                    "Episode surgery date cannot be after Discharge date",
+                )
+                continue
+
+            self.episode_dates[episode_id] = (surgery_date, item["date"])
+            discharges.append(
+                (
+                    item["temp_id"],
+                    Discharge(
+                        episode_id=episode_id,
+                        date=item["date"],
+                        aware_of_mesh=item["aware_of_mesh"],
+                        infection=item.get("infection", ""),
+                        discharge_duration=item.get("discharge_duration"),
+                        comments=item.get("comments", ""),
+                    ),
+                )
+            )
+        self.raise_errors()
+
+        Discharge.objects.bulk_create(
+            [discharge for _, discharge in discharges]
+        )
+        for temp_id, discharge in discharges:
+            self.id_map["discharges"][temp_id] = discharge.id
+
+    def sync_follow_ups(self, items):
+        self.load_episode_dates(items)
+        attendee_ids = set(
+            MedicalPersonnel.objects.filter(
+                id__in={
+                    attendee_id
+                    for item in items
+                    for attendee_id in item["attendee_ids"]
+                }
+            ).values_list("id", flat=True)
+        )
+
+        follow_ups = []
+        for index, item in enumerate(items):
+            episode_id = self.resolve(
+                "episodes", item["episode"], self.episode_dates
+            )
+            if episode_id is None:
+                self.add_error(
+                    "follow_ups",
+                    index,
+                    f"Episode {item['episode']} does not exist.",
+                )
+                continue
+
+            surgery_date, discharge_date = self.episode_dates[episode_id]
+            unknown_attendee_ids = set(item["attendee_ids"]) - attendee_ids
+            if discharge_date is None:
+                error = f"Episode {item['episode']} is not discharged."
+            elif surgery_date and surgery_date > item["date"]:
+                error = "Episode surgery date cannot be after Follow Up date"
+            elif discharge_date > item["date"]:
+                error = "Episode Discharge date cannot be after Follow Up date"
+            elif unknown_attendee_ids:
+                error = (
+                    f"Attendees {sorted(unknown_attendee_ids)} do not exist."
+                )
+            else:
+                error = None
+            if error:
+                self.add_error("follow_ups", index, error)
+                continue
+
+            follow_ups.append(
+                (
+                    item["temp_id"],
+                    FollowUp(
+                        episode_id=episode_id,
+                        date=item["date"],
+                        pain_severity=item["pain_severity"],
+                        mesh_awareness=item["mesh_awareness"],
+                        seroma=item["seroma"],
+                        infection=item["infection"],
+                        numbness=item["numbness"],
+                        recurrence=item.get("recurrence"),
+                        further_surgery_need=item["further_surgery_need"],
+                        surgery_comments_box=item.get(
+                            "surgery_comments_box", ""
+                        ),
+                    ),
+                    list(dict.fromkeys(item["attendee_ids"])),
+                )
+            )
+        self.raise_errors()
+
+        FollowUp.objects.bulk_create(
+            [follow_up for _, follow_up, _ in follow_ups]
+        )
+        FollowUpAttendee = FollowUp.attendees.through
+        FollowUpAttendee.objects.bulk_create(
+            [
+                FollowUpAttendee(
+                    followup_id=follow_up.id, medicalpersonnel_id=attendee_id
+                )
+                for _, follow_up, follow_up_attendee_ids in follow_ups
+                for attendee_id in follow_up_attendee_ids
+            ]
+        )
+        for temp_id, follow_up, _ in follow_ups:
+            self.id_map["follow_ups"][temp_id] = follow_up.id
@@ -1,8 +1,12 @@
+from collections import defaultdict
 from typing import Any
 
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import CharField, Count, Exists, Max, OuterRef, Q
-from django.db.models.functions import Cast
+from django.db.models import Count, Exists, F, Max, OuterRef, Prefetch, Q
+from django.utils.dateparse import parse_date
 from django.utils.decorators import method_decorator
 from django.utils.timezone import now, timedelta
 from django_filters import (  # pylint: disable=E0401
@@ -16,13 +20,20 @@ from drf_yasg.openapi import IN_QUERY, TYPE_INTEGER, TYPE_STRING, Parameter
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import (
+    NotFound,
+    PermissionDenied,
+    ValidationError,
+)
 from rest_framework.mixins import CreateModelMixin, RetrieveModelMixin
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.status import HTTP_201_CREATED
 from rest_framework.viewsets import GenericViewSet, ReadOnlyModelViewSet
 
+from ...users.api.permissions import IsMedicalPersonnel
 from ...users.models import MedicalPersonnel
+from ..cache import get_cached_stats, get_stats_cache_counters
 from ..models import (
     Announcement,
     Discharge,
@@ -32,25 +43,148 @@ from ..models import (
     Patient,
     PatientHospitalMapping,
     PreferredHospital,
+    SurgeonEpisodeRollup,
+)
+from ..scopes import get_hospitals_in_scope, get_preferred_hospital_id
+from ..search import (
+    autocomplete_mappings,
+    get_identifier_digits,
+    has_trigram_support,
+)
+from ..stats import (
+    OUTCOME_GROUPINGS,
+    TIME_SERIES_INTERVALS,
+    TIME_SERIES_SPLITS,
+    get_global_stats,
+    get_hierarchy_stats,
+    get_hospital_stats,
+    get_outcome_stats,
+    get_region_stats,
+    get_surgeon_leaderboard,
+    get_surgeon_summary,
+    get_time_series_stats,
+    get_zone_stats,
+)
+from .conditional import conditional_get, get_versions
+from .idempotency import (
+    IDEMPOTENCY_KEY_PARAMETER,
+    IdempotentCreateMixin,
+    idempotent,
 )
+from .pagination import PatientPagination, SurgeonLeaderboardPagination
 from .serializers import (
+    EPISODE_BULK_IMPORT_LIMIT,
+    PATIENT_BULK_LOOKUP_LIMIT,
     AnnouncementSerializer,
     CreatePatientSerializer,
     DischargeReadSerializer,
     DischargeWriteSerializer,
+    EpisodeBulkImportSerializer,
     EpisodeReadSerializer,
     EpisodeWriteSerializer,
+    FollowUpDueEpisodeSerializer,
     FollowUpReadSerializer,
     FollowUpWriteSerializer,
     HospitalSerializer,
     OwnedEpisodeSerializer,
+    PatientAutocompleteSerializer,
+    PatientBulkLookupResultSerializer,
+    PatientBulkLookupSerializer,
     PatientHospitalMappingReadSerializer,
     PatientHospitalMappingWriteSerializer,
     PreferredHospitalReadSerializer,
     ReadPatientSerializer,
     SurgeonEpisodeSummarySerializer,
+    SurgeonLeaderboardSerializer,
     UnlinkedPatientSerializer,
 )
+from .sync import SYNC_LIMIT, SyncSerializer
+
+PATIENT_AUTOCOMPLETE_LIMIT = 10
+# Longer prefixes are rarely typed again and are not cached
+PATIENT_AUTOCOMPLETE_CACHED_PREFIX_LENGTH = 32
+
+# An episode is serialized with its patient and hospital, see
+# `EpisodeReadSerializer`
+EPISODE_PATIENT_PATH = "patient_hospital_mapping__patient__"
+EPISODE_HOSPITAL_UPDATED_AT = "patient_hospital_mapping__hospital__updated_at"
+
+
+def get_date_query_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValidationError(
+            {name: "Dates should be formatted as YYYY-MM-DD."}
+        )
+
+    return date
+
+
+def get_list_query_param(request, name):
+    value = request.query_params.get(name, "")
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+class SparseFieldsetViewMixin:
+    """
+    Let `list` and `retrieve` requests narrow the response with
+    `?fields=id,full_name` and add nested fields back with `?expand=`.
+    Without `?fields=` the response is unchanged.
+    """
+
+    expandable_fields = ()
+
+    def get_requested_fields(self):
+        if self.action not in ["list", "retrieve"]:
+            return None
+
+        fields = get_list_query_param(self.request, "fields")
+        if not fields:
+            return None
+
+        available_fields = self.get_serializer_class().Meta.fields
+        if not fields.issubset(available_fields):
+            raise ValidationError(
+                {"fields": f"Accepted values are {available_fields}."}
+            )
+        expand = get_list_query_param(self.request, "expand")
+        if not expand.issubset(self.expandable_fields):
+            raise ValidationError(
+                {
+                    "expand": f"Accepted values are {list(self.expandable_fields)}."
+                }
+            )
+
+        return fields | expand
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
+
+
+SPARSE_FIELDSET_PARAMETERS = [
+    Parameter(
+        "fields",
+        IN_QUERY,
+        description="Comma separated fields to return, e.g. `fields=id,full_name`. Returns every field if omitted.",
+        type=TYPE_STRING,
+    ),
+    Parameter(
+        "expand",
+        IN_QUERY,
+        description="Comma separated nested fields to add to the `fields`.",
+        type=TYPE_STRING,
+    ),
+]
 
 
 class HospitalViewSet(viewsets.ReadOnlyModelViewSet):
@@ -88,21 +222,48 @@ class SurgeonEpisodeSummaryViewSet(viewsets.ReadOnlyModelViewSet):
         try:
             medical_personnel = MedicalPersonnel.objects.get(user=user)
         except MedicalPersonnel.DoesNotExist:
-            return Episode.objects.none()
+            return SurgeonEpisodeRollup.objects.none()
 
-        return Episode.objects.filter(surgeons=medical_personnel)
+        return SurgeonEpisodeRollup.objects.filter(
+            medical_personnel=medical_personnel
+        )
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
 
-        stats = queryset.aggregate(
-            episode_count=Count("id"), last_episode_date=Max("surgery_date")
+        stats = get_cached_stats(
+            "surgeon-episode-summary",
+            request.user.pk,
+            lambda: get_surgeon_summary(queryset),
         )
 
         serializer = self.get_serializer(stats)
         return Response(serializer.data)
 
 
+@method_decorator(
+    name="list",
+    decorator=swagger_auto_schema(
+        operation_summary="List the surgeons of a lead's scope",
+        operation_description="Per-surgeon episode counts, last surgery date "
+        "and discharge and follow-up completion for the episodes of the "
+        "hospitals in the lead's scope. Centre leads see their preferred "
+        "hospital, regional and zonal leads its region or zone and national "
+        "leads every hospital. Ordered by episode count.",
+    ),
+)
+class SurgeonLeaderboardViewSet(mixins.ListModelMixin, GenericViewSet):
+    serializer_class = SurgeonLeaderboardSerializer
+    pagination_class = SurgeonLeaderboardPagination
+
+    def get_queryset(self):
+        hospitals = get_hospitals_in_scope(self.request.user.medical_personnel)
+        if hospitals is None:
+            raise PermissionDenied("Only leads can view the leaderboard.")
+
+        return get_surgeon_leaderboard(hospitals)
+
+
 class OwnedEpisodesViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     serializer_class = OwnedEpisodeSerializer
@@ -123,6 +284,58 @@ class OwnedEpisodesViewSet(viewsets.ReadOnlyModelViewSet):
         return episodes
 
 
+@method_decorator(
+    name="list",
+    decorator=swagger_auto_schema(
+        operation_summary="List the episodes overdue for a follow up",
+        operation_description="Episodes of the preferred hospital that were "
+        "discharged more than `days` days ago and have no follow up since "
+        "their discharge date, most overdue first.",
+        manual_parameters=[
+            Parameter(
+                "days",
+                IN_QUERY,
+                description="Days after the discharge date a follow up is "
+                f"due. Defaults to `{settings.FOLLOW_UP_DUE_DAYS}`.",
+                type=TYPE_INTEGER,
+            ),
+        ],
+    ),
+)
+class FollowUpDueEpisodesViewSet(mixins.ListModelMixin, GenericViewSet):
+    serializer_class = FollowUpDueEpisodeSerializer
+
+    def get_queryset(self):
+        preferred_hospital_id = get_preferred_hospital_id(
+            self.request.user.medical_personnel
+        )
+        if preferred_hospital_id is None:
+            return Episode.objects.none()
+
+        days = self.request.query_params.get("days", "")
+        if not days:
+            days = settings.FOLLOW_UP_DUE_DAYS
+        elif days.isdigit():
+            days = int(days)
+        else:
+            raise ValidationError({"days": "Should be a positive integer."})
+
+        follow_ups_since_discharge = FollowUp.objects.filter(
+            episode_id=OuterRef("pk"), date__gte=OuterRef("discharge__date")
+        )
+
+        return (
+            Episode.objects.filter(
+                patient_hospital_mapping__hospital_id=preferred_hospital_id,
+                discharge__date__lte=now().date() - timedelta(days=days),
+            )
+            .filter(~Exists(follow_ups_since_discharge))
+            .annotate(discharge_date=F("discharge__date"))
+            .select_related("patient_hospital_mapping__patient")
+            .order_by("discharge_date", "id")
+        )
+
+
 class PatientFilterSet(FilterSet):
     hospital_id = NumberFilter(
         method="filter_hospital",
@@ -146,19 +359,26 @@ class PatientFilterSet(FilterSet):
 
     def filter_search_term(self, queryset, name, value):
         selected_hospital_id_value = self.data.get("hospital_id")
-        if value:
-            patient_ids = (
-                PatientHospitalMapping.objects.annotate(
-                    patient_hospital_id_str=Cast(
-                        "patient_hospital_id", CharField()
-                    )
-                )
-                .filter(
-                    Q(patient_hospital_id_str__contains=str(value))
-                    & Q(hospital_id=selected_hospital_id_value)
-                )
-                .values_list("patient_id", flat=True)
+        digits = get_identifier_digits(value) if value else None
+        if digits:
+            # Exact national id or phone matches are answered from the
+            # B-tree indexes of the digits only columns. Partial identifiers
+            # fall through to the fuzzy search.
+            # pylint: disable=unsupported-binary-operation
+            matches = queryset.filter(
+                Q(national_id_digits=digits)
+                | Q(phone_1_digits=digits)
+                | Q(phone_2_digits=digits)
+                # pylint: enable=unsupported-binary-operation
             )
+            if matches.exists():
+                return matches
+        if value:
+            patient_ids = PatientHospitalMapping.objects.filter(
+                patient_hospital_id__contains=str(value),
+                hospital_id=selected_hospital_id_value,
+            ).values_list("patient_id", flat=True)
+            # The lookups are served by the trigram indexes on Postgres
             # pylint: disable=unsupported-binary-operation
             queryset = queryset.filter(
                 Q(full_name__icontains=value)
@@ -166,6 +386,10 @@ class PatientFilterSet(FilterSet):
                 | Q(id__in=patient_ids)
                 # pylint: enable=unsupported-binary-operation
             )
+            if not self.data.get("ordering") and has_trigram_support():
+                queryset = queryset.annotate(
+                    similarity=TrigramSimilarity("full_name", value)
+                ).order_by("-similarity", "id")
             return queryset
         return queryset
 
@@ -181,6 +405,7 @@ class PatientFilterSet(FilterSet):
         operation_description="Use this endpoint to register a patient. A PatientHospitalMapping will be created "
         "automatically for the newly created Patient and the provided Hospital.\n "
         f"\nAccepted values for `gender` are `{Patient.Gender.labels}`. \n ",
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={201: ReadPatientSerializer(many=True)},
     ),
 )
@@ -206,38 +431,252 @@ class PatientFilterSet(FilterSet):
                 "search_term",
                 IN_QUERY,
                 description="Filter patients with search term. A patient will be returned if national id is an exact "
-                "match or full name is even partially matched.",
+                "match or full name is even partially matched. Without `ordering` the results are ranked by "
+                "full name similarity. A term of digits and separators, e.g. `+255 712-345-678`, that exactly "
+                "matches a national id or phone number only returns those patients.",
                 type=TYPE_INTEGER,
             ),
+            Parameter(
+                "pagination",
+                IN_QUERY,
+                description="Set to `cursor` to page with the `next` and `previous` cursor links instead of "
+                "`offset`. Cursor pages keep the `ordering` and skip the total count.",
+                type=TYPE_STRING,
+            ),
+            Parameter(
+                "count",
+                IN_QUERY,
+                description="Set to `exact` to count every matching patient. The `count` is otherwise estimated "
+                "unless an exact count of the same query is cached, and `count_is_exact` tells which one it is.",
+                type=TYPE_STRING,
+            ),
+            *SPARSE_FIELDSET_PARAMETERS,
         ],
         responses={200: ReadPatientSerializer()},
     ),
 )
+@method_decorator(
+    name="retrieve",
+    decorator=swagger_auto_schema(
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS
+    ),
+)
 class PatientViewSet(
+    SparseFieldsetViewMixin,
+    IdempotentCreateMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
     filterset_class = PatientFilterSet
+    pagination_class = PatientPagination
+    expandable_fields = ("hospital_mappings", "episodes")
     queryset = Patient.objects.all()
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ["list", "retrieve", "bulk_lookup"]:
+            return queryset
+
+        fields = self.get_requested_fields()
+        if fields is not None:
+            queryset = queryset.only(
+                *ReadPatientSerializer.get_only_fields(fields)
+            )
+
+        if fields is None or "episodes" in fields:
+            # patient -> mappings -> episodes -> surgeons and their users in
+            # a fixed number of queries, whatever the page size
+            queryset = queryset.prefetch_related(
+                "hospital_mappings__episode_set",
+                Prefetch(
+                    "hospital_mappings__episode_set__surgeons",
+                    queryset=MedicalPersonnel.objects.select_related("user"),
+                ),
+            )
+        elif "hospital_mappings" in fields:
+            queryset = queryset.prefetch_related("hospital_mappings")
+
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_get(
+            request,
+            get_versions(Patient.objects, kwargs["pk"]),
+            lambda: super(PatientViewSet, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
+
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
             return ReadPatientSerializer
         if self.action == "create":
             return CreatePatientSerializer
+        if self.action == "autocomplete":
+            return PatientAutocompleteSerializer
+        if self.action == "bulk_lookup":
+            return PatientBulkLookupSerializer
 
         raise NotImplementedError
 
+    @swagger_auto_schema(
+        method="get",
+        operation_summary="Autocomplete the patients of the preferred hospital",
+        operation_description="Returns up to "
+        f"{PATIENT_AUTOCOMPLETE_LIMIT} patients of the preferred hospital whose "
+        "full name or patient hospital id starts with `q`, case insensitive.",
+        manual_parameters=[
+            Parameter(
+                "q",
+                IN_QUERY,
+                description="The typed prefix.",
+                type=TYPE_STRING,
+                required=True,
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def autocomplete(self, request):
+        prefix = request.query_params.get("q", "").strip()
+        if not prefix:
+            raise ValidationError({"q": "This parameter is required."})
+
+        hospital_id = get_preferred_hospital_id(request.user.medical_personnel)
+        if hospital_id is None:
+            return Response([])
+
+        cache_key = None
+        if len(prefix) <= PATIENT_AUTOCOMPLETE_CACHED_PREFIX_LENGTH:
+            # The lookups are case insensitive, but Python and the database
+            # may uppercase other letters differently
+            if prefix.isascii():
+                prefix = prefix.upper()
+            cache_key = (
+                f"registry:patients:autocomplete:{hospital_id}:{prefix}"
+            )
+
+        data = cache.get(cache_key) if cache_key else None
+        if data is None:
+            mappings = autocomplete_mappings(
+                hospital_id, prefix, PATIENT_AUTOCOMPLETE_LIMIT
+            )
+            data = self.get_serializer(mappings, many=True).data
+            if cache_key:
+                cache.set(
+                    cache_key,
+                    data,
+                    timeout=settings.PATIENT_AUTOCOMPLETE_CACHE_TIMEOUT,
+                )
+
+        return Response(data)
+
+    @swagger_auto_schema(
+        method="post",
+        operation_summary="Look up many patients at once",
+        operation_description="Resolves up to "
+        f"{PATIENT_BULK_LOOKUP_LIMIT} patient `ids` and `(hospital_id, "
+        "patient_hospital_id)` pairs. Returns the patients that were found, "
+        "the patient each pair resolved to and the keys that were not found.",
+        request_body=PatientBulkLookupSerializer,
+        responses={200: PatientBulkLookupResultSerializer()},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-lookup",
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def bulk_lookup(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        ids = set(serializer.validated_data["ids"])
+        identifiers = list(
+            dict.fromkeys(
+                (item["hospital_id"], item["patient_hospital_id"])
+                for item in serializer.validated_data["hospital_identifiers"]
+            )
+        )
+
+        matches = {}
+        if identifiers:
+            # One condition per hospital, each served by the unique
+            # (hospital, patient_hospital_id) index, so only the requested
+            # pairs are read.
+            patient_hospital_ids = defaultdict(list)
+            for hospital_id, patient_hospital_id in identifiers:
+                patient_hospital_ids[hospital_id].append(patient_hospital_id)
+            mappings = PatientHospitalMapping.objects.filter(
+                Q(
+                    *(
+                        Q(
+                            hospital_id=hospital_id,
+                            patient_hospital_id__in=values,
+                        )
+                        for hospital_id, values in patient_hospital_ids.items()
+                    ),
+                    _connector=Q.OR,
+                )
+            ).values_list("hospital_id", "patient_hospital_id", "patient_id")
+            matches = {
+                (hospital_id, patient_hospital_id): patient_id
+                for hospital_id, patient_hospital_id, patient_id in mappings
+            }
+
+        patients = list(
+            self.get_queryset()
+            .filter(pk__in=ids | set(matches.values()))
+            .order_by("id")
+        )
+        found_ids = {patient.id for patient in patients}
+
+        result = PatientBulkLookupResultSerializer(
+            {
+                "patients": patients,
+                "hospital_identifiers": [
+                    {
+                        "hospital_id": hospital_id,
+                        "patient_hospital_id": patient_hospital_id,
+                        "patient_id": matches[
+                            (hospital_id, patient_hospital_id)
+                        ],
+                    }
+                    for hospital_id, patient_hospital_id in identifiers
+                    if (hospital_id, patient_hospital_id) in matches
+                ],
+                "missing_ids": sorted(ids - found_ids),
+                "missing_hospital_identifiers": [
+                    {
+                        "hospital_id": hospital_id,
+                        "patient_hospital_id": patient_hospital_id,
+                    }
+                    for hospital_id, patient_hospital_id in identifiers
+                    if (hospital_id, patient_hospital_id) not in matches
+                ],
+            }
+        )
+
+        return Response(result.data)
+
 
 @method_decorator(
     name="create",
     decorator=swagger_auto_schema(
-        responses={201: PatientHospitalMappingReadSerializer()}
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        responses={201: PatientHospitalMappingReadSerializer()},
     ),
 )
-class PatientHospitalMappingViewset(CreateModelMixin, GenericViewSet):
+class PatientHospitalMappingViewset(
+    IdempotentCreateMixin, CreateModelMixin, GenericViewSet
+):
     queryset = PatientHospitalMapping.objects.all()
 
     def get_serializer_class(self):
@@ -265,20 +704,97 @@ class PatientHospitalMappingViewset(CreateModelMixin, GenericViewSet):
         f"\nAccepted values for `complexity` are `{Episode.ComplexityChoices.labels}`. \n "
         f"\nAccepted values for `mesh_type` are `{Episode.MeshTypeChoices.labels}`. \n "
         f"\nAccepted values for `anaesthetic_type` are `{Episode.AnaestheticChoices.labels}`. \n ",
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={201: EpisodeReadSerializer()},
     ),
 )
-class EpisodeViewset(CreateModelMixin, RetrieveModelMixin, GenericViewSet):
+@method_decorator(
+    name="retrieve",
+    decorator=swagger_auto_schema(
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS
+    ),
+)
+class EpisodeViewset(
+    SparseFieldsetViewMixin,
+    IdempotentCreateMixin,
+    CreateModelMixin,
+    RetrieveModelMixin,
+    GenericViewSet,
+):
     queryset = Episode.objects.all()
+    expandable_fields = ("patient_hospital_mapping", "surgeons")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        fields = self.get_requested_fields()
+        if fields is not None:
+            queryset = queryset.only(
+                *EpisodeReadSerializer.get_only_fields(fields)
+            )
+            if "surgeons" in fields:
+                queryset = queryset.prefetch_related(
+                    Prefetch(
+                        "surgeons",
+                        queryset=MedicalPersonnel.objects.select_related(
+                            "user"
+                        ),
+                    )
+                )
+
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_get(
+            request,
+            get_versions(
+                Episode.objects,
+                kwargs["pk"],
+                patient_path=EPISODE_PATIENT_PATH,
+                hospital_updated_at=Max(EPISODE_HOSPITAL_UPDATED_AT),
+            ),
+            lambda: super(EpisodeViewset, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
             return EpisodeReadSerializer
         if self.action == "create":
             return EpisodeWriteSerializer
+        if self.action == "bulk":
+            return EpisodeBulkImportSerializer
 
         raise NotImplementedError
 
+    @swagger_auto_schema(
+        method="post",
+        operation_summary="Register many Episodes at once",
+        operation_description="Every item of `episodes` takes the fields of "
+        "the POST /episodes/ endpoint. Up to "
+        f"{EPISODE_BULK_IMPORT_LIMIT} episodes are validated together and the "
+        "valid ones are registered, while the invalid ones are reported with "
+        "their errors. `results` has one entry per item, in the same order.",
+        request_body=EpisodeBulkImportSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
+    )
+    @action(detail=False, methods=["post"])
+    @idempotent
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+
+        created = sum(result["status"] == "created" for result in results)
+        return Response(
+            {
+                "created": created,
+                "failed": len(results) - created,
+                "results": results,
+            }
+        )
+
     @swagger_auto_schema(
         method="get",
         responses={
@@ -294,17 +810,31 @@ class EpisodeViewset(CreateModelMixin, RetrieveModelMixin, GenericViewSet):
         queryset=Discharge.objects.none(),
     )
     def discharge(self, request, pk=None):
-        try:
-            episode = Episode.objects.select_related("discharge").get(pk=pk)
-        except ObjectDoesNotExist:
-            raise NotFound(f"Episode {pk=} not found.")
+        versions = get_versions(
+            Episode.objects,
+            pk,
+            patient_path=EPISODE_PATIENT_PATH,
+            hospital_updated_at=Max(EPISODE_HOSPITAL_UPDATED_AT),
+            discharge_id=Max("discharge__id"),
+            discharge_updated_at=Max("discharge__updated_at"),
+        )
 
-        try:
-            data = DischargeReadSerializer(episode.discharge).data
-        except AttributeError:
-            data = {}
+        def respond():
+            try:
+                episode = Episode.objects.select_related("discharge").get(
+                    pk=pk
+                )
+            except ObjectDoesNotExist:
+                raise NotFound(f"Episode {pk=} not found.")
 
-        return Response(data)
+            try:
+                data = DischargeReadSerializer(episode.discharge).data
+            except AttributeError:
+                data = {}
+
+            return Response(data)
+
+        return conditional_get(request, versions, respond)
 
     @action(
         detail=True,
@@ -313,19 +843,71 @@ class EpisodeViewset(CreateModelMixin, RetrieveModelMixin, GenericViewSet):
         url_path="follow-ups",
     )
     def follow_ups(self, request, pk=None):
-        try:
-            episode = Episode.objects.get(pk=pk)
-        except ObjectDoesNotExist:
-            raise NotFound(f"Episode {pk=} not found.")
+        versions = get_versions(
+            Episode.objects,
+            pk,
+            patient_path=EPISODE_PATIENT_PATH,
+            follow_up_count=Count("followup", distinct=True),
+            follow_ups_updated_at=Max("followup__updated_at"),
+            attendees_updated_at=Max("followup__attendees__updated_at"),
+            hospital_updated_at=Max(EPISODE_HOSPITAL_UPDATED_AT),
+        )
 
-        follow_ups = FollowUp.objects.filter(episode_id=episode.id)
+        def respond():
+            try:
+                episode = Episode.objects.get(pk=pk)
+            except ObjectDoesNotExist:
+                raise NotFound(f"Episode {pk=} not found.")
 
-        serializer = FollowUpReadSerializer(follow_ups, many=True)
+            follow_ups = FollowUp.objects.filter(episode_id=episode.id)
 
-        return Response(serializer.data)
+            serializer = FollowUpReadSerializer(follow_ups, many=True)
+
+            return Response(serializer.data)
+
+        return conditional_get(request, versions, respond)
 
     @swagger_auto_schema(
         method="get",
+        manual_parameters=[
+            Parameter(
+                "group_by",
+                IN_QUERY,
+                description="Add grouped statistics to the response. "
+                "Possible options: `[hospital, region, zone, hierarchy]`. "
+                "`hierarchy` nests hospital rows under their region and "
+                "region rows under their zone.",
+                type=TYPE_STRING,
+            ),
+            Parameter(
+                "interval",
+                IN_QUERY,
+                description="Return episode counts per time bucket instead. "
+                "Possible options: `[week, month, quarter]`.",
+                type=TYPE_STRING,
+            ),
+            Parameter(
+                "split_by",
+                IN_QUERY,
+                description="Split every time bucket by this field. "
+                "Possible options: `[hospital, episode_type]`.",
+                type=TYPE_STRING,
+            ),
+            Parameter(
+                "from",
+                IN_QUERY,
+                description="Only count episodes with a surgery date on or "
+                "after this date, e.g. `2023-01-31`.",
+                type=TYPE_STRING,
+            ),
+            Parameter(
+                "to",
+                IN_QUERY,
+                description="Only count episodes with a surgery date on or "
+                "before this date, e.g. `2023-12-31`.",
+                type=TYPE_STRING,
+            ),
+        ],
         responses={
             200: openapi.Response(
                 "Returns `FollowUp` objects.",
@@ -335,108 +917,121 @@ class EpisodeViewset(CreateModelMixin, RetrieveModelMixin, GenericViewSet):
     )
     @action(detail=False, methods=["get"])
     def stats(self, request):
-        # period = request.query_params.get("period")
+        if request.query_params.get("interval"):
+            return self.time_series(request)
+
         group_by = request.query_params.get("group_by")
 
-        response: dict[str, Any] = {}
-
-        today = now().date()
-
-        # Period windows
-        past_year = today - timedelta(days=365)
-        past_month = today - timedelta(days=30)
-        past_week = today - timedelta(days=7)
-
-        # All time
-        all_episodes = Episode.objects.all()
-
-        # All hospital statistics
-        response["global"] = {
-            "total_episodes": all_episodes.count(),
-            "past_year_episodes": all_episodes.filter(
-                surgery_date__gte=past_year
-            ).count(),
-            "past_month_episodes": all_episodes.filter(
-                surgery_date__gte=past_month
-            ).count(),
-            "past_week_episodes": all_episodes.filter(
-                surgery_date__gte=past_week
-            ).count(),
-            "last_episode_date": all_episodes.aggregate(
-                last=Max("surgery_date")
-            )["last"],
-            "patients_without_episode": Patient.objects.filter(
-                hospital_mappings__isnull=False
+        response = get_cached_stats(
+            "episodes", group_by, lambda: self.compute_stats(group_by)
+        )
+
+        return Response(response)
+
+    @staticmethod
+    def time_series(request):
+        interval = request.query_params.get("interval")
+        if interval not in TIME_SERIES_INTERVALS:
+            raise ValidationError(
+                {
+                    "interval": f"Accepted values are {list(TIME_SERIES_INTERVALS)}."
+                }
             )
-            .annotate(
-                has_episode=Exists(
-                    Episode.objects.filter(
-                        patient_hospital_mapping__patient=OuterRef("pk")
-                    )
-                )
+        split_by = request.query_params.get("split_by")
+        if split_by and split_by not in TIME_SERIES_SPLITS:
+            raise ValidationError(
+                {
+                    "split_by": f"Accepted values are {list(TIME_SERIES_SPLITS)}."
+                }
             )
-            .filter(has_episode=False)
-            .distinct()
-            .count(),
-        }
-
-        # Hospital specific statistics
-        if group_by == "hospital":
+        date_from = get_date_query_param(request, "from")
+        date_to = get_date_query_param(request, "to")
+
+        response = get_cached_stats(
+            "episodes-time-series",
+            f"{interval}:{split_by}:{date_from}:{date_to}",
+            lambda: {
+                "interval": interval,
+                "from": date_from,
+                "to": date_to,
+                "time_series": get_time_series_stats(
+                    interval, split_by, date_from, date_to
+                ),
+            },
+        )
 
-            hospitals = Hospital.objects.all().order_by("name")
+        return Response(response)
 
-            hospital_rows = []
+    @staticmethod
+    def compute_stats(group_by):
+        response: dict[str, Any] = {"global": get_global_stats()}
 
-            for hospital in hospitals:
-                hospital_episodes = all_episodes.filter(
-                    patient_hospital_mapping__hospital=hospital
-                )
+        # Hospital, region and zone specific statistics
+        if group_by == "hospital":
+            response["by_hospital"] = get_hospital_stats()
+        elif group_by == "region":
+            response["by_region"] = get_region_stats()
+        elif group_by == "zone":
+            response["by_zone"] = get_zone_stats()
+        elif group_by == "hierarchy":
+            response["hierarchy"] = get_hierarchy_stats()
 
-                # Patients without episode
-                patients_without_episode = (
-                    Patient.objects.filter(
-                        hospital_mappings__hospital=hospital
-                    )
-                    .annotate(
-                        has_episode=Exists(
-                            Episode.objects.filter(
-                                patient_hospital_mapping__patient=OuterRef(
-                                    "pk"
-                                ),
-                                patient_hospital_mapping__hospital=hospital,
-                            )
-                        )
-                    )
-                    .filter(has_episode=False)
-                    .distinct()
-                    .count()
-                )
+        return response
 
-                hospital_rows.append(
-                    {
-                        "hospital_id": hospital.id,
-                        "hospital_name": hospital.name,
-                        "total_episodes": hospital_episodes.count(),
-                        "past_year_episodes": hospital_episodes.filter(
-                            surgery_date__gte=past_year
-                        ).count(),
-                        "past_month_episodes": hospital_episodes.filter(
-                            surgery_date__gte=past_month
-                        ).count(),
-                        "past_week_episodes": hospital_episodes.filter(
-                            surgery_date__gte=past_week
-                        ).count(),
-                        "last_episode_date": hospital_episodes.aggregate(
-                            last=Max("surgery_date")
-                        )["last"],
-                        "patients_without_episode": patients_without_episode,
-                    }
-                )
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            Parameter(
+                "group_by",
+                IN_QUERY,
+                description="Group the outcomes of every hospital by this "
+                "episode field. Possible options: `[mesh_type, episode_type]`. "
+                "Defaults to `mesh_type`.",
+                type=TYPE_STRING,
+            ),
+            Parameter(
+                "from",
+                IN_QUERY,
+                description="Only include follow ups on or after this date, "
+                "e.g. `2023-01-31`.",
+                type=TYPE_STRING,
+            ),
+            Parameter(
+                "to",
+                IN_QUERY,
+                description="Only include follow ups on or before this date, "
+                "e.g. `2023-12-31`.",
+                type=TYPE_STRING,
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    def outcomes(self, request):
+        group_by = request.query_params.get("group_by", "mesh_type")
+        if group_by not in OUTCOME_GROUPINGS:
+            raise ValidationError(
+                {"group_by": f"Accepted values are {list(OUTCOME_GROUPINGS)}."}
+            )
+        date_from = get_date_query_param(request, "from")
+        date_to = get_date_query_param(request, "to")
 
-            response["by_hospital"] = hospital_rows
+        response = get_cached_stats(
+            "outcomes",
+            f"{group_by}:{date_from}:{date_to}",
+            lambda: get_outcome_stats(group_by, date_from, date_to),
+        )
 
         return Response(response)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="stats/cache",
+        permission_classes=[IsMedicalPersonnel, IsAdminUser],
+    )
+    def stats_cache(self, request):
+        return Response(get_stats_cache_counters())
+
 
 @method_decorator(
     name="create",
@@ -444,10 +1039,13 @@ class EpisodeViewset(CreateModelMixin, RetrieveModelMixin, GenericViewSet):
         operation_summary="Discharge a Patient",
         operation_description="Use this endpoint to discharge a patient. Only one Discharge can be registered "
         "for the same Episode.",
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={201: DischargeReadSerializer()},
     ),
 )
-class DischargeViewset(CreateModelMixin, GenericViewSet):
+class DischargeViewset(
+    IdempotentCreateMixin, CreateModelMixin, GenericViewSet
+):
     queryset = Discharge.objects.all()
 
     def get_serializer_class(self):
@@ -467,10 +1065,11 @@ class DischargeViewset(CreateModelMixin, GenericViewSet):
         "for the same Episode.\n "
         "\nThe accepted values for `pain_severity` are "
         f"`{FollowUp.PainSeverityChoices.labels}`.",
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={201: FollowUpReadSerializer()},
     ),
 )
-class FollowUpViewset(CreateModelMixin, GenericViewSet):
+class FollowUpViewset(IdempotentCreateMixin, CreateModelMixin, GenericViewSet):
     queryset = FollowUp.objects.all()
 
     def get_serializer_class(self):
@@ -482,6 +1081,34 @@ class FollowUpViewset(CreateModelMixin, GenericViewSet):
         raise NotImplementedError
 
 
+@method_decorator(
+    name="create",
+    decorator=swagger_auto_schema(
+        operation_summary="Sync the records collected offline",
+        operation_description="Creates patients, patient hospital mappings, "
+        "episodes, discharges and follow ups in one transaction. Every record "
+        "has a client generated `temp_id` string. A record references a "
+        "record of an earlier section by its `temp_id`, e.g. "
+        '`"patient": "patient-1"`, or an existing record by its id, e.g. '
+        '`"patient": 12`. The other fields are those of the create endpoint '
+        f"of the record. Up to {SYNC_LIMIT} records are accepted and nothing "
+        "is created if any of them is invalid. Returns the id of every "
+        "created record by section and `temp_id`.",
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
+    ),
+)
+class SyncViewSet(GenericViewSet):
+    serializer_class = SyncSerializer
+
+    @idempotent
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        id_map = serializer.save()
+
+        return Response({"id_map": id_map}, status=HTTP_201_CREATED)
+
+
 class UnlinkedPatientsViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = UnlinkedPatientSerializer
     permission_classes = [IsAuthenticated]
@@ -496,21 +1123,11 @@ class UnlinkedPatientsViewSet(viewsets.ReadOnlyModelViewSet):
         except (MedicalPersonnel.DoesNotExist, PreferredHospital.DoesNotExist):
             return Patient.objects.none()
 
-        # Subquery: check if any Episode exists for a given patient in the preferred hospital
-        has_episode_subquery = Episode.objects.filter(
-            patient_hospital_mapping__patient=OuterRef("pk"),
-            patient_hospital_mapping__hospital=preferred_hospital,
-        )
-
-        patients = (
-            Patient.objects.filter(
-                hospital_mappings__hospital=preferred_hospital
-            )
-            .annotate(has_episode=Exists(has_episode_subquery))
-            .filter(has_episode=False)
-            .distinct()
-            .prefetch_related("hospital_mappings")
-        )
+        # A patient has a single mapping per hospital, so no distinct is needed
+        patients = Patient.objects.filter(
+            hospital_mappings__hospital=preferred_hospital,
+            hospital_mappings__episode_count=0,
+        ).prefetch_related("hospital_mappings")
 
         return patients
 
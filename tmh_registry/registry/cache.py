@@ -0,0 +1,73 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+STATS_VERSION_KEY = "registry:stats:version"
+STATS_HITS_KEY = "registry:stats:hits"
+STATS_MISSES_KEY = "registry:stats:misses"
+
+
+def get_stats_version():
+    version = cache.get(STATS_VERSION_KEY)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(STATS_VERSION_KEY, version, timeout=None):
+            version = cache.get(STATS_VERSION_KEY, version)
+    return version
+
+
+def bump_stats_version():
+    """
+    Invalidate every cached statistics response.
+
+    The version is bumped immediately and again when the surrounding
+    transaction commits, so a response computed from uncommitted data is
+    never served after the commit.
+    """
+    cache.set(STATS_VERSION_KEY, uuid4().hex, timeout=None)
+    transaction.on_commit(
+        lambda: cache.set(STATS_VERSION_KEY, uuid4().hex, timeout=None)
+    )
+
+
+def increment_counter(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add and incr
+        cache.set(key, 1, timeout=None)
+
+
+def get_cached_stats(namespace, scope, compute):
+    """
+    Return the cached statistics for `scope`, computing them on a miss.
+
+    :param str namespace: The statistics endpoint
+    :param str scope: What the response depends on, e.g. the grouping or the
+        medical personnel
+    :param callable compute: Computes the response on a cache miss
+    :return: The statistics response data
+    """
+    key = f"registry:stats:{namespace}:{get_stats_version()}:{scope}"
+
+    data = cache.get(key)
+    if data is not None:
+        increment_counter(STATS_HITS_KEY)
+        return data
+
+    increment_counter(STATS_MISSES_KEY)
+    data = compute()
+    cache.set(key, data, timeout=settings.STATS_CACHE_TIMEOUT)
+
+    return data
+
+
+def get_stats_cache_counters():
+    counters = cache.get_many([STATS_HITS_KEY, STATS_MISSES_KEY])
+    return {
+        "hits": counters.get(STATS_HITS_KEY, 0),
+        "misses": counters.get(STATS_MISSES_KEY, 0),
+    }
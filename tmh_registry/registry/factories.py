@@ -1,6 +1,6 @@
 import random
 
-from factory import LazyAttribute, SubFactory, post_generation
+from factory import LazyAttribute, Sequence, SubFactory, post_generation
 from factory.django import DjangoModelFactory
 from faker import Faker
 
@@ -10,8 +10,12 @@ from .models import (
     Episode,
     FollowUp,
     Hospital,
+    HospitalRegionMapping,
     Patient,
     PatientHospitalMapping,
+    Region,
+    RegionZoneMapping,
+    Zone,
 )
 
 faker = Faker()
@@ -25,6 +29,36 @@ class HospitalFactory(DjangoModelFactory):
     address = LazyAttribute(lambda n: faker.address())
 
 
+class ZoneFactory(DjangoModelFactory):
+    class Meta:
+        model = Zone
+
+    name = Sequence(lambda n: "Zone %s" % n)
+
+
+class RegionFactory(DjangoModelFactory):
+    class Meta:
+        model = Region
+
+    name = Sequence(lambda n: "Region %s" % n)
+
+
+class RegionZoneMappingFactory(DjangoModelFactory):
+    class Meta:
+        model = RegionZoneMapping
+
+    region = SubFactory(RegionFactory)
+    zone = SubFactory(ZoneFactory)
+
+
+class HospitalRegionMappingFactory(DjangoModelFactory):
+    class Meta:
+        model = HospitalRegionMapping
+
+    hospital = SubFactory(HospitalFactory)
+    region = SubFactory(RegionFactory)
+
+
 class PatientFactory(DjangoModelFactory):
     class Meta:
         model = Patient
@@ -0,0 +1,315 @@
+import csv
+import json
+from io import StringIO
+from itertools import islice
+
+from django.db import NotSupportedError, connection, transaction
+from django.utils import timezone
+
+from .api.serializers import CreatePatientSerializer
+from .cache import bump_stats_version
+from .models import Hospital, Patient, PatientHospitalMapping
+from .upserts import (
+    HOSPITAL_DOES_NOT_EXIST_ERROR,
+    PATIENT_HOSPITAL_ID_REGISTERED_ERROR,
+    get_national_id_conflict_error,
+)
+
+IMPORT_CHUNK_SIZE = 5000
+STAGING_TABLE = "registry_patient_import"
+REJECTED_COLUMNS = ["row", "errors"]
+
+# Columns of the patient copied from the validated rows, the digits only
+# identifiers included
+PATIENT_COLUMNS = [
+    field.column
+    for field in Patient._meta.local_concrete_fields
+    if field.name not in ("id", "created_at", "updated_at")
+]
+STAGING_COLUMNS = [
+    "row_number",
+    "source",
+    *PATIENT_COLUMNS,
+    "hospital_id",
+    "patient_hospital_id",
+]
+
+
+def get_required_columns():
+    return [
+        name
+        for name, field in CreatePatientSerializer().fields.items()
+        if field.required
+    ]
+
+
+def format_errors(errors):
+    """
+    Flatten serializer errors to one line.
+
+    :param dict errors: The errors per field
+    :rtype: str
+    """
+    return "; ".join(
+        f"{field}: {message}"
+        for field, messages in errors.items()
+        for message in messages
+    )
+
+
+def validate_row(row):
+    """
+    Validate a CSV row with the rules of `CreatePatientSerializer`. Empty
+    cells are read as nulls.
+
+    :param dict row: The row as read by `csv.DictReader`
+    :return: The staging table values, or the errors of the row
+    :rtype: tuple(list, dict)
+    """
+    data = {
+        column: value.strip() or None
+        for column, value in row.items()
+        if column is not None and value is not None
+    }
+    serializer = CreatePatientSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+
+    validated_data = dict(serializer.validated_data)
+    hospital_id = validated_data.pop("hospital_id")
+    patient_hospital_id = validated_data.pop("patient_hospital_id")
+    validated_data.pop("age", None)
+
+    patient = Patient(**validated_data)
+    patient.set_identifier_digits()
+
+    return [
+        *(
+            getattr(patient, field.attname)
+            for field in Patient._meta.local_concrete_fields
+            if field.column in PATIENT_COLUMNS
+        ),
+        hospital_id,
+        patient_hospital_id,
+    ], None
+
+
+def copy_rows(cursor, rows):
+    buffer = StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) "
+        "FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def create_staging_table(cursor):
+    # Same column types as the target tables, dropped at the end of the
+    # import
+    columns = ", ".join(
+        f"{field.column} {field.db_type(connection)}"
+        for field in Patient._meta.local_concrete_fields
+        if field.column in PATIENT_COLUMNS
+    )
+    mapping_field = PatientHospitalMapping._meta.get_field(
+        "patient_hospital_id"
+    )
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {STAGING_TABLE} ("
+        "row_number integer PRIMARY KEY, source jsonb NOT NULL, "
+        f"{columns}, hospital_id integer NOT NULL, "
+        f"patient_hospital_id {mapping_field.db_type(connection)} NOT NULL, "
+        "patient_id integer"
+        ") ON COMMIT DROP"
+    )
+
+
+def reject_staged_rows(cursor, condition, error):
+    """
+    Remove the staged rows matching a SQL condition on the `staged` alias.
+
+    :param str condition: The SQL condition
+    :param str error: The error of the rows, formatted with the CSV row
+    :return: The rejected rows with their errors
+    :rtype: list(dict)
+    """
+    cursor.execute(
+        f"DELETE FROM {STAGING_TABLE} staged WHERE {condition} "
+        "RETURNING row_number, source"
+    )
+
+    rejected = []
+    for row_number, source in cursor.fetchall():
+        row = json.loads(source)
+        rejected.append(
+            {**row, "row": row_number, "errors": error.format(**row)}
+        )
+    return rejected
+
+
+def merge_staged_rows(cursor):
+    """
+    Reject the staged rows conflicting with the registry or an earlier row
+    of the file, then insert the others with one statement per table.
+
+    :return: The number of imported patients and the rejected rows
+    :rtype: tuple(int, list(dict))
+    """
+    patient_table = Patient._meta.db_table
+    mapping_table = PatientHospitalMapping._meta.db_table
+
+    # Registrations through the API would race the conflict checks
+    cursor.execute(
+        f"LOCK TABLE {patient_table}, {mapping_table} "
+        "IN SHARE ROW EXCLUSIVE MODE"
+    )
+    cursor.execute(f"ANALYZE {STAGING_TABLE}")
+
+    rejected = reject_staged_rows(
+        cursor,
+        f"NOT EXISTS (SELECT 1 FROM {Hospital._meta.db_table} hospital "
+        "WHERE hospital.id = staged.hospital_id)",
+        "error: " + HOSPITAL_DOES_NOT_EXIST_ERROR,
+    )
+    rejected += reject_staged_rows(
+        cursor,
+        "staged.national_id IS NOT NULL AND ("
+        f"EXISTS (SELECT 1 FROM {patient_table} patient "
+        "WHERE patient.national_id = staged.national_id) OR "
+        f"EXISTS (SELECT 1 FROM {STAGING_TABLE} earlier "
+        "WHERE earlier.national_id = staged.national_id "
+        "AND earlier.row_number < staged.row_number))",
+        "national_id: " + get_national_id_conflict_error(),
+    )
+    rejected += reject_staged_rows(
+        cursor,
+        f"EXISTS (SELECT 1 FROM {mapping_table} mapping "
+        "WHERE mapping.hospital_id = staged.hospital_id "
+        "AND mapping.patient_hospital_id = staged.patient_hospital_id) OR "
+        f"EXISTS (SELECT 1 FROM {STAGING_TABLE} earlier "
+        "WHERE earlier.hospital_id = staged.hospital_id "
+        "AND earlier.patient_hospital_id = staged.patient_hospital_id "
+        "AND earlier.row_number < staged.row_number)",
+        "error: " + PATIENT_HOSPITAL_ID_REGISTERED_ERROR,
+    )
+
+    # Allocated up front so the mappings can reference the new patients
+    cursor.execute(
+        f"UPDATE {STAGING_TABLE} SET patient_id = "
+        f"nextval(pg_get_serial_sequence('{patient_table}', 'id'))"
+    )
+    now = timezone.now()
+    columns = ", ".join(PATIENT_COLUMNS)
+    cursor.execute(
+        f"INSERT INTO {patient_table} (id, created_at, updated_at, {columns}) "
+        f"SELECT patient_id, %s, %s, {columns} FROM {STAGING_TABLE} "
+        "ORDER BY row_number",
+        [now.date(), now],
+    )
+    imported = cursor.rowcount
+    cursor.execute(
+        f"INSERT INTO {mapping_table} "
+        "(patient_id, hospital_id, patient_hospital_id, episode_count) "
+        "SELECT patient_id, hospital_id, patient_hospital_id, 0 "
+        f"FROM {STAGING_TABLE} ORDER BY row_number"
+    )
+
+    return imported, rejected
+
+
+@transaction.atomic
+def import_patients(
+    file, rejected_file, chunk_size=IMPORT_CHUNK_SIZE, progress=None
+):
+    """
+    Bulk load patients and their hospital mappings from a CSV file with the
+    fields of `CreatePatientSerializer` as columns.
+
+    The file is validated in chunks that are copied with `COPY` into a
+    temporary staging table. The staged rows are then merged with
+    set-based statements, which are much faster than registering the
+    patients one by one through the API. Like `bulk_create`, no signals are
+    sent.
+
+    The rows that fail validation or conflict with an existing patient or
+    an earlier row are written to `rejected_file`, with the row number and
+    their errors. The valid rows are imported regardless.
+
+    :param file file: The CSV file, with a header row
+    :param file rejected_file: Where the rejected rows are written as CSV
+    :param int chunk_size: The rows validated and copied at once
+    :param callable progress: Called with the number of rows read and
+        rejected so far after every chunk
+    :return: The number of imported patients and rejected rows
+    :rtype: tuple(int, int)
+    :raises NotSupportedError: If the database is not PostgreSQL
+    :raises ValueError: If a required column is missing from the header
+    """
+    if connection.vendor != "postgresql":
+        raise NotSupportedError(
+            "Importing patients needs PostgreSQL for COPY and the set-based "
+            "merge."
+        )
+
+    reader = csv.DictReader(file)
+    header = reader.fieldnames or []
+    missing = [
+        column for column in get_required_columns() if column not in header
+    ]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}.")
+
+    writer = csv.DictWriter(
+        rejected_file,
+        fieldnames=[*REJECTED_COLUMNS, *header],
+        extrasaction="ignore",
+    )
+    writer.writeheader()
+
+    read = rejected = 0
+    with connection.cursor() as cursor:
+        create_staging_table(cursor)
+
+        # The header is line 1
+        rows = enumerate(reader, start=2)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            staged = []
+            for row_number, row in chunk:
+                values, errors = validate_row(row)
+                if errors:
+                    writer.writerow(
+                        {
+                            **row,
+                            "row": row_number,
+                            "errors": format_errors(errors),
+                        }
+                    )
+                    rejected += 1
+                else:
+                    source = {
+                        column: value
+                        for column, value in row.items()
+                        if column is not None
+                    }
+                    staged.append([row_number, json.dumps(source), *values])
+            copy_rows(cursor, staged)
+
+            read += len(chunk)
+            if progress:
+                progress(read, rejected)
+
+        imported, conflicts = merge_staged_rows(cursor)
+        writer.writerows(sorted(conflicts, key=lambda row: row["row"]))
+        cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+
+    if imported:
+        bump_stats_version()
+
+    return imported, rejected + len(conflicts)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from ...search import BACKFILL_BATCH_SIZE, backfill_identifier_digits
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the digits only national id and phone columns of the patients "
+        "that are used by the exact identifier search."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BACKFILL_BATCH_SIZE,
+            help="Number of patients updated at once.",
+        )
+
+    def handle(self, *args, **options):
+        updated = backfill_identifier_digits(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated the identifiers of {updated} patients."
+            )
+        )
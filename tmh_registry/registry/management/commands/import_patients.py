@@ -0,0 +1,59 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import NotSupportedError
+
+from ...imports import IMPORT_CHUNK_SIZE, import_patients
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk load patients and their hospital mappings from a CSV file with "
+        "the fields of the patient registration as columns. Rows that fail "
+        "validation or conflict with existing patients are written to a "
+        "rejected rows file, the others are imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The CSV file to import.")
+        parser.add_argument(
+            "--rejected",
+            help="Where the rejected rows are written, "
+            "<path>.rejected.csv by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="Number of rows validated and copied at once.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        rejected_path = options["rejected"] or (
+            f"{os.path.splitext(path)[0]}.rejected.csv"
+        )
+
+        def progress(read, rejected):
+            self.stdout.write(f"Read {read} rows, {rejected} rejected.")
+
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as file, open(
+                rejected_path, "w", newline="", encoding="utf-8"
+            ) as rejected_file:
+                imported, rejected = import_patients(
+                    file,
+                    rejected_file,
+                    chunk_size=options["chunk_size"],
+                    progress=progress,
+                )
+        except (NotSupportedError, OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} patients."))
+        if rejected:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Rejected {rejected} rows, see {rejected_path}."
+                )
+            )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from ...rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the EpisodeRollup and SurgeonEpisodeRollup tables from the "
+        "Episode table. Use it to backfill the rollups or to repair drift."
+    )
+
+    def handle(self, *args, **options):
+        episode_rows, surgeon_rows = rebuild_rollups()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {episode_rows} episode rollup rows and "
+                f"{surgeon_rows} surgeon rollup rows."
+            )
+        )
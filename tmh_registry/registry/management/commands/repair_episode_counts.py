@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...rollups import repair_mapping_episode_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the episode_count of every PatientHospitalMapping with its "
+        "episodes and repair the drifted ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report the drift and fail if there is any.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = repair_mapping_episode_counts(check_only=options["check"])
+
+        if not drifted:
+            self.stdout.write(
+                self.style.SUCCESS("Episode counts are consistent.")
+            )
+        elif options["check"]:
+            raise CommandError(
+                f"{drifted} mappings have drifted episode counts."
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Repaired {drifted} mapping episode counts."
+                )
+            )
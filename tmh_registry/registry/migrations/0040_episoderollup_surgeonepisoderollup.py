@@ -0,0 +1,77 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    Episode = apps.get_model("registry", "Episode")
+    EpisodeRollup = apps.get_model("registry", "EpisodeRollup")
+    SurgeonEpisodeRollup = apps.get_model("registry", "SurgeonEpisodeRollup")
+
+    EpisodeRollup.objects.bulk_create(
+        [
+            EpisodeRollup(
+                hospital_id=row["patient_hospital_mapping__hospital_id"],
+                surgery_date=row["surgery_date"],
+                episode_type=row["episode_type"],
+                episode_count=row["episode_count"],
+            )
+            for row in Episode.objects.order_by()
+            .values("patient_hospital_mapping__hospital_id", "surgery_date", "episode_type")
+            .annotate(episode_count=models.Count("id"))
+        ],
+        batch_size=1000,
+    )
+    SurgeonEpisodeRollup.objects.bulk_create(
+        [
+            SurgeonEpisodeRollup(
+                medical_personnel_id=row["medicalpersonnel_id"],
+                surgery_date=row["episode__surgery_date"],
+                episode_count=row["episode_count"],
+            )
+            for row in Episode.surgeons.through.objects.order_by()
+            .values("medicalpersonnel_id", "episode__surgery_date")
+            .annotate(episode_count=models.Count("episode_id"))
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_auto_20251211_2039'),
+        ('registry', '0039_announcement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurgeonEpisodeRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('surgery_date', models.DateField(blank=True, null=True)),
+                ('episode_count', models.PositiveIntegerField(default=0)),
+                ('medical_personnel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='episode_rollups', to='users.medicalpersonnel')),
+            ],
+            options={
+                'verbose_name_plural': 'Surgeon Episode Rollups',
+                'unique_together': {('medical_personnel', 'surgery_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EpisodeRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('surgery_date', models.DateField(blank=True, null=True)),
+                ('episode_type', models.CharField(choices=[('INGUINAL', 'Inguinal Mesh Hernia Repair'), ('INCISIONAL', 'Incisional Mesh Hernia Repair'), ('FEMORAL', 'Femoral Mesh Hernia Repair'), ('UMBILICAL', 'Umbilical/Periumbilicial Mesh Hernia Repair'), ('EPIGASTRIC', 'Epigastric Hernia')], max_length=128)),
+                ('episode_count', models.PositiveIntegerField(default=0)),
+                ('hospital', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='episode_rollups', to='registry.hospital')),
+            ],
+            options={
+                'verbose_name_plural': 'Episode Rollups',
+                'unique_together': {('hospital', 'surgery_date', 'episode_type')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0040_episoderollup_surgeonepisoderollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='episoderollup',
+            name='surgery_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0041_episoderollup_surgery_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='discharge',
+            index=models.Index(fields=['date', 'episode'], name='registry_di_date_ea2563_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='followup',
+            index=models.Index(fields=['episode', 'date'], name='registry_fo_episode_3aab38_idx'),
+        ),
+    ]
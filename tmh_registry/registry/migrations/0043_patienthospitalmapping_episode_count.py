@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:28
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_episode_counts(apps, schema_editor):
+    Episode = apps.get_model("registry", "Episode")
+    PatientHospitalMapping = apps.get_model("registry", "PatientHospitalMapping")
+
+    episode_counts = (
+        Episode.objects.filter(patient_hospital_mapping=models.OuterRef("pk"))
+        .order_by()
+        .values("patient_hospital_mapping")
+        .annotate(count=models.Count("id"))
+        .values("count")
+    )
+    PatientHospitalMapping.objects.update(
+        episode_count=Coalesce(
+            models.Subquery(episode_counts), models.Value(0)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0042_discharge_followup_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patienthospitalmapping',
+            name='episode_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_episode_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patienthospitalmapping',
+            index=models.Index(condition=models.Q(('episode_count', 0)), fields=['hospital'], name='registry_phm_no_episode_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+# `icontains` compares UPPER(column), so the trigram indexes are built on the
+# same expression for Postgres to use them.
+TRIGRAM_INDEXES = {
+    "registry_patient_full_name_trgm": (
+        "registry_patient",
+        "UPPER(full_name) gin_trgm_ops",
+    ),
+    "registry_patient_national_id_trgm": (
+        "registry_patient",
+        "UPPER(national_id) gin_trgm_ops",
+    ),
+    "registry_phm_patient_hospital_id_trgm": (
+        "registry_patienthospitalmapping",
+        "patient_hospital_id gin_trgm_ops",
+    ),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    # Servers without the contrib modules keep the sequential scans
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, (table, expression) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            f"USING gin ({expression})"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0043_patienthospitalmapping_episode_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0044_patient_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['full_name', 'id'], name='registry_pa_full_na_94322f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['created_at', 'id'], name='registry_pa_created_af1198_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+# `istartswith` compares UPPER(full_name), which a functional index with an
+# operator class can only be declared for in raw SQL on this Django version.
+def create_full_name_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS registry_patient_full_name_prefix_idx "
+        "ON registry_patient (UPPER(full_name) varchar_pattern_ops)"
+    )
+
+
+def drop_full_name_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "DROP INDEX IF EXISTS registry_patient_full_name_prefix_idx"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0045_patient_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patienthospitalmapping',
+            index=models.Index(fields=['patient_hospital_id'], name='registry_phm_phid_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(
+            create_full_name_prefix_index, drop_full_name_prefix_index
+        ),
+    ]
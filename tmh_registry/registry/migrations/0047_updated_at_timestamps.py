@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_episode_updated_at(apps, schema_editor):
+    Episode = apps.get_model("registry", "Episode")
+    Episode.objects.update(updated_at=models.F("created"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0046_patient_autocomplete_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='discharge',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='followup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='patient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_episode_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0047_updated_at_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='national_id_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='phone_1_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='phone_2_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, null=True),
+        ),
+    ]
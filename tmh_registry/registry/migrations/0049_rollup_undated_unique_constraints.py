@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:09
+
+from django.db import migrations, models
+
+
+def merge_undated_rollups(apps, schema_editor):
+    # Concurrent writers could create several undated rows for one key
+    for model_name, key in [
+        ("EpisodeRollup", ["hospital_id", "episode_type"]),
+        ("SurgeonEpisodeRollup", ["medical_personnel_id"]),
+    ]:
+        model = apps.get_model("registry", model_name)
+        undated = model.objects.filter(surgery_date__isnull=True)
+        duplicates = (
+            undated.order_by()
+            .values(*key)
+            .annotate(rows=models.Count("id"))
+            .filter(rows__gt=1)
+        )
+        for duplicate in duplicates:
+            rows = list(
+                undated.filter(
+                    **{field: duplicate[field] for field in key}
+                ).order_by("id")
+            )
+            rows[0].episode_count = sum(row.episode_count for row in rows)
+            rows[0].save(update_fields=["episode_count"])
+            model.objects.filter(id__in=[row.id for row in rows[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0048_patient_identifier_digits'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_undated_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='episoderollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('surgery_date__isnull', True)), fields=('hospital', 'episode_type'), name='registry_episoderollup_undated_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='surgeonepisoderollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('surgery_date__isnull', True)), fields=('medical_personnel',), name='registry_surgeonepisoderollup_undated_uniq'),
+        ),
+    ]
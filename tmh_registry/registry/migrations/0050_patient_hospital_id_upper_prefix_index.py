@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:28
+
+from django.db import migrations
+
+
+# `istartswith` compares UPPER(patient_hospital_id), like the full name prefix
+# index of the `0046_patient_autocomplete_prefix_indexes` migration.
+def create_patient_hospital_id_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS registry_phm_phid_prefix_idx "
+        "ON registry_patienthospitalmapping "
+        "(UPPER(patient_hospital_id) varchar_pattern_ops)"
+    )
+
+
+def drop_patient_hospital_id_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS registry_phm_phid_prefix_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0049_rollup_undated_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='patienthospitalmapping',
+            name='registry_phm_phid_prefix_idx',
+        ),
+        migrations.RunPython(
+            create_patient_hospital_id_prefix_index,
+            drop_patient_hospital_id_prefix_index,
+        ),
+    ]
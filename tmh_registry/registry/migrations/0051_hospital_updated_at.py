@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registry', '0050_patient_hospital_id_upper_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hospital',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
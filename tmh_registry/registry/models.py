@@ -7,20 +7,26 @@ from django.db.models import (
     DateField,
     DateTimeField,
     ForeignKey,
+    Index,
     ManyToManyField,
     Model,
     OneToOneField,
     PositiveIntegerField,
+    Q,
     TextChoices,
     TextField,
+    UniqueConstraint,
 )
 from tmh_registry.common.models import TimeStampMixin
+from tmh_registry.common.utils.functions import get_digits
 from tmh_registry.users.models import MedicalPersonnel
 
 
 class Hospital(Model):
     name = CharField(max_length=255, null=True, blank=True)
     address = CharField(max_length=255, null=True, blank=True)
+    # Serialized with the episodes, see `api.conditional`
+    updated_at = DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -45,10 +51,52 @@ class Patient(TimeStampMixin):
     phone_1 = CharField(max_length=16, null=True, blank=True)
     phone_2 = CharField(max_length=16, null=True, blank=True)
     address = CharField(max_length=255, null=True, blank=True)
+    # Digits only copies of the identifiers for exact lookups, see
+    # `PatientFilterSet.filter_search_term`
+    national_id_digits = CharField(
+        max_length=20, null=True, blank=True, editable=False, db_index=True
+    )
+    phone_1_digits = CharField(
+        max_length=16, null=True, blank=True, editable=False, db_index=True
+    )
+    phone_2_digits = CharField(
+        max_length=16, null=True, blank=True, editable=False, db_index=True
+    )
+
+    # Identifier field and its digits only copy
+    DIGITS_FIELDS = {
+        "national_id": "national_id_digits",
+        "phone_1": "phone_1_digits",
+        "phone_2": "phone_2_digits",
+    }
+
+    class Meta:
+        # Keyset pagination of the patient listing, see `PatientPagination`
+        indexes = [
+            Index(fields=["full_name", "id"]),
+            Index(fields=["created_at", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.full_name}"
 
+    def save(self, *args, **kwargs):
+        self.set_identifier_digits()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {
+                digits_field
+                for field, digits_field in self.DIGITS_FIELDS.items()
+                if field in update_fields
+            }
+
+        super().save(*args, **kwargs)
+
+    def set_identifier_digits(self):
+        for field, digits_field in self.DIGITS_FIELDS.items():
+            setattr(self, digits_field, get_digits(getattr(self, field)))
+
     @property
     def age(self):
         return datetime.datetime.today().year - self.year_of_birth
@@ -66,12 +114,24 @@ class PatientHospitalMapping(Model):
         Hospital, on_delete=CASCADE, related_name="patient_mappings"
     )
     patient_hospital_id = CharField(max_length=256)
+    # Maintained by the episode signals, see `rollups.py`
+    episode_count = PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = (
             ("patient", "hospital"),
             ("hospital", "patient_hospital_id"),
         )
+        indexes = [
+            Index(
+                fields=["hospital"],
+                condition=Q(episode_count=0),
+                name="registry_phm_no_episode_idx",
+            ),
+        ]
+        # The prefix index of the patient autocomplete is on
+        # UPPER(patient_hospital_id), see the
+        # `0050_patient_hospital_id_upper_prefix_index` migration
         verbose_name_plural = "Patient-Hospital Mappings"
 
     def __str__(self):
@@ -156,6 +216,7 @@ class Episode(Model):
         PatientHospitalMapping, on_delete=CASCADE
     )
     created = DateTimeField(auto_now_add=True)
+    updated_at = DateTimeField(auto_now=True)
     surgery_date = DateField(null=True, blank=True)
     episode_type = CharField(max_length=128, choices=EpisodeChoices.choices)
     surgeons = ManyToManyField(MedicalPersonnel)
@@ -181,6 +242,55 @@ class Episode(Model):
         verbose_name_plural = "Episodes"
 
 
+class EpisodeRollup(Model):
+    hospital = ForeignKey(
+        Hospital, on_delete=CASCADE, related_name="episode_rollups"
+    )
+    surgery_date = DateField(null=True, blank=True, db_index=True)
+    episode_type = CharField(
+        max_length=128, choices=Episode.EpisodeChoices.choices
+    )
+    episode_count = PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Hospital {self.hospital_id} | {self.surgery_date} ({self.episode_type}) - {self.episode_count}"
+
+    class Meta:
+        unique_together = (("hospital", "surgery_date", "episode_type"),)
+        # NULLs are distinct in the unique index above, the undated rows need
+        # their own so concurrent creations conflict, see `apply_rollup_delta`
+        constraints = [
+            UniqueConstraint(
+                fields=["hospital", "episode_type"],
+                condition=Q(surgery_date__isnull=True),
+                name="registry_episoderollup_undated_uniq",
+            )
+        ]
+        verbose_name_plural = "Episode Rollups"
+
+
+class SurgeonEpisodeRollup(Model):
+    medical_personnel = ForeignKey(
+        MedicalPersonnel, on_delete=CASCADE, related_name="episode_rollups"
+    )
+    surgery_date = DateField(null=True, blank=True)
+    episode_count = PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Medical Personnel {self.medical_personnel_id} | {self.surgery_date} - {self.episode_count}"
+
+    class Meta:
+        unique_together = (("medical_personnel", "surgery_date"),)
+        constraints = [
+            UniqueConstraint(
+                fields=["medical_personnel"],
+                condition=Q(surgery_date__isnull=True),
+                name="registry_surgeonepisoderollup_undated_uniq",
+            )
+        ]
+        verbose_name_plural = "Surgeon Episode Rollups"
+
+
 class Discharge(TimeStampMixin):
     episode = OneToOneField(
         Episode, on_delete=CASCADE, related_name="discharge"
@@ -198,6 +308,7 @@ class Discharge(TimeStampMixin):
 
     class Meta:
         verbose_name_plural = "Discharges"
+        indexes = [Index(fields=["date", "episode"])]
 
 
 class FollowUp(TimeStampMixin):
@@ -227,6 +338,7 @@ class FollowUp(TimeStampMixin):
 
     class Meta:
         verbose_name_plural = "Follow Ups"
+        indexes = [Index(fields=["episode", "date"])]
 
 
 class Zone(Model):
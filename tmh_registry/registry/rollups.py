@@ -0,0 +1,200 @@
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .cache import bump_stats_version
+from .models import (
+    Episode,
+    EpisodeRollup,
+    PatientHospitalMapping,
+    SurgeonEpisodeRollup,
+)
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def apply_rollup_delta(model, delta, **lookup):
+    """
+    Add `delta` to the `episode_count` of the rollup row matching `lookup`.
+
+    The row is created on the first increment. A concurrent creation of the
+    same row is resolved by retrying the increment.
+
+    :param type model: The rollup model
+    :param int delta: The amount to add, may be negative
+    :param lookup: The fields identifying the rollup row
+    """
+    if not delta:
+        return
+
+    updated = model.objects.filter(**lookup).update(
+        episode_count=F("episode_count") + delta
+    )
+    if updated or delta < 0:
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(episode_count=delta, **lookup)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(
+            episode_count=F("episode_count") + delta
+        )
+
+
+def update_episode_rollup(hospital_id, surgery_date, episode_type, delta):
+    apply_rollup_delta(
+        EpisodeRollup,
+        delta,
+        hospital_id=hospital_id,
+        surgery_date=surgery_date,
+        episode_type=episode_type,
+    )
+
+
+def update_surgeon_rollup(medical_personnel_ids, surgery_date, delta):
+    for medical_personnel_id in medical_personnel_ids:
+        apply_rollup_delta(
+            SurgeonEpisodeRollup,
+            delta,
+            medical_personnel_id=medical_personnel_id,
+            surgery_date=surgery_date,
+        )
+
+
+def update_mapping_episode_count(patient_hospital_mapping_id, delta):
+    PatientHospitalMapping.objects.filter(
+        pk=patient_hospital_mapping_id
+    ).update(episode_count=Greatest(F("episode_count") + delta, 0))
+
+
+def record_bulk_created_episodes(episodes, hospital_ids, surgeon_ids):
+    """
+    Apply what the `signals` receivers do for episodes inserted with
+    `bulk_create`, which sends no signals: update the rollups and the
+    mapping episode counts and invalidate the statistics cache.
+
+    :param list episodes: The created episodes
+    :param dict hospital_ids: The hospital id of every
+        `patient_hospital_mapping_id` of the episodes
+    :param dict surgeon_ids: The surgeon ids of every episode id
+    """
+    if not episodes:
+        return
+
+    episode_deltas = Counter(
+        (
+            hospital_ids[episode.patient_hospital_mapping_id],
+            episode.surgery_date,
+            episode.episode_type,
+        )
+        for episode in episodes
+    )
+    for rollup_key, delta in episode_deltas.items():
+        update_episode_rollup(*rollup_key, delta=delta)
+
+    surgeon_deltas = Counter(
+        (medical_personnel_id, episode.surgery_date)
+        for episode in episodes
+        for medical_personnel_id in surgeon_ids.get(episode.id, ())
+    )
+    for (medical_personnel_id, surgery_date), delta in surgeon_deltas.items():
+        update_surgeon_rollup([medical_personnel_id], surgery_date, delta)
+
+    mapping_deltas = Counter(
+        episode.patient_hospital_mapping_id for episode in episodes
+    )
+    mapping_ids_by_delta = defaultdict(list)
+    for patient_hospital_mapping_id, delta in mapping_deltas.items():
+        mapping_ids_by_delta[delta].append(patient_hospital_mapping_id)
+    # one update for every distinct delta rather than for every mapping
+    for delta, mapping_ids in mapping_ids_by_delta.items():
+        PatientHospitalMapping.objects.filter(pk__in=mapping_ids).update(
+            episode_count=Greatest(F("episode_count") + delta, 0)
+        )
+
+    bump_stats_version()
+
+
+@transaction.atomic
+def repair_mapping_episode_counts(check_only=False):
+    """
+    Find the mappings whose `episode_count` differs from their episodes and
+    reset it.
+
+    :param bool check_only: Only count the drifted mappings
+    :return: The number of drifted mappings
+    :rtype: int
+    """
+    actual_count = Coalesce(
+        Subquery(
+            Episode.objects.filter(patient_hospital_mapping=OuterRef("pk"))
+            .order_by()
+            .values("patient_hospital_mapping")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        Value(0),
+    )
+    drifted = PatientHospitalMapping.objects.annotate(
+        actual_count=actual_count
+    ).exclude(episode_count=F("actual_count"))
+
+    drifted_count = drifted.count()
+    if drifted_count and not check_only:
+        PatientHospitalMapping.objects.filter(
+            pk__in=drifted.values("pk")
+        ).update(episode_count=actual_count)
+
+    return drifted_count
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """
+    Recompute both rollup tables from the `Episode` table.
+
+    :return: The number of episode and surgeon rollup rows written
+    :rtype: tuple(int, int)
+    """
+    EpisodeRollup.objects.all().delete()
+    SurgeonEpisodeRollup.objects.all().delete()
+
+    episode_rows = EpisodeRollup.objects.bulk_create(
+        (
+            EpisodeRollup(
+                hospital_id=row["patient_hospital_mapping__hospital_id"],
+                surgery_date=row["surgery_date"],
+                episode_type=row["episode_type"],
+                episode_count=row["episode_count"],
+            )
+            for row in Episode.objects.order_by()
+            .values(
+                "patient_hospital_mapping__hospital_id",
+                "surgery_date",
+                "episode_type",
+            )
+            .annotate(episode_count=Count("id"))
+            .iterator()
+        ),
+        batch_size=REBUILD_BATCH_SIZE,
+    )
+
+    surgeon_rows = SurgeonEpisodeRollup.objects.bulk_create(
+        (
+            SurgeonEpisodeRollup(
+                medical_personnel_id=row["medicalpersonnel_id"],
+                surgery_date=row["episode__surgery_date"],
+                episode_count=row["episode_count"],
+            )
+            for row in Episode.surgeons.through.objects.order_by()
+            .values("medicalpersonnel_id", "episode__surgery_date")
+            .annotate(episode_count=Count("episode_id"))
+            .iterator()
+        ),
+        batch_size=REBUILD_BATCH_SIZE,
+    )
+
+    return len(episode_rows), len(surgeon_rows)
@@ -0,0 +1,48 @@
+from ..users.models import MedicalPersonnel
+from .models import Hospital, PreferredHospital
+
+# Lookup from a hospital in scope to the lead's preferred hospital
+SCOPE_LOOKUPS = {
+    MedicalPersonnel.Level.LEAD_SURGEON: "id",
+    MedicalPersonnel.Level.REGIONAL_LEAD: (
+        "region_mapping__region__hospital_mappings__hospital"
+    ),
+    MedicalPersonnel.Level.ZONAL_LEAD: (
+        "region_mapping__region__zone_mapping__zone__region_mappings__"
+        "region__hospital_mappings__hospital"
+    ),
+}
+
+
+def get_preferred_hospital_id(medical_personnel):
+    try:
+        return medical_personnel.preferred_hospital.hospital_id
+    except PreferredHospital.DoesNotExist:
+        return None
+
+
+def get_hospitals_in_scope(medical_personnel):
+    """
+    Return the hospitals a lead can see, based on their level and preferred
+    hospital.
+
+    Centre leads see their preferred hospital, regional and zonal leads every
+    hospital in its region or zone and national leads every hospital.
+
+    :param MedicalPersonnel medical_personnel: The lead
+    :return: The hospitals in scope, `None` if the level has no scope
+    :rtype: QuerySet
+    """
+    if medical_personnel.level == MedicalPersonnel.Level.NATIONAL_LEAD:
+        return Hospital.objects.all()
+
+    if medical_personnel.level not in SCOPE_LOOKUPS:
+        return None
+
+    preferred_hospital_id = get_preferred_hospital_id(medical_personnel)
+    if preferred_hospital_id is None:
+        return Hospital.objects.none()
+
+    return Hospital.objects.filter(
+        **{SCOPE_LOOKUPS[medical_personnel.level]: preferred_hospital_id}
+    )
@@ -0,0 +1,216 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from .cache import bump_stats_version
+from .models import (
+    Episode,
+    FollowUp,
+    Hospital,
+    HospitalRegionMapping,
+    Patient,
+    PatientHospitalMapping,
+    Region,
+    RegionZoneMapping,
+    Zone,
+)
+from .rollups import (
+    update_episode_rollup,
+    update_mapping_episode_count,
+    update_surgeon_rollup,
+)
+
+# Models whose writes change the statistics responses
+STATS_MODELS = (
+    Episode,
+    FollowUp,
+    Patient,
+    PatientHospitalMapping,
+    Hospital,
+    HospitalRegionMapping,
+    Region,
+    RegionZoneMapping,
+    Zone,
+)
+
+
+def get_rollup_key(episode):
+    return (
+        episode.patient_hospital_mapping.hospital_id,
+        episode.surgery_date,
+        episode.episode_type,
+    )
+
+
+@receiver(pre_save, sender=Episode)
+def capture_previous_episode_rollup_key(sender, instance, **kwargs):
+    instance._previous_rollup_key = None
+    instance._previous_mapping_id = None
+    if instance.pk is None:
+        return
+
+    previous = (
+        Episode.objects.filter(pk=instance.pk)
+        .values_list(
+            "patient_hospital_mapping__hospital_id",
+            "surgery_date",
+            "episode_type",
+            "patient_hospital_mapping_id",
+        )
+        .first()
+    )
+    if previous is not None:
+        instance._previous_rollup_key = previous[:3]
+        instance._previous_mapping_id = previous[3]
+
+
+@receiver(post_save, sender=Episode)
+def update_rollups_on_episode_save(sender, instance, created, **kwargs):
+    current_key = get_rollup_key(instance)
+    previous_key = getattr(instance, "_previous_rollup_key", None)
+
+    if created or previous_key is None:
+        update_episode_rollup(*current_key, delta=1)
+        update_mapping_episode_count(
+            instance.patient_hospital_mapping_id, delta=1
+        )
+        return
+
+    previous_mapping_id = instance._previous_mapping_id
+    if previous_mapping_id != instance.patient_hospital_mapping_id:
+        update_mapping_episode_count(previous_mapping_id, delta=-1)
+        update_mapping_episode_count(
+            instance.patient_hospital_mapping_id, delta=1
+        )
+
+    if previous_key == current_key:
+        return
+
+    update_episode_rollup(*previous_key, delta=-1)
+    update_episode_rollup(*current_key, delta=1)
+
+    previous_surgery_date = previous_key[1]
+    if previous_surgery_date != instance.surgery_date:
+        surgeon_ids = list(instance.surgeons.values_list("id", flat=True))
+        update_surgeon_rollup(surgeon_ids, previous_surgery_date, delta=-1)
+        update_surgeon_rollup(surgeon_ids, instance.surgery_date, delta=1)
+
+
+@receiver(pre_delete, sender=Episode)
+def capture_deleted_episode_rollup_keys(sender, instance, **kwargs):
+    # The mapping and the surgeons relation may already be gone by the time
+    # post_delete fires for a cascaded delete.
+    instance._deleted_rollup_key = get_rollup_key(instance)
+    instance._deleted_surgeon_ids = list(
+        instance.surgeons.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Episode)
+def update_rollups_on_episode_delete(sender, instance, **kwargs):
+    update_episode_rollup(*instance._deleted_rollup_key, delta=-1)
+    update_mapping_episode_count(
+        instance.patient_hospital_mapping_id, delta=-1
+    )
+    update_surgeon_rollup(
+        instance._deleted_surgeon_ids, instance.surgery_date, delta=-1
+    )
+
+
+@receiver(m2m_changed, sender=Episode.surgeons.through)
+def update_surgeon_rollups_on_surgeons_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "pre_clear":
+        if reverse:
+            instance._cleared_episode_dates = list(
+                instance.episode_set.values_list("surgery_date", flat=True)
+            )
+        else:
+            instance._cleared_surgeon_ids = list(
+                instance.surgeons.values_list("id", flat=True)
+            )
+        return
+
+    if action == "post_clear":
+        if reverse:
+            for surgery_date in instance._cleared_episode_dates:
+                update_surgeon_rollup([instance.pk], surgery_date, delta=-1)
+        else:
+            update_surgeon_rollup(
+                instance._cleared_surgeon_ids, instance.surgery_date, delta=-1
+            )
+        return
+
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+
+    delta = 1 if action == "post_add" else -1
+    if reverse:
+        surgery_dates = Episode.objects.filter(pk__in=pk_set).values_list(
+            "surgery_date", flat=True
+        )
+        for surgery_date in surgery_dates:
+            update_surgeon_rollup([instance.pk], surgery_date, delta=delta)
+    else:
+        update_surgeon_rollup(pk_set, instance.surgery_date, delta=delta)
+
+
+@receiver(post_save, sender=PatientHospitalMapping)
+def touch_patient_on_mapping_save(sender, instance, created, **kwargs):
+    # The mappings are serialized with the patient, so editing one changes
+    # the patient's version, see `api.conditional`.
+    if not created:
+        Patient.objects.filter(pk=instance.patient_id).update(updated_at=now())
+
+
+def touch_on_m2m_change(model, field):
+    """
+    Build an `m2m_changed` receiver that moves the `updated_at` of the
+    records whose `field` relation changed, since `auto_now` only applies on
+    `save()`.
+    """
+
+    def receiver(sender, instance, action, reverse, pk_set, **kwargs):
+        if action not in ("post_add", "post_remove", "pre_clear"):
+            return
+
+        if not reverse:
+            records = model.objects.filter(pk=instance.pk)
+        elif action == "pre_clear":
+            records = model.objects.filter(**{field: instance})
+        else:
+            records = model.objects.filter(pk__in=pk_set)
+        records.update(updated_at=now())
+
+    return receiver
+
+
+touch_episode_on_surgeons_change = touch_on_m2m_change(Episode, "surgeons")
+touch_follow_up_on_attendees_change = touch_on_m2m_change(
+    FollowUp, "attendees"
+)
+m2m_changed.connect(
+    touch_episode_on_surgeons_change, sender=Episode.surgeons.through
+)
+m2m_changed.connect(
+    touch_follow_up_on_attendees_change, sender=FollowUp.attendees.through
+)
+
+
+def invalidate_stats_cache(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("pre_"):
+        return
+    bump_stats_version()
+
+
+for model in STATS_MODELS:
+    post_save.connect(invalidate_stats_cache, sender=model)
+    post_delete.connect(invalidate_stats_cache, sender=model)
+m2m_changed.connect(invalidate_stats_cache, sender=Episode.surgeons.through)
@@ -0,0 +1,420 @@
+from collections import defaultdict
+
+from django.db.models import (
+    Avg,
+    Count,
+    Exists,
+    F,
+    IntegerField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    TruncMonth,
+    TruncQuarter,
+    TruncWeek,
+)
+from django.utils.timezone import now, timedelta
+
+from ..common.utils.functions import get_text_choices_codec
+from .models import (
+    Episode,
+    EpisodeRollup,
+    FollowUp,
+    Hospital,
+    PatientHospitalMapping,
+    Region,
+    Zone,
+)
+
+PERIOD_WINDOWS = {
+    "past_year_episodes": 365,
+    "past_month_episodes": 30,
+    "past_week_episodes": 7,
+}
+
+
+def get_episode_aggregates(prefix=""):
+    """
+    Build the conditional aggregates shared by the global and grouped stats.
+
+    The counts are summed from the `EpisodeRollup` table, which keeps one row
+    per hospital, surgery date and episode type.
+
+    :param str prefix: The lookup path from the queried model to
+        `EpisodeRollup`
+    :return: The aggregate expressions keyed by response field
+    :rtype: dict
+    """
+    today = now().date()
+    surgery_date = f"{prefix}surgery_date"
+    episode_count = f"{prefix}episode_count"
+
+    aggregates = {
+        "total_episodes": Coalesce(Sum(episode_count), Value(0)),
+    }
+    for field, days in PERIOD_WINDOWS.items():
+        aggregates[field] = Coalesce(
+            Sum(
+                episode_count,
+                filter=Q(
+                    **{f"{surgery_date}__gte": today - timedelta(days=days)}
+                ),
+            ),
+            Value(0),
+        )
+    aggregates["last_episode_date"] = Max(
+        surgery_date, filter=Q(**{f"{episode_count}__gt": 0})
+    )
+
+    return aggregates
+
+
+def get_global_stats():
+    """
+    Compute the registry wide statistics in two queries.
+
+    :return: The global statistics block
+    :rtype: dict
+    """
+    stats = EpisodeRollup.objects.aggregate(**get_episode_aggregates())
+    stats["patients_without_episode"] = (
+        PatientHospitalMapping.objects.order_by()
+        .values("patient_id")
+        .annotate(episodes=Sum("episode_count"))
+        .filter(episodes=0)
+        .count()
+    )
+
+    return stats
+
+
+def get_patients_without_episode(hospital_path):
+    """
+    Count the patients without an episode for each row of a grouped query.
+
+    A (patient, hospital) pair is unique, so counting mappings without an
+    episode counts the patients without an episode in those hospitals.
+
+    :param str hospital_path: The lookup path from `PatientHospitalMapping`
+        to the grouped model
+    :return: A correlated subquery expression
+    :rtype: Coalesce
+    """
+    mappings = (
+        PatientHospitalMapping.objects.filter(
+            **{hospital_path: OuterRef("pk")}, episode_count=0
+        )
+        .order_by()
+        .values(hospital_path)
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+
+    return Coalesce(Subquery(mappings, output_field=IntegerField()), Value(0))
+
+
+# model, lookup path to `EpisodeRollup`, lookup path from
+# `PatientHospitalMapping` and the parent level lookup path
+GROUPINGS = {
+    "hospital": (
+        Hospital,
+        "episode_rollups__",
+        "hospital",
+        "region_mapping__region_id",
+    ),
+    "region": (
+        Region,
+        "hospital_mappings__hospital__episode_rollups__",
+        "hospital__region_mapping__region",
+        "zone_mapping__zone_id",
+    ),
+    "zone": (
+        Zone,
+        "region_mappings__region__hospital_mappings__hospital__"
+        "episode_rollups__",
+        "hospital__region_mapping__region__zone_mapping__zone",
+        None,
+    ),
+}
+
+
+def get_grouped_stats(group_by, with_parent=False):
+    """
+    Compute the statistics of every hospital, region or zone in a single
+    grouped query.
+
+    :param str group_by: One of `hospital`, `region` or `zone`
+    :param bool with_parent: Include the id of the parent region or zone
+    :return: One row per group, ordered by name
+    :rtype: list(dict)
+    """
+    model, rollup_prefix, hospital_path, parent_path = GROUPINGS[group_by]
+
+    fields = [
+        "id",
+        "name",
+        "total_episodes",
+        *PERIOD_WINDOWS.keys(),
+        "last_episode_date",
+        "patients_without_episode",
+    ]
+    if with_parent and parent_path:
+        fields.append(parent_path)
+
+    rows = (
+        model.objects.annotate(
+            **get_episode_aggregates(rollup_prefix),
+            patients_without_episode=get_patients_without_episode(
+                hospital_path
+            ),
+        )
+        .order_by("name")
+        .values(*fields)
+    )
+
+    return [
+        {
+            f"{group_by}_id": row.pop("id"),
+            f"{group_by}_name": row.pop("name"),
+            **row,
+        }
+        for row in rows
+    ]
+
+
+def get_hospital_stats():
+    return get_grouped_stats("hospital")
+
+
+def get_region_stats():
+    return get_grouped_stats("region")
+
+
+def get_zone_stats():
+    return get_grouped_stats("zone")
+
+
+def get_hierarchy_stats():
+    """
+    Compute the zone, region and hospital statistics and nest them.
+
+    Regions without a zone and hospitals without a region are returned
+    separately, since they have no parent row to be nested under.
+
+    :return: The nested zones and the unassigned regions and hospitals
+    :rtype: dict
+    """
+    hospitals_by_region = defaultdict(list)
+    for hospital in get_grouped_stats("hospital", with_parent=True):
+        region_id = hospital.pop("region_mapping__region_id")
+        hospitals_by_region[region_id].append(hospital)
+
+    regions_by_zone = defaultdict(list)
+    for region in get_grouped_stats("region", with_parent=True):
+        zone_id = region.pop("zone_mapping__zone_id")
+        region["hospitals"] = hospitals_by_region[region["region_id"]]
+        regions_by_zone[zone_id].append(region)
+
+    zones = get_grouped_stats("zone")
+    for zone in zones:
+        zone["regions"] = regions_by_zone[zone["zone_id"]]
+
+    return {
+        "zones": zones,
+        "unassigned_regions": regions_by_zone[None],
+        "unassigned_hospitals": hospitals_by_region[None],
+    }
+
+
+TIME_SERIES_INTERVALS = {
+    "week": TruncWeek,
+    "month": TruncMonth,
+    "quarter": TruncQuarter,
+}
+
+TIME_SERIES_SPLITS = {
+    "hospital": "hospital_id",
+    "episode_type": "episode_type",
+}
+
+
+def get_time_series_stats(
+    interval, split_by=None, date_from=None, date_to=None
+):
+    """
+    Count the episodes per week, month or quarter in a single grouped query
+    over the `EpisodeRollup` table.
+
+    Buckets without episodes are omitted and episodes without a surgery date
+    are not counted.
+
+    :param str interval: `week`, `month` or `quarter`
+    :param str split_by: Optionally split every bucket by `hospital` or
+        `episode_type`
+    :param date date_from: Only count episodes on or after this date
+    :param date date_to: Only count episodes on or before this date
+    :return: One row per bucket, or per bucket and split value
+    :rtype: list(dict)
+    """
+    rollups = EpisodeRollup.objects.filter(
+        surgery_date__isnull=False, episode_count__gt=0
+    )
+    if date_from:
+        rollups = rollups.filter(surgery_date__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(surgery_date__lte=date_to)
+
+    group_fields = ["period_start"]
+    if split_by:
+        group_fields.append(TIME_SERIES_SPLITS[split_by])
+
+    rows = list(
+        rollups.order_by()
+        .annotate(period_start=TIME_SERIES_INTERVALS[interval]("surgery_date"))
+        .values(*group_fields)
+        .annotate(total_episodes=Sum("episode_count"))
+        .order_by(*group_fields)
+    )
+
+    if split_by == "episode_type":
+        codec = get_text_choices_codec(Episode.EpisodeChoices)
+        for row in rows:
+            row["episode_type"] = codec.get_label(row["episode_type"])
+
+    return rows
+
+
+def get_surgeon_summary(medical_personnel_rollups):
+    """
+    Summarise the episodes of a surgeon from their `SurgeonEpisodeRollup` rows.
+
+    :param QuerySet medical_personnel_rollups: The surgeon's rollup rows
+    :return: The episode count and the last surgery date
+    :rtype: dict
+    """
+    return medical_personnel_rollups.filter(episode_count__gt=0).aggregate(
+        episode_count=Coalesce(Sum("episode_count"), Value(0)),
+        last_episode_date=Max("surgery_date"),
+    )
+
+
+def get_surgeon_leaderboard(hospitals=None):
+    """
+    Build the per-surgeon episode statistics with one grouped query over the
+    `Episode.surgeons` through table.
+
+    :param QuerySet hospitals: Only count episodes of these hospitals, every
+        hospital if `None`
+    :return: One row per surgeon
+    :rtype: QuerySet
+    """
+    surgeon_episodes = Episode.surgeons.through.objects.all()
+    if hospitals is not None:
+        surgeon_episodes = surgeon_episodes.filter(
+            episode__patient_hospital_mapping__hospital__in=hospitals
+        )
+
+    has_follow_up = Exists(
+        FollowUp.objects.filter(episode_id=OuterRef("episode_id"))
+    )
+
+    return surgeon_episodes.values(
+        medical_personnel_id=F("medicalpersonnel_id"),
+        username=F("medicalpersonnel__user__username"),
+        first_name=F("medicalpersonnel__user__first_name"),
+        last_name=F("medicalpersonnel__user__last_name"),
+    ).annotate(
+        episode_count=Count("episode_id"),
+        last_episode_date=Max("episode__surgery_date"),
+        discharged_episodes=Count("episode__discharge"),
+        followed_up_episodes=Count("episode_id", filter=Q(has_follow_up)),
+    )
+
+
+OUTCOME_GROUPINGS = {
+    "mesh_type": Episode.MeshTypeChoices,
+    "episode_type": Episode.EpisodeChoices,
+}
+
+OUTCOME_RATES = [
+    "recurrence",
+    "infection",
+    "seroma",
+    "numbness",
+    "further_surgery_need",
+]
+
+
+def get_outcome_stats(group_by, date_from=None, date_to=None):
+    """
+    Compute the follow up outcomes per hospital and per `mesh_type` or
+    `episode_type` in a single grouped query.
+
+    Rates are the share of follow ups where the outcome was reported. A
+    follow up with an unknown recurrence does not count towards the
+    recurrence rate.
+
+    :param str group_by: `mesh_type` or `episode_type`
+    :param date date_from: Only include follow ups on or after this date
+    :param date date_to: Only include follow ups on or before this date
+    :return: One row per hospital and group
+    :rtype: list(dict)
+    """
+    codec = get_text_choices_codec(OUTCOME_GROUPINGS[group_by])
+    pain_severities = FollowUp.PainSeverityChoices
+
+    follow_ups = FollowUp.objects.all()
+    if date_from:
+        follow_ups = follow_ups.filter(date__gte=date_from)
+    if date_to:
+        follow_ups = follow_ups.filter(date__lte=date_to)
+
+    rows = (
+        follow_ups.order_by()
+        .values(
+            hospital_id=F("episode__patient_hospital_mapping__hospital_id"),
+            hospital_name=F(
+                "episode__patient_hospital_mapping__hospital__name"
+            ),
+            group=F(f"episode__{group_by}"),
+        )
+        .annotate(
+            follow_ups=Count("id"),
+            **{
+                f"{outcome}_rate": Avg(Cast(outcome, IntegerField()))
+                for outcome in OUTCOME_RATES
+            },
+            **{
+                f"pain_{severity}": Count(
+                    "id", filter=Q(pain_severity=severity)
+                )
+                for severity in pain_severities.values
+            },
+        )
+        .order_by("hospital_name", "hospital_id", "group")
+    )
+
+    return [
+        {
+            "hospital_id": row["hospital_id"],
+            "hospital_name": row["hospital_name"],
+            group_by: codec.get_label(row["group"]),
+            "follow_ups": row["follow_ups"],
+            **{
+                f"{outcome}_rate": row[f"{outcome}_rate"]
+                for outcome in OUTCOME_RATES
+            },
+            "pain_severity": {
+                severity.label: row[f"pain_{severity.value}"]
+                for severity in pain_severities
+            },
+        }
+        for row in rows
+    ]
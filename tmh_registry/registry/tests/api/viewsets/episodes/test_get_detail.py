@@ -1,10 +1,21 @@
+from datetime import datetime, timedelta, timezone
+
 from django.test import TestCase
+from django.utils.http import http_date
+from freezegun import freeze_time
 from rest_framework.authtoken.models import Token
-from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+)
 from rest_framework.test import APIClient
 from tmh_registry.users.factories import MedicalPersonnelFactory
+from tmh_registry.users.models import MedicalPersonnel
 
-from .....factories import EpisodeFactory
+from .....factories import EpisodeFactory, PatientHospitalMappingFactory
+from .....models import Episode, Hospital, Patient
 
 
 class TestEpisodesGet(TestCase):
@@ -23,7 +34,138 @@ class TestEpisodesGet(TestCase):
 
         self.assertEqual(HTTP_404_NOT_FOUND, response.status_code)
 
+    def test_when_episode_id_is_not_a_number(self):
+        response = self.client.get("/api/v1/episodes/abc/")
+
+        self.assertEqual(HTTP_404_NOT_FOUND, response.status_code)
+
     def test_when_episode_exists(self):
         response = self.client.get(f"/api/v1/episodes/{self.episode.id}/")
 
         self.assertEqual(HTTP_200_OK, response.status_code)
+
+    def test_with_sparse_fieldset(self):
+        # request savepoint and release, token authentication, permission
+        # check, the version and the episode query
+        with self.assertNumQueries(6):
+            response = self.client.get(
+                f"/api/v1/episodes/{self.episode.id}/"
+                "?fields=id,surgery_date,episode_type"
+            )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            {
+                "id": self.episode.id,
+                "surgery_date": str(self.episode.surgery_date),
+                "episode_type": self.episode.get_episode_type_display(),
+            },
+            response.data,
+        )
+
+    def test_with_expanded_surgeons(self):
+        response = self.client.get(
+            f"/api/v1/episodes/{self.episode.id}/?fields=id&expand=surgeons"
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(["id", "surgeons"], list(response.data))
+        self.assertEqual(1, len(response.data["surgeons"]))
+
+    def test_with_unknown_fields(self):
+        for query in ["fields=id,secret", "fields=id&expand=cepod"]:
+            response = self.client.get(
+                f"/api/v1/episodes/{self.episode.id}/?{query}"
+            )
+
+            self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_conditional_get(self):
+        url = f"/api/v1/episodes/{self.episode.id}/"
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+
+        # request savepoint and release, token authentication, permission
+        # check and the version query
+        with self.assertNumQueries(5):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEqual(etag, response["ETag"])
+
+        response = self.client.get(f"{url}?fields=id", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+
+        self.episode.comments = "Edited"
+        self.episode.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertNotEqual(etag, response["ETag"])
+
+    def test_last_modified_once_the_second_is_over(self):
+        url = f"/api/v1/episodes/{self.episode.id}/"
+        changed_at = datetime(2024, 3, 14, 9, 30, 0, 500000, timezone.utc)
+        for model in [Patient, Episode, Hospital, MedicalPersonnel]:
+            model.objects.update(updated_at=changed_at)
+        if_modified_since = http_date(int(changed_at.timestamp()))
+
+        # another change in the same second would not move it
+        with freeze_time(changed_at + timedelta(milliseconds=300)):
+            response = self.client.get(url)
+            self.assertNotIn("Last-Modified", response)
+
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=if_modified_since
+            )
+            self.assertEqual(HTTP_200_OK, response.status_code)
+
+        with freeze_time(changed_at + timedelta(seconds=1)):
+            response = self.client.get(url)
+            self.assertEqual(if_modified_since, response["Last-Modified"])
+
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=if_modified_since
+            )
+            self.assertEqual(HTTP_304_NOT_MODIFIED, response.status_code)
+
+    def test_conditional_get_after_patient_changes(self):
+        url = f"/api/v1/episodes/{self.episode.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        # the episode is serialized with the patient's other hospitals
+        PatientHospitalMappingFactory(
+            patient=self.episode.patient_hospital_mapping.patient
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+
+    def test_conditional_get_after_surgeon_and_hospital_changes(self):
+        url = f"/api/v1/episodes/{self.episode.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        user = self.episode.surgeons.get().user
+        user.first_name = "Renamed"
+        user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            "Renamed", response.data["surgeons"][0]["user"]["first_name"]
+        )
+
+        etag = response["ETag"]
+        hospital = self.episode.patient_hospital_mapping.hospital
+        hospital.name = "Renamed Hospital"
+        hospital.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            "Renamed Hospital",
+            response.data["patient_hospital_mapping"]["hospital"]["name"],
+        )
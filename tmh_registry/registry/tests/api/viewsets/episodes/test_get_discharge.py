@@ -1,6 +1,10 @@
 from django.test import TestCase
 from rest_framework.authtoken.models import Token
-from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_404_NOT_FOUND,
+)
 from rest_framework.test import APIClient
 from tmh_registry.users.factories import MedicalPersonnelFactory
 
@@ -42,3 +46,25 @@ class TestEpisodesGetDischarge(TestCase):
 
         self.assertEqual(response.data["id"], discharge.id)
         self.assertEqual(response.data["episode"]["id"], discharge.episode.id)
+
+    def test_conditional_get(self):
+        url = f"/api/v1/episodes/{self.episode.id}/discharge/"
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_304_NOT_MODIFIED, response.status_code)
+
+        discharge = DischargeFactory(episode=self.episode)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        etag = response["ETag"]
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(discharge.id, response.data["id"])
+
+        discharge.comments = "Edited"
+        discharge.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual("Edited", response.data["comments"])
@@ -1,6 +1,10 @@
 from django.test import TestCase
 from rest_framework.authtoken.models import Token
-from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_404_NOT_FOUND,
+)
 from rest_framework.test import APIClient
 from tmh_registry.users.factories import MedicalPersonnelFactory
 
@@ -46,3 +50,25 @@ class TestEpisodesGetDischarge(TestCase):
             [follow_up["id"] for follow_up in response.data],
             [follow_up.id for follow_up in follow_ups],
         )
+
+    def test_conditional_get(self):
+        follow_up = FollowUpFactory(episode=self.episode)
+        url = f"/api/v1/episodes/{self.episode.id}/follow-ups/"
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_304_NOT_MODIFIED, response.status_code)
+
+        follow_up.attendees.add(self.medical_personnel)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        etag = response["ETag"]
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(2, len(response.data[0]["attendees"]))
+
+        follow_up.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual([], response.data)
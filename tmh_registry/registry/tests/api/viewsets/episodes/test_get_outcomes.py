@@ -0,0 +1,132 @@
+from datetime import date
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
+from rest_framework.test import APIClient
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+from .....factories import EpisodeFactory, FollowUpFactory, HospitalFactory
+from .....models import Episode, FollowUp
+
+
+class TestEpisodesGetOutcomes(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital = HospitalFactory(name="A Hospital")
+
+        tnmhp_episode = EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.hospital,
+            mesh_type=Episode.MeshTypeChoices.TNMHP,
+            episode_type=Episode.EpisodeChoices.INGUINAL,
+        )
+        commercial_episode = EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.hospital,
+            mesh_type=Episode.MeshTypeChoices.COMMERCIAL,
+            episode_type=Episode.EpisodeChoices.INGUINAL,
+        )
+
+        outcomes = {
+            "recurrence": False,
+            "infection": False,
+            "seroma": False,
+            "numbness": False,
+            "further_surgery_need": False,
+            "pain_severity": FollowUp.PainSeverityChoices.NO_PAIN,
+        }
+        FollowUpFactory(
+            episode=tnmhp_episode,
+            date=date(2023, 1, 10),
+            **{**outcomes, "recurrence": True, "infection": True},
+        )
+        FollowUpFactory(
+            episode=tnmhp_episode,
+            date=date(2023, 2, 10),
+            **{**outcomes, "recurrence": None, "infection": True},
+        )
+        FollowUpFactory(
+            episode=tnmhp_episode,
+            date=date(2023, 3, 10),
+            **{
+                **outcomes,
+                "seroma": True,
+                "pain_severity": FollowUp.PainSeverityChoices.SEVERE,
+            },
+        )
+        FollowUpFactory(
+            episode=commercial_episode,
+            date=date(2023, 3, 10),
+            **{**outcomes, "further_surgery_need": True},
+        )
+
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def test_group_by_mesh_type(self):
+        response = self.client.get("/api/v1/episodes/outcomes/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(2, len(response.data))
+
+        commercial, tnmhp = response.data
+        self.assertEqual("Commercial Mesh", commercial["mesh_type"])
+        self.assertEqual(1, commercial["follow_ups"])
+        self.assertEqual(1, commercial["further_surgery_need_rate"])
+
+        self.assertEqual(self.hospital.id, tnmhp["hospital_id"])
+        self.assertEqual("A Hospital", tnmhp["hospital_name"])
+        self.assertEqual("TNMHP Mesh", tnmhp["mesh_type"])
+        self.assertEqual(3, tnmhp["follow_ups"])
+        self.assertAlmostEqual(0.5, tnmhp["recurrence_rate"])
+        self.assertAlmostEqual(2 / 3, tnmhp["infection_rate"])
+        self.assertAlmostEqual(1 / 3, tnmhp["seroma_rate"])
+        self.assertEqual(0, tnmhp["numbness_rate"])
+        self.assertEqual(0, tnmhp["further_surgery_need_rate"])
+        self.assertEqual(
+            {
+                "No Pain": 2,
+                "Minimal": 0,
+                "Mild": 0,
+                "Moderate": 0,
+                "Severe": 1,
+            },
+            tnmhp["pain_severity"],
+        )
+
+    def test_group_by_episode_type(self):
+        response = self.client.get(
+            "/api/v1/episodes/outcomes/?group_by=episode_type"
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.data))
+        self.assertEqual(
+            "Inguinal Mesh Hernia Repair", response.data[0]["episode_type"]
+        )
+        self.assertEqual(4, response.data[0]["follow_ups"])
+
+    def test_date_filters(self):
+        response = self.client.get(
+            "/api/v1/episodes/outcomes/?from=2023-02-01&to=2023-02-28"
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.data))
+        self.assertEqual(1, response.data[0]["follow_ups"])
+        self.assertIsNone(response.data[0]["recurrence_rate"])
+
+    def test_single_query(self):
+        # request savepoint and release, token authentication, permission
+        # check and the grouped outcomes query
+        with self.assertNumQueries(5):
+            self.client.get("/api/v1/episodes/outcomes/")
+
+    def test_with_invalid_parameters(self):
+        for query in ["group_by=side", "from=yesterday", "to=2023-02-31"]:
+            response = self.client.get(f"/api/v1/episodes/outcomes/?{query}")
+
+            self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
@@ -0,0 +1,462 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+)
+from rest_framework.test import APIClient
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+from .....factories import (
+    EpisodeFactory,
+    HospitalFactory,
+    HospitalRegionMappingFactory,
+    PatientHospitalMappingFactory,
+    RegionZoneMappingFactory,
+)
+
+
+class TestEpisodesGetStats(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.today = now().date()
+
+        cls.hospital_a = HospitalFactory(name="A Hospital")
+        cls.hospital_b = HospitalFactory(name="B Hospital")
+
+        mapping_a = PatientHospitalMappingFactory(hospital=cls.hospital_a)
+        for days in [2, 20, 200, 2000]:
+            EpisodeFactory(
+                patient_hospital_mapping=mapping_a,
+                surgery_date=cls.today - timedelta(days=days),
+            )
+        # patients without episode
+        PatientHospitalMappingFactory.create_batch(2, hospital=cls.hospital_a)
+        PatientHospitalMappingFactory(hospital=cls.hospital_b)
+
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def test_global_stats(self):
+        response = self.client.get("/api/v1/episodes/stats/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertNotIn("by_hospital", response.data)
+        self.assertEqual(
+            {
+                "total_episodes": 4,
+                "past_year_episodes": 3,
+                "past_month_episodes": 2,
+                "past_week_episodes": 1,
+                "last_episode_date": self.today - timedelta(days=2),
+                "patients_without_episode": 3,
+            },
+            response.data["global"],
+        )
+
+    def test_group_by_hospital(self):
+        response = self.client.get("/api/v1/episodes/stats/?group_by=hospital")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [
+                {
+                    "hospital_id": self.hospital_a.id,
+                    "hospital_name": "A Hospital",
+                    "total_episodes": 4,
+                    "past_year_episodes": 3,
+                    "past_month_episodes": 2,
+                    "past_week_episodes": 1,
+                    "last_episode_date": self.today - timedelta(days=2),
+                    "patients_without_episode": 2,
+                },
+                {
+                    "hospital_id": self.hospital_b.id,
+                    "hospital_name": "B Hospital",
+                    "total_episodes": 0,
+                    "past_year_episodes": 0,
+                    "past_month_episodes": 0,
+                    "past_week_episodes": 0,
+                    "last_episode_date": None,
+                    "patients_without_episode": 1,
+                },
+            ],
+            response.data["by_hospital"],
+        )
+
+    def test_group_by_hospital_query_count_is_constant(self):
+        # request savepoint and release, token authentication, permission
+        # check, global episode aggregate, global patients without episode
+        # and the grouped hospital query
+        with self.assertNumQueries(7):
+            self.client.get("/api/v1/episodes/stats/?group_by=hospital")
+
+        for hospital in HospitalFactory.create_batch(10):
+            EpisodeFactory(patient_hospital_mapping__hospital=hospital)
+
+        with self.assertNumQueries(7):
+            response = self.client.get(
+                "/api/v1/episodes/stats/?group_by=hospital"
+            )
+
+        self.assertEqual(12, len(response.data["by_hospital"]))
+
+
+class TestEpisodesGetStatsByRegionAndZone(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.surgery_date = now().date() - timedelta(days=3)
+
+        # zone -> region -> hospitals a and b, region without zone -> c
+        region_zone = RegionZoneMappingFactory(
+            region__name="North Region", zone__name="North Zone"
+        )
+        cls.zone = region_zone.zone
+        cls.region = region_zone.region
+        cls.unzoned_region = HospitalRegionMappingFactory(
+            region__name="Lake Region", hospital__name="C Hospital"
+        ).region
+        cls.hospital_a = HospitalRegionMappingFactory(
+            region=cls.region, hospital__name="A Hospital"
+        ).hospital
+        cls.hospital_b = HospitalRegionMappingFactory(
+            region=cls.region, hospital__name="B Hospital"
+        ).hospital
+        cls.hospital_c = cls.unzoned_region.hospital_mappings.get().hospital
+        cls.hospital_d = HospitalFactory(name="D Hospital")
+
+        for hospital, episodes in [
+            (cls.hospital_a, 2),
+            (cls.hospital_b, 1),
+            (cls.hospital_c, 4),
+            (cls.hospital_d, 8),
+        ]:
+            EpisodeFactory.create_batch(
+                episodes,
+                patient_hospital_mapping__hospital=hospital,
+                surgery_date=cls.surgery_date,
+            )
+        PatientHospitalMappingFactory(hospital=cls.hospital_b)
+
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def get_stats(self, episodes, patients_without_episode):
+        return {
+            "total_episodes": episodes,
+            "past_year_episodes": episodes,
+            "past_month_episodes": episodes,
+            "past_week_episodes": episodes,
+            "last_episode_date": self.surgery_date,
+            "patients_without_episode": patients_without_episode,
+        }
+
+    def test_group_by_region(self):
+        response = self.client.get("/api/v1/episodes/stats/?group_by=region")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [
+                {
+                    "region_id": self.unzoned_region.id,
+                    "region_name": "Lake Region",
+                    **self.get_stats(4, 0),
+                },
+                {
+                    "region_id": self.region.id,
+                    "region_name": "North Region",
+                    **self.get_stats(3, 1),
+                },
+            ],
+            response.data["by_region"],
+        )
+
+    def test_group_by_zone(self):
+        response = self.client.get("/api/v1/episodes/stats/?group_by=zone")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [
+                {
+                    "zone_id": self.zone.id,
+                    "zone_name": "North Zone",
+                    **self.get_stats(3, 1),
+                }
+            ],
+            response.data["by_zone"],
+        )
+
+    def test_hierarchy(self):
+        response = self.client.get(
+            "/api/v1/episodes/stats/?group_by=hierarchy"
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        hierarchy = response.data["hierarchy"]
+
+        self.assertEqual(1, len(hierarchy["zones"]))
+        zone = hierarchy["zones"][0]
+        self.assertEqual(3, zone["total_episodes"])
+        self.assertEqual(
+            [self.region.id],
+            [region["region_id"] for region in zone["regions"]],
+        )
+        self.assertEqual(
+            [
+                {
+                    "hospital_id": self.hospital_a.id,
+                    "hospital_name": "A Hospital",
+                    **self.get_stats(2, 0),
+                },
+                {
+                    "hospital_id": self.hospital_b.id,
+                    "hospital_name": "B Hospital",
+                    **self.get_stats(1, 1),
+                },
+            ],
+            zone["regions"][0]["hospitals"],
+        )
+
+        self.assertEqual(
+            [self.unzoned_region.id],
+            [
+                region["region_id"]
+                for region in hierarchy["unassigned_regions"]
+            ],
+        )
+        self.assertEqual(
+            [self.hospital_c.id],
+            [
+                hospital["hospital_id"]
+                for hospital in hierarchy["unassigned_regions"][0]["hospitals"]
+            ],
+        )
+        self.assertEqual(
+            [self.hospital_d.id],
+            [
+                hospital["hospital_id"]
+                for hospital in hierarchy["unassigned_hospitals"]
+            ],
+        )
+
+    def test_query_count_is_constant(self):
+        # request savepoint and release, token authentication, permission
+        # check, global episode aggregate, global patients without episode
+        # and one grouped query per level
+        for group_by, queries in [
+            ("region", 7),
+            ("zone", 7),
+            ("hierarchy", 9),
+        ]:
+            with self.assertNumQueries(queries):
+                self.client.get(f"/api/v1/episodes/stats/?group_by={group_by}")
+
+
+@override_settings(STATS_CACHE_TIMEOUT=60)
+class TestEpisodesGetStatsCache(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.mapping = PatientHospitalMappingFactory()
+        EpisodeFactory(patient_hospital_mapping=cls.mapping)
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def test_repeated_requests_are_served_from_cache(self):
+        first = self.client.get("/api/v1/episodes/stats/?group_by=hospital")
+
+        # request savepoint and release, token authentication and permission
+        # check only
+        with self.assertNumQueries(4):
+            second = self.client.get(
+                "/api/v1/episodes/stats/?group_by=hospital"
+            )
+
+        self.assertEqual(first.data, second.data)
+
+    def test_cache_is_per_group_by(self):
+        self.client.get("/api/v1/episodes/stats/")
+        response = self.client.get("/api/v1/episodes/stats/?group_by=region")
+
+        self.assertIn("by_region", response.data)
+
+    def test_writes_invalidate_the_cache(self):
+        self.client.get("/api/v1/episodes/stats/")
+
+        EpisodeFactory(patient_hospital_mapping=self.mapping)
+        response = self.client.get("/api/v1/episodes/stats/")
+        self.assertEqual(2, response.data["global"]["total_episodes"])
+
+        PatientHospitalMappingFactory(hospital=self.mapping.hospital)
+        response = self.client.get("/api/v1/episodes/stats/")
+        self.assertEqual(
+            1, response.data["global"]["patients_without_episode"]
+        )
+
+    def test_counters(self):
+        self.client.get("/api/v1/episodes/stats/")
+        self.client.get("/api/v1/episodes/stats/")
+        self.client.get("/api/v1/episodes/stats/")
+
+        response = self.client.get("/api/v1/episodes/stats/cache/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual({"hits": 2, "misses": 1}, response.data)
+
+    def test_counters_require_admin_user(self):
+        non_admin_mp = MedicalPersonnelFactory(user__is_staff=False)
+        token = Token.objects.create(user=non_admin_mp.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        response = self.client.get("/api/v1/episodes/stats/cache/")
+
+        self.assertEqual(HTTP_403_FORBIDDEN, response.status_code)
+
+
+class TestEpisodesGetStatsTimeSeries(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital_a = HospitalFactory()
+        cls.hospital_b = HospitalFactory()
+
+        for hospital, surgery_date, episode_type in [
+            (cls.hospital_a, date(2023, 1, 2), "INGUINAL"),
+            (cls.hospital_a, date(2023, 1, 30), "INGUINAL"),
+            (cls.hospital_b, date(2023, 1, 31), "FEMORAL"),
+            (cls.hospital_a, date(2023, 4, 3), "FEMORAL"),
+            (cls.hospital_b, date(2024, 1, 1), "INGUINAL"),
+        ]:
+            EpisodeFactory(
+                patient_hospital_mapping__hospital=hospital,
+                surgery_date=surgery_date,
+                episode_type=episode_type,
+            )
+        EpisodeFactory(surgery_date=None)
+
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def test_month_interval(self):
+        response = self.client.get("/api/v1/episodes/stats/?interval=month")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual("month", response.data["interval"])
+        self.assertEqual(
+            [
+                {"period_start": date(2023, 1, 1), "total_episodes": 3},
+                {"period_start": date(2023, 4, 1), "total_episodes": 1},
+                {"period_start": date(2024, 1, 1), "total_episodes": 1},
+            ],
+            response.data["time_series"],
+        )
+
+    def test_week_and_quarter_intervals(self):
+        response = self.client.get("/api/v1/episodes/stats/?interval=week")
+        self.assertEqual(
+            [date(2023, 1, 2), date(2023, 1, 30), date(2023, 4, 3)],
+            [row["period_start"] for row in response.data["time_series"]][:3],
+        )
+        self.assertEqual(2, response.data["time_series"][1]["total_episodes"])
+
+        response = self.client.get("/api/v1/episodes/stats/?interval=quarter")
+        self.assertEqual(
+            [3, 1, 1],
+            [row["total_episodes"] for row in response.data["time_series"]],
+        )
+
+    def test_date_range(self):
+        response = self.client.get(
+            "/api/v1/episodes/stats/?interval=quarter&from=2023-01-15"
+            "&to=2023-12-31"
+        )
+
+        self.assertEqual(
+            [
+                {"period_start": date(2023, 1, 1), "total_episodes": 2},
+                {"period_start": date(2023, 4, 1), "total_episodes": 1},
+            ],
+            response.data["time_series"],
+        )
+
+    def test_split_by_hospital(self):
+        response = self.client.get(
+            "/api/v1/episodes/stats/?interval=month&split_by=hospital"
+            "&to=2023-01-31"
+        )
+
+        self.assertEqual(
+            [
+                {
+                    "period_start": date(2023, 1, 1),
+                    "hospital_id": self.hospital_a.id,
+                    "total_episodes": 2,
+                },
+                {
+                    "period_start": date(2023, 1, 1),
+                    "hospital_id": self.hospital_b.id,
+                    "total_episodes": 1,
+                },
+            ],
+            response.data["time_series"],
+        )
+
+    def test_split_by_episode_type(self):
+        response = self.client.get(
+            "/api/v1/episodes/stats/?interval=quarter&split_by=episode_type"
+            "&to=2023-03-31"
+        )
+
+        self.assertEqual(
+            [
+                {
+                    "period_start": date(2023, 1, 1),
+                    "episode_type": "Femoral Mesh Hernia Repair",
+                    "total_episodes": 1,
+                },
+                {
+                    "period_start": date(2023, 1, 1),
+                    "episode_type": "Inguinal Mesh Hernia Repair",
+                    "total_episodes": 2,
+                },
+            ],
+            response.data["time_series"],
+        )
+
+    def test_single_query(self):
+        # request savepoint and release, token authentication, permission
+        # check and the grouped time series query
+        with self.assertNumQueries(5):
+            self.client.get(
+                "/api/v1/episodes/stats/?interval=week&split_by=hospital"
+            )
+
+    def test_with_invalid_parameters(self):
+        for query in [
+            "interval=day",
+            "interval=week&split_by=side",
+            "interval=week&from=2023-13-01",
+        ]:
+            response = self.client.get(f"/api/v1/episodes/stats/?{query}")
+
+            self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
@@ -5,15 +5,17 @@ from parameterized import parameterized
 from rest_framework.authtoken.models import Token
 from rest_framework.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST
 from rest_framework.test import APIClient
-from tmh_registry.common.utils.functions import (
-    get_text_choice_value_from_label,
-)
+from tmh_registry.common.utils.functions import get_text_choices_codec
 from tmh_registry.registry.factories import (
     HospitalFactory,
     PatientFactory,
     PatientHospitalMappingFactory,
 )
-from tmh_registry.registry.models import Episode, PatientHospitalMapping
+from tmh_registry.registry.models import (
+    Episode,
+    PatientHospitalMapping,
+    SurgeonEpisodeRollup,
+)
 from tmh_registry.users.factories import MedicalPersonnelFactory
 
 
@@ -90,6 +92,7 @@ class TestEpisodesPost(TestCase):
         )
 
         self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertTrue(response.data["errors"][0].startswith(f"{field} :"))
 
     def test_create_episode_successful(self):
         data = self.get_episode_test_data()
@@ -138,56 +141,56 @@ class TestEpisodesPost(TestCase):
 
         self.assertEqual(
             episode.episode_type,
-            get_text_choice_value_from_label(
-                Episode.EpisodeChoices.choices, data["episode_type"]
+            get_text_choices_codec(Episode.EpisodeChoices).get_value(
+                data["episode_type"]
             ),
         )
         self.assertEqual(
             episode.cepod,
-            get_text_choice_value_from_label(
-                Episode.CepodChoices.choices, data["cepod"]
+            get_text_choices_codec(Episode.CepodChoices).get_value(
+                data["cepod"]
             ),
         )
         self.assertEqual(
             episode.side,
-            get_text_choice_value_from_label(
-                Episode.SideChoices.choices, data["side"]
+            get_text_choices_codec(Episode.SideChoices).get_value(
+                data["side"]
             ),
         )
         self.assertEqual(
             episode.occurence,
-            get_text_choice_value_from_label(
-                Episode.OccurenceChoices.choices, data["occurence"]
+            get_text_choices_codec(Episode.OccurenceChoices).get_value(
+                data["occurence"]
             ),
         )
         self.assertEqual(
             episode.type,
-            get_text_choice_value_from_label(
-                Episode.TypeChoices.choices, data["type"]
+            get_text_choices_codec(Episode.TypeChoices).get_value(
+                data["type"]
             ),
         )
         self.assertEqual(
             episode.size,
-            get_text_choice_value_from_label(
-                Episode.SizeChoices.choices, data["size"]
+            get_text_choices_codec(Episode.SizeChoices).get_value(
+                data["size"]
             ),
         )
         self.assertEqual(
             episode.complexity,
-            get_text_choice_value_from_label(
-                Episode.ComplexityChoices.choices, data["complexity"]
+            get_text_choices_codec(Episode.ComplexityChoices).get_value(
+                data["complexity"]
             ),
         )
         self.assertEqual(
             episode.mesh_type,
-            get_text_choice_value_from_label(
-                Episode.MeshTypeChoices.choices, data["mesh_type"]
+            get_text_choices_codec(Episode.MeshTypeChoices).get_value(
+                data["mesh_type"]
             ),
         )
         self.assertEqual(
             episode.anaesthetic_type,
-            get_text_choice_value_from_label(
-                Episode.AnaestheticChoices.choices, data["anaesthetic_type"]
+            get_text_choices_codec(Episode.AnaestheticChoices).get_value(
+                data["anaesthetic_type"]
             ),
         )
 
@@ -201,3 +204,57 @@ class TestEpisodesPost(TestCase):
         self.assertEqual(HTTP_201_CREATED, response.status_code)
 
         # self.assertEqual(response.data["comments"], "") TODO Sabi: should b reverted when comment is enabled
+
+    def test_surgeons_and_rollups(self):
+        surgeon = MedicalPersonnelFactory()
+        data = self.get_episode_test_data()
+        data["surgeon_ids"] = [
+            self.medical_personnel.id,
+            surgeon.id,
+            self.medical_personnel.id,
+        ]
+
+        response = self.client.post(
+            "/api/v1/episodes/", data=data, format="json"
+        )
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+        self.assertEqual(
+            [self.medical_personnel.id, surgeon.id],
+            [surgeon["id"] for surgeon in response.data["surgeons"]],
+        )
+        self.assertEqual(
+            1,
+            SurgeonEpisodeRollup.objects.get(
+                medical_personnel=surgeon, surgery_date=data["surgery_date"]
+            ).episode_count,
+        )
+        self.patient_hospital_mapping.refresh_from_db()
+        self.assertEqual(1, self.patient_hospital_mapping.episode_count)
+
+    def test_with_non_existing_surgeon(self):
+        data = self.get_episode_test_data()
+        data["surgeon_ids"] = [-1]
+
+        response = self.client.post(
+            "/api/v1/episodes/", data=data, format="json"
+        )
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertFalse(Episode.objects.exists())
+
+    def test_number_of_queries(self):
+        data = self.get_episode_test_data()
+        # the first episode creates the rollup rows, later ones update them
+        self.client.post("/api/v1/episodes/", data=data, format="json")
+
+        # request savepoint and release, token authentication, permission
+        # check, surgeons, mapping, episode insert, episode rollup, mapping
+        # episode count, surgeon inserts, surgeon rollup, then the
+        # patient's mappings, episodes and surgeons of the response
+        with self.assertNumQueries(14):
+            response = self.client.post(
+                "/api/v1/episodes/", data=data, format="json"
+            )
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
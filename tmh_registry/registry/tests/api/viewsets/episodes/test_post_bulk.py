@@ -0,0 +1,145 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
+from rest_framework.test import APIClient
+from tmh_registry.registry.factories import (
+    HospitalFactory,
+    PatientFactory,
+    PatientHospitalMappingFactory,
+)
+from tmh_registry.registry.models import (
+    Episode,
+    EpisodeRollup,
+    SurgeonEpisodeRollup,
+)
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+
+class TestEpisodesPostBulk(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital = HospitalFactory()
+        cls.patient = PatientFactory()
+        cls.patient_hospital_mapping = PatientHospitalMappingFactory(
+            patient=cls.patient, hospital=cls.hospital
+        )
+
+        cls.medical_personnel = MedicalPersonnelFactory()
+        cls.surgeon = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def get_episode_test_data(self, **kwargs):
+        return {
+            "patient_id": self.patient.id,
+            "hospital_id": self.hospital.id,
+            "surgery_date": "2021-10-12",
+            "episode_type": Episode.EpisodeChoices.UMBILICAL.label,
+            "surgeon_ids": [self.medical_personnel.id, self.surgeon.id],
+            "cepod": Episode.CepodChoices.PLANNED.label,
+            "side": Episode.SideChoices.LEFT.label,
+            "occurence": Episode.OccurenceChoices.RECURRENT.label,
+            "type": Episode.TypeChoices.INDIRECT.label,
+            "size": Episode.SizeChoices.MEDIUM.label,
+            "complexity": Episode.ComplexityChoices.INCARCERATED.label,
+            "mesh_type": Episode.MeshTypeChoices.TNMHP.label,
+            "anaesthetic_type": Episode.AnaestheticChoices.SPINAL.label,
+            "diathermy_used": True,
+            "antibiotic_used": True,
+            **kwargs,
+        }
+
+    def post(self, episodes):
+        return self.client.post(
+            "/api/v1/episodes/bulk/", {"episodes": episodes}, format="json"
+        )
+
+    def test_partial_failure(self):
+        other_patient = PatientFactory()
+
+        response = self.post(
+            [
+                self.get_episode_test_data(),
+                self.get_episode_test_data(cepod="WRONG_OPTION"),
+                self.get_episode_test_data(patient_id=other_patient.id),
+                self.get_episode_test_data(surgeon_ids=[-1]),
+                self.get_episode_test_data(surgery_date="not a date"),
+                self.get_episode_test_data(surgery_date="2021-10-13"),
+            ]
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(2, response.data["created"])
+        self.assertEqual(4, response.data["failed"])
+
+        results = response.data["results"]
+        self.assertEqual(
+            ["created", "failed", "failed", "failed", "failed", "created"],
+            [result["status"] for result in results],
+        )
+        self.assertEqual(
+            list(range(6)), [result["index"] for result in results]
+        )
+        self.assertIn("cepod", results[1]["errors"])
+        self.assertIn("error", results[2]["errors"])
+        self.assertIn("surgeon_ids", results[3]["errors"])
+        self.assertIn("surgery_date", results[4]["errors"])
+
+        episode = Episode.objects.get(id=results[0]["id"])
+        self.assertEqual(
+            self.patient_hospital_mapping, episode.patient_hospital_mapping
+        )
+        self.assertEqual(Episode.CepodChoices.PLANNED, episode.cepod)
+        self.assertCountEqual(
+            [self.medical_personnel, self.surgeon], episode.surgeons.all()
+        )
+
+    def test_rollups_and_episode_counts_are_updated(self):
+        self.post(
+            [
+                self.get_episode_test_data(),
+                self.get_episode_test_data(),
+                self.get_episode_test_data(surgeon_ids=[self.surgeon.id]),
+            ]
+        )
+
+        self.patient_hospital_mapping.refresh_from_db()
+        self.assertEqual(3, self.patient_hospital_mapping.episode_count)
+        self.assertEqual(
+            3,
+            EpisodeRollup.objects.get(
+                hospital=self.hospital, surgery_date=date(2021, 10, 12)
+            ).episode_count,
+        )
+        self.assertEqual(
+            {(self.medical_personnel.id, 2), (self.surgeon.id, 3)},
+            set(
+                SurgeonEpisodeRollup.objects.values_list(
+                    "medical_personnel_id", "episode_count"
+                )
+            ),
+        )
+
+    def test_number_of_queries_is_constant(self):
+        def count_queries(size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post([self.get_episode_test_data()] * size)
+            self.assertEqual(size, response.data["created"])
+            return len(queries)
+
+        # the first import creates the rollup rows, later ones update them
+        count_queries(1)
+
+        self.assertEqual(count_queries(1), count_queries(20))
+
+    def test_without_episodes(self):
+        response = self.post([])
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
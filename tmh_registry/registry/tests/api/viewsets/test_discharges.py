@@ -67,3 +67,16 @@ class TestDischargeCreate(TestCase):
         )
 
         self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_number_of_queries(self):
+        # request savepoint and release, token authentication, permission
+        # check, episode, discharge insert, then the patient's mappings,
+        # episodes and surgeons of the response
+        with self.assertNumQueries(9):
+            response = self.client.post(
+                "/api/v1/discharges/",
+                data=self.get_discharge_data(),
+                format="json",
+            )
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
+from rest_framework.test import APIClient
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+from ....factories import (
+    DischargeFactory,
+    EpisodeFactory,
+    FollowUpFactory,
+    HospitalFactory,
+)
+from ....models import PreferredHospital
+
+
+@override_settings(FOLLOW_UP_DUE_DAYS=30)
+class TestFollowUpDueEpisodesViewSet(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital = HospitalFactory()
+        today = now().date()
+
+        cls.overdue_episode = EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.hospital
+        )
+        DischargeFactory(
+            episode=cls.overdue_episode, date=today - timedelta(days=40)
+        )
+
+        cls.most_overdue_episode = EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.hospital
+        )
+        DischargeFactory(
+            episode=cls.most_overdue_episode, date=today - timedelta(days=90)
+        )
+        # a follow up before the discharge does not count
+        FollowUpFactory(
+            episode=cls.most_overdue_episode, date=today - timedelta(days=100)
+        )
+
+        followed_up_episode = EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.hospital
+        )
+        DischargeFactory(
+            episode=followed_up_episode, date=today - timedelta(days=60)
+        )
+        FollowUpFactory(
+            episode=followed_up_episode, date=today - timedelta(days=20)
+        )
+
+        recent_episode = EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.hospital
+        )
+        DischargeFactory(
+            episode=recent_episode, date=today - timedelta(days=10)
+        )
+
+        # not discharged yet
+        EpisodeFactory(patient_hospital_mapping__hospital=cls.hospital)
+
+        other_hospital_episode = EpisodeFactory()
+        DischargeFactory(
+            episode=other_hospital_episode, date=today - timedelta(days=40)
+        )
+
+        cls.medical_personnel = MedicalPersonnelFactory()
+        PreferredHospital.objects.create(
+            medical_personnel=cls.medical_personnel, hospital=cls.hospital
+        )
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def test_list_overdue_episodes(self):
+        response = self.client.get("/api/v1/follow-up-due-episodes/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(2, response.data["count"])
+
+        most_overdue, overdue = response.data["results"]
+        self.assertEqual(self.most_overdue_episode.id, most_overdue["id"])
+        self.assertEqual(90, most_overdue["days_since_discharge"])
+        self.assertEqual(self.overdue_episode.id, overdue["id"])
+        self.assertEqual(
+            self.overdue_episode.patient_hospital_mapping.patient.full_name,
+            overdue["patient_name"],
+        )
+        self.assertEqual(
+            str(self.overdue_episode.discharge.date),
+            overdue["discharge_date"],
+        )
+
+    def test_days_parameter(self):
+        response = self.client.get("/api/v1/follow-up-due-episodes/?days=5")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(3, response.data["count"])
+
+        response = self.client.get("/api/v1/follow-up-due-episodes/?days=-5")
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_without_preferred_hospital(self):
+        medical_personnel = MedicalPersonnelFactory()
+        token = Token.objects.create(user=medical_personnel.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        response = self.client.get("/api/v1/follow-up-due-episodes/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(0, response.data["count"])
+
+    def test_number_of_queries(self):
+        # request savepoint and release, token authentication, permission
+        # check, preferred hospital, count and page queries
+        with self.assertNumQueries(7):
+            self.client.get("/api/v1/follow-up-due-episodes/")
@@ -2,9 +2,7 @@ from django.test import TestCase
 from rest_framework.authtoken.models import Token
 from rest_framework.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST
 from rest_framework.test import APIClient
-from tmh_registry.common.utils.functions import (
-    get_text_choice_value_from_label,
-)
+from tmh_registry.common.utils.functions import get_text_choices_codec
 from tmh_registry.registry.factories import DischargeFactory, EpisodeFactory
 from tmh_registry.registry.models import FollowUp
 from tmh_registry.users.factories import MedicalPersonnelFactory
@@ -70,8 +68,8 @@ class TestFollowUpsCreate(TestCase):
         follow_up = FollowUp.objects.get(id=response.data["id"])
         self.assertEqual(
             follow_up.pain_severity,
-            get_text_choice_value_from_label(
-                FollowUp.PainSeverityChoices.choices, data["pain_severity"]
+            get_text_choices_codec(FollowUp.PainSeverityChoices).get_value(
+                data["pain_severity"]
             ),
         )
 
@@ -110,3 +108,27 @@ class TestFollowUpsCreate(TestCase):
         )
 
         self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_number_of_queries(self):
+        # request savepoint and release, token authentication, permission
+        # check, episode with its discharge, attendees, follow up and
+        # attendee inserts, then the patient's mappings, episodes and
+        # surgeons of the response
+        with self.assertNumQueries(11):
+            response = self.client.post(
+                "/api/v1/follow-ups/",
+                data=self.get_follow_up_data(),
+                format="json",
+            )
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+
+    def test_when_attendee_does_not_exist(self):
+        data = self.get_follow_up_data()
+        data["attendee_ids"] = [self.medical_personnel.id, -1]
+        response = self.client.post(
+            "/api/v1/follow-ups/", data=data, format="json"
+        )
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertFalse(FollowUp.objects.exists())
@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.status import (
+    HTTP_201_CREATED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_409_CONFLICT,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+)
+from rest_framework.test import APIClient
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+from ....api.idempotency import (
+    IDEMPOTENCY_REPLAYED_HEADER,
+    get_idempotency_cache_key,
+)
+from ....factories import HospitalFactory
+from ....models import Patient
+
+
+class TestIdempotencyKey(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital = HospitalFactory()
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def get_patient_data(self, **kwargs):
+        return {
+            "full_name": "John Doe",
+            "national_id": "12345678",
+            "year_of_birth": 1980,
+            "age": None,
+            "phone_1": "0712345678",
+            "gender": "Male",
+            "hospital_id": self.hospital.id,
+            "patient_hospital_id": "123",
+            **kwargs,
+        }
+
+    def post_patient(self, data, key="retry-key"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/v1/patients/",
+                data=data,
+                format="json",
+                HTTP_IDEMPOTENCY_KEY=key,
+            )
+
+    def test_retry_replays_the_first_response(self):
+        data = self.get_patient_data()
+
+        response = self.post_patient(data)
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+        self.assertNotIn(IDEMPOTENCY_REPLAYED_HEADER, response)
+
+        # validation, the insert and the response serialization are skipped
+        with self.assertNumQueries(4):
+            retry = self.post_patient(data)
+
+        self.assertEqual(HTTP_201_CREATED, retry.status_code)
+        self.assertEqual("true", retry[IDEMPOTENCY_REPLAYED_HEADER])
+        self.assertEqual(response.data, retry.data)
+        self.assertEqual(1, Patient.objects.count())
+
+    def test_key_reused_with_another_body(self):
+        self.post_patient(self.get_patient_data())
+
+        response = self.post_patient(
+            self.get_patient_data(full_name="Jane Doe")
+        )
+
+        self.assertEqual(HTTP_422_UNPROCESSABLE_ENTITY, response.status_code)
+
+    def test_request_in_progress(self):
+        data = self.get_patient_data()
+        request = SimpleNamespace(
+            user=self.medical_personnel.user,
+            method="POST",
+            path="/api/v1/patients/",
+        )
+        cache_key = get_idempotency_cache_key(request, "retry-key")
+        cache.add(f"{cache_key}:lock", "fingerprint")
+
+        response = self.post_patient(data)
+
+        self.assertEqual(HTTP_409_CONFLICT, response.status_code)
+        self.assertFalse(Patient.objects.exists())
+
+    def test_failed_request_is_not_stored(self):
+        response = self.post_patient(
+            self.get_patient_data(hospital_id=self.hospital.id + 1)
+        )
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.post_patient(self.get_patient_data())
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+        self.assertNotIn(IDEMPOTENCY_REPLAYED_HEADER, response)
+
+    def test_keys_are_scoped_to_the_user(self):
+        self.post_patient(self.get_patient_data())
+
+        other_personnel = MedicalPersonnelFactory()
+        token = Token.objects.create(user=other_personnel.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+        response = self.post_patient(
+            self.get_patient_data(
+                national_id="87654321", patient_hospital_id="456"
+            )
+        )
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+        self.assertEqual(2, Patient.objects.count())
+
+    def test_invalid_key(self):
+        response = self.post_patient(self.get_patient_data(), key="x" * 256)
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_without_key(self):
+        data = self.get_patient_data()
+
+        self.client.post("/api/v1/patients/", data=data, format="json")
+        response = self.client.post(
+            "/api/v1/patients/", data=data, format="json"
+        )
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(1, Patient.objects.count())
@@ -66,11 +66,22 @@ class TestPatientHospitalMappingViewset(TestCase):
         )
 
         self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(
+            [
+                f"error : PatientHospitalMapping for patient_id "
+                f"{mapping.patient.id} and hospital_id {mapping.hospital.id} "
+                "already exists!"
+            ],
+            response.data["errors"],
+        )
 
     def test_create_when_patient_hospital_id_already_exists_for_another_patient(
         self,
     ):
-        mapping = PatientHospitalMappingFactory()
+        # without a leading zero, which the integer check would strip
+        mapping = PatientHospitalMappingFactory(
+            patient_hospital_id="123456789"
+        )
         patient = PatientFactory()
         data = {
             "patient_id": patient.id,
@@ -83,3 +94,10 @@ class TestPatientHospitalMappingViewset(TestCase):
         )
 
         self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(
+            [
+                f"error : Patient Hospital ID {mapping.patient_hospital_id} "
+                "already exists for another patient in this hospital"
+            ],
+            response.data["errors"],
+        )
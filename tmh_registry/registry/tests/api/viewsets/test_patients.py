@@ -1,26 +1,43 @@
 import datetime
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from mock import patch
 from pytest import mark
 from rest_framework.authtoken.models import Token
 from rest_framework.status import (
     HTTP_200_OK,
     HTTP_201_CREATED,
+    HTTP_304_NOT_MODIFIED,
     HTTP_400_BAD_REQUEST,
     HTTP_401_UNAUTHORIZED,
     HTTP_403_FORBIDDEN,
+    HTTP_404_NOT_FOUND,
 )
 from rest_framework.test import APIClient
 
-from .....common.utils.functions import get_text_choice_value_from_label
+from .....common.utils.functions import get_text_choices_codec
 from .....users.factories import MedicalPersonnelFactory, UserFactory
+from ....api.serializers import ReadPatientSerializer
+from ....api.viewsets import (
+    PATIENT_AUTOCOMPLETE_CACHED_PREFIX_LENGTH,
+    PATIENT_AUTOCOMPLETE_LIMIT,
+)
 from ....factories import (
     EpisodeFactory,
     HospitalFactory,
     PatientFactory,
     PatientHospitalMappingFactory,
 )
-from ....models import Patient, PatientHospitalMapping
+from ....models import (
+    Episode,
+    Patient,
+    PatientHospitalMapping,
+    PreferredHospital,
+)
+from ....search import has_trigram_support
 
 
 @mark.registry
@@ -126,6 +143,72 @@ class TestPatientsViewSet(TestCase):
         self.assertEqual(HTTP_200_OK, response.status_code)
         self.assertEqual(1, response.data["count"])
 
+    def test_get_patients_list_with_phone_search_term(self):
+        patient = PatientFactory(phone_1="0712 345 678", phone_2=None)
+        PatientFactory(phone_1="0712345679", phone_2=None)
+
+        response = self.client.get(
+            "/api/v1/patients/?search_term=0712-345-678", format="json"
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [patient.id],
+            [patient["id"] for patient in response.data["results"]],
+        )
+
+    def test_get_patients_list_with_partial_national_id_search_term(self):
+        # not an exact identifier, answered by the fuzzy search
+        response = self.client.get(
+            "/api/v1/patients/?search_term="
+            f"{self.patient.national_id[2:12]}",
+            format="json",
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(1, response.data["count"])
+        self.assertEqual(self.patient.id, response.data["results"][0]["id"])
+
+    def test_get_patients_list_with_patient_hospital_id_search_term(self):
+        PatientHospitalMappingFactory.create_batch(5, hospital=self.hospital)
+        search_term = self.patient_hospital_mapping.patient_hospital_id[1:]
+
+        response = self.client.get(
+            f"/api/v1/patients/?search_term={search_term}"
+            f"&hospital_id={self.hospital.id}",
+            format="json",
+        )
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertIn(
+            self.patient.id,
+            [patient["id"] for patient in response.data["results"]],
+        )
+
+    def test_get_patients_list_search_term_similarity_ranking(self):
+        if not has_trigram_support():
+            self.skipTest("pg_trgm is not installed")
+
+        patient2 = PatientFactory(full_name="Doe")
+
+        response = self.client.get(
+            "/api/v1/patients/?search_term=doe", format="json"
+        )
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [patient2.id, self.patient.id],
+            [patient["id"] for patient in response.data["results"]],
+        )
+
+        # explicit ordering takes precedence
+        response = self.client.get(
+            "/api/v1/patients/?search_term=doe&ordering=-full_name",
+            format="json",
+        )
+        self.assertEqual(
+            [self.patient.id, patient2.id],
+            [patient["id"] for patient in response.data["results"]],
+        )
+
     def test_get_patients_list_full_name_ordering(self):
         patient2 = PatientFactory(full_name="Zachary Unknown")
 
@@ -176,6 +259,270 @@ class TestPatientsViewSet(TestCase):
         self.assertEqual(patient2.id, response.data["results"][0]["id"])
         self.assertEqual(self.patient.id, response.data["results"][1]["id"])
 
+    def test_get_patients_list_cursor_pagination(self):
+        patients = [self.patient]
+        for full_name in ["Adam Doe", "Zoe Doe", "John Doe", "Adam Doe"]:
+            patients.append(PatientFactory(full_name=full_name))
+        patients.sort(key=lambda patient: (patient.full_name, patient.id))
+
+        url = "/api/v1/patients/?pagination=cursor&ordering=full_name&limit=2"
+        patient_ids = []
+        while url:
+            response = self.client.get(url, format="json")
+
+            self.assertEqual(HTTP_200_OK, response.status_code)
+            self.assertNotIn("count", response.data)
+            patient_ids += [
+                patient["id"] for patient in response.data["results"]
+            ]
+            url = response.data["next"]
+
+        self.assertEqual([patient.id for patient in patients], patient_ids)
+
+    def test_get_patients_list_cursor_pagination_same_created_at(self):
+        PatientFactory.create_batch(6)
+        Patient.objects.update(created_at=datetime.date(2026, 1, 1))
+        expected_ids = list(
+            Patient.objects.order_by("-id").values_list("id", flat=True)
+        )
+
+        url = "/api/v1/patients/?pagination=cursor&limit=2"
+        patient_ids = []
+        while url:
+            response = self.client.get(url, format="json")
+
+            self.assertEqual(HTTP_200_OK, response.status_code)
+            patient_ids += [
+                patient["id"] for patient in response.data["results"]
+            ]
+            previous_url = response.data["previous"]
+            url = response.data["next"]
+
+        self.assertEqual(expected_ids, patient_ids)
+
+        # and back from the last page
+        patient_ids = expected_ids[-1:]
+        while previous_url:
+            response = self.client.get(previous_url, format="json")
+
+            self.assertEqual(HTTP_200_OK, response.status_code)
+            patient_ids = [
+                patient["id"] for patient in response.data["results"]
+            ] + patient_ids
+            previous_url = response.data["previous"]
+
+        self.assertEqual(expected_ids, patient_ids)
+
+    def test_get_patients_list_invalid_cursor(self):
+        response = self.client.get(
+            "/api/v1/patients/?cursor=cD0yMDI2LTAxLTAx", format="json"
+        )
+
+        self.assertEqual(HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_get_patients_list_offset_pagination_by_default(self):
+        response = self.client.get("/api/v1/patients/?limit=1", format="json")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(1, response.data["count"])
+        self.assertIsNone(response.data["next"])
+
+    @mark.skipif(
+        connection.vendor != "postgresql",
+        reason="The count is estimated by the PostgreSQL planner",
+    )
+    def test_get_patients_list_estimated_count(self):
+        PatientFactory.create_batch(3)
+
+        response = self.client.get("/api/v1/patients/?limit=1", format="json")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertFalse(response.data["count_is_exact"])
+        self.assertGreaterEqual(response.data["count"], 2)
+        self.assertIsNotNone(response.data["next"])
+
+        # the last page tells the exact count
+        response = self.client.get(
+            "/api/v1/patients/?limit=2&offset=3", format="json"
+        )
+
+        self.assertTrue(response.data["count_is_exact"])
+        self.assertEqual(4, response.data["count"])
+        self.assertIsNone(response.data["next"])
+
+    def test_get_patients_list_exact_count(self):
+        PatientFactory.create_batch(3)
+
+        response = self.client.get(
+            "/api/v1/patients/?limit=1&count=exact", format="json"
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertTrue(response.data["count_is_exact"])
+        self.assertEqual(4, response.data["count"])
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(
+            "/api/v1/patients/?limit=2&offset=2&count=exact", format="json"
+        )
+
+        self.assertEqual(4, response.data["count"])
+        self.assertEqual(2, len(response.data["results"]))
+        self.assertIsNone(response.data["next"])
+
+    @patch("tmh_registry.registry.api.pagination.get_estimated_count")
+    def test_get_patients_list_next_page_despite_estimate(self, estimate):
+        PatientFactory.create_batch(3)
+
+        # an estimate too low is raised to the rows seen
+        estimate.return_value = 1
+        response = self.client.get("/api/v1/patients/?limit=2", format="json")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertFalse(response.data["count_is_exact"])
+        self.assertEqual(3, response.data["count"])
+        self.assertEqual(2, len(response.data["results"]))
+        self.assertIsNotNone(response.data["next"])
+
+        # an estimate too high is lowered past the last row
+        estimate.return_value = 100
+        response = self.client.get(
+            "/api/v1/patients/?limit=2&offset=6", format="json"
+        )
+
+        self.assertFalse(response.data["count_is_exact"])
+        self.assertEqual(6, response.data["count"])
+        self.assertEqual([], response.data["results"])
+        self.assertIsNone(response.data["next"])
+
+        # and a short page is the last one
+        response = self.client.get(
+            "/api/v1/patients/?limit=2&offset=3", format="json"
+        )
+
+        self.assertTrue(response.data["count_is_exact"])
+        self.assertEqual(4, response.data["count"])
+        self.assertIsNone(response.data["next"])
+
+    @mark.skipif(
+        connection.vendor != "postgresql",
+        reason="The count is estimated by the PostgreSQL planner",
+    )
+    @override_settings(PATIENT_COUNT_CACHE_TIMEOUT=300)
+    def test_get_patients_list_cached_exact_count(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        PatientFactory.create_batch(3)
+
+        self.client.get("/api/v1/patients/?limit=1&count=exact", format="json")
+        response = self.client.get(
+            "/api/v1/patients/?limit=1&offset=1", format="json"
+        )
+
+        self.assertTrue(response.data["count_is_exact"])
+        self.assertEqual(4, response.data["count"])
+
+        # registering a patient invalidates the cached count
+        PatientFactory()
+        response = self.client.get(
+            "/api/v1/patients/?limit=1&offset=1", format="json"
+        )
+
+        self.assertFalse(response.data["count_is_exact"])
+
+    def test_get_patients_list_number_of_queries_is_constant(self):
+        def count_queries(page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    f"/api/v1/patients/?limit={page_size}", format="json"
+                )
+            self.assertEqual(page_size, len(response.data["results"]))
+            return len(queries)
+
+        for _ in range(5):
+            EpisodeFactory.create_batch(
+                2,
+                patient_hospital_mapping=PatientHospitalMappingFactory(),
+                medical_personnel=[
+                    MedicalPersonnelFactory(),
+                    MedicalPersonnelFactory(),
+                ],
+            )
+
+        self.assertEqual(count_queries(2), count_queries(6))
+
+    def test_serialize_patient_without_prefetches(self):
+        patient = PatientFactory()
+        for _ in range(3):
+            EpisodeFactory(
+                patient_hospital_mapping=PatientHospitalMappingFactory(
+                    patient=patient
+                ),
+                medical_personnel=[MedicalPersonnelFactory()],
+            )
+
+        # the mappings, the episodes and their surgeons, whatever the number
+        # of mappings
+        with self.assertNumQueries(3):
+            data = ReadPatientSerializer(patient).data
+
+        self.assertEqual(
+            sorted(
+                Episode.objects.filter(
+                    patient_hospital_mapping__patient=patient
+                ).values_list("id", flat=True)
+            ),
+            [episode["id"] for episode in data["episodes"]],
+        )
+
+    def test_get_patients_list_with_sparse_fieldset(self):
+        # request savepoint and release, token authentication, permission
+        # check, count, patients and their mappings
+        with self.assertNumQueries(7):
+            response = self.client.get(
+                "/api/v1/patients/?fields=id,full_name,age,hospital_mappings",
+                format="json",
+            )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            {
+                "id": self.patient.id,
+                "full_name": self.patient.full_name,
+                "age": self.patient.age,
+                "hospital_mappings": [
+                    {
+                        "patient_hospital_id": self.patient_hospital_mapping.patient_hospital_id,
+                        "hospital_id": self.hospital.id,
+                    }
+                ],
+            },
+            response.data["results"][0],
+        )
+
+    def test_get_patients_list_with_expanded_episodes(self):
+        default_response = self.client.get("/api/v1/patients/", format="json")
+        response = self.client.get(
+            "/api/v1/patients/?fields=id&expand=episodes", format="json"
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            {
+                "id": self.patient.id,
+                "episodes": default_response.data["results"][0]["episodes"],
+            },
+            response.data["results"][0],
+        )
+
+    def test_get_patients_detail_with_unknown_fields(self):
+        response = self.client.get(
+            f"/api/v1/patients/{self.patient.id}/?fields=id,password",
+            format="json",
+        )
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
     def test_get_patients_list_unauthorized(self):
         self.client = APIClient()
         response = self.client.get("/api/v1/patients/", format="json")
@@ -238,6 +585,44 @@ class TestPatientsViewSet(TestCase):
         self.assertEqual(True, response.data["episodes"][0]["diathermy_used"])
         self.assertEqual(True, response.data["episodes"][0]["antibiotic_used"])
 
+    def test_get_patients_detail_with_non_numeric_id(self):
+        response = self.client.get("/api/v1/patients/abc/", format="json")
+
+        self.assertEqual(HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_get_patients_detail_conditional_get(self):
+        url = f"/api/v1/patients/{self.patient.id}/"
+        etag = self.client.get(url, format="json")["ETag"]
+
+        # request savepoint and release, token authentication, permission
+        # check and the version query
+        with self.assertNumQueries(5):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_304_NOT_MODIFIED, response.status_code)
+
+        episode = EpisodeFactory(
+            patient_hospital_mapping=self.patient_hospital_mapping
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertIn(
+            episode.id,
+            [episode["id"] for episode in response.data["episodes"]],
+        )
+
+        episode.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_304_NOT_MODIFIED, response.status_code)
+
+        # the surgeons are serialized with the episodes
+        self.episode.surgeons.get().user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+
     def test_get_patients_detail_unauthorized(self):
         self.client = APIClient()
         response = self.client.get(
@@ -338,9 +723,7 @@ class TestPatientsViewSet(TestCase):
         patient = Patient.objects.get(id=response.data["id"])
 
         self.assertEqual(
-            get_text_choice_value_from_label(
-                Patient.Gender.choices, data["gender"]
-            ),
+            get_text_choices_codec(Patient.Gender).get_value(data["gender"]),
             patient.gender,
         )
 
@@ -377,6 +760,34 @@ class TestPatientsViewSet(TestCase):
         )
 
         self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(
+            [
+                f"error : The patient hospital id {data['patient_hospital_id']} "
+                "is already registered to another patient of this hospital."
+            ],
+            response.data["errors"],
+        )
+        # the patient inserted before the conflicting mapping is rolled back
+        self.assertFalse(
+            Patient.objects.filter(national_id=data["national_id"]).exists()
+        )
+
+    def test_create_patients_with_already_existing_national_id(self):
+        data = self.get_patient_test_data()
+        PatientFactory(national_id=data["national_id"])
+
+        response = self.client.post(
+            "/api/v1/patients/", data=data, format="json"
+        )
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(
+            [
+                "national_id : [ErrorDetail(string='patient with this "
+                "national id already exists.', code='unique')]"
+            ],
+            response.data["errors"],
+        )
 
     def test_create_patients_non_medical_personnel_user(self):
         self.non_mp_user = UserFactory()
@@ -442,3 +853,278 @@ class TestPatientsViewSet(TestCase):
         )
 
         self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+
+@mark.registry
+@mark.registry_viewsets
+@mark.registry_viewsets_patients
+class TestPatientsAutocomplete(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital = HospitalFactory()
+
+        cls.mapping = PatientHospitalMappingFactory(
+            hospital=cls.hospital,
+            patient__full_name="Jane Doe",
+            patient_hospital_id="A-100",
+        )
+        PatientHospitalMappingFactory(
+            hospital=cls.hospital,
+            patient__full_name="John Smith",
+            patient_hospital_id="JA-200",
+        )
+        PatientHospitalMappingFactory(
+            patient__full_name="Janet Other Hospital",
+        )
+
+        cls.medical_personnel = MedicalPersonnelFactory()
+        PreferredHospital.objects.create(
+            medical_personnel=cls.medical_personnel, hospital=cls.hospital
+        )
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def test_matches_full_name_and_patient_hospital_id_prefixes(self):
+        response = self.client.get("/api/v1/patients/autocomplete/?q=jan")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [
+                {
+                    "id": self.mapping.patient_id,
+                    "full_name": "Jane Doe",
+                    "patient_hospital_id": "A-100",
+                },
+            ],
+            response.data,
+        )
+
+        response = self.client.get("/api/v1/patients/autocomplete/?q=a-1")
+
+        self.assertEqual(
+            ["Jane Doe"], [patient["full_name"] for patient in response.data]
+        )
+
+        response = self.client.get("/api/v1/patients/autocomplete/?q=J")
+
+        self.assertEqual(
+            ["Jane Doe", "John Smith"],
+            [patient["full_name"] for patient in response.data],
+        )
+
+    def test_results_are_capped(self):
+        PatientHospitalMappingFactory.create_batch(
+            PATIENT_AUTOCOMPLETE_LIMIT + 5,
+            hospital=self.hospital,
+            patient__full_name="Jane Many",
+        )
+
+        response = self.client.get("/api/v1/patients/autocomplete/?q=jane")
+
+        self.assertEqual(PATIENT_AUTOCOMPLETE_LIMIT, len(response.data))
+
+    @override_settings(PATIENT_AUTOCOMPLETE_CACHE_TIMEOUT=30)
+    def test_results_are_cached_per_hospital_and_prefix(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.get("/api/v1/patients/autocomplete/?q=jane")
+
+        # request savepoint and release, token authentication, permission
+        # check and the preferred hospital
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/v1/patients/autocomplete/?q=jane")
+
+        self.assertEqual(1, len(response.data))
+
+    @override_settings(PATIENT_AUTOCOMPLETE_CACHE_TIMEOUT=30)
+    def test_results_are_cached_whatever_the_case(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.get("/api/v1/patients/autocomplete/?q=jo")
+
+        for prefix in ["Jo", "JO"]:
+            with self.assertNumQueries(5):
+                response = self.client.get(
+                    f"/api/v1/patients/autocomplete/?q={prefix}"
+                )
+
+            self.assertEqual(
+                ["John Smith"],
+                [patient["full_name"] for patient in response.data],
+            )
+
+    @override_settings(PATIENT_AUTOCOMPLETE_CACHE_TIMEOUT=30)
+    def test_long_prefixes_are_not_cached(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        url = "/api/v1/patients/autocomplete/?q=" + "j" * (
+            PATIENT_AUTOCOMPLETE_CACHED_PREFIX_LENGTH + 1
+        )
+        self.client.get(url)
+
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+
+        self.assertEqual([], response.data)
+
+    def test_each_prefix_lookup_is_a_separate_query(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        # request savepoint and release, token authentication, permission
+        # check, the preferred hospital and one query per prefix lookup, see
+        # `autocomplete_mappings`
+        with self.assertNumQueries(7):
+            response = self.client.get("/api/v1/patients/autocomplete/?q=JA")
+
+        self.assertEqual(
+            ["Jane Doe", "John Smith"],
+            [patient["full_name"] for patient in response.data],
+        )
+
+    def test_without_prefix(self):
+        response = self.client.get("/api/v1/patients/autocomplete/")
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_without_preferred_hospital(self):
+        medical_personnel = MedicalPersonnelFactory()
+        token = Token.objects.create(user=medical_personnel.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        response = self.client.get("/api/v1/patients/autocomplete/?q=ja")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual([], response.data)
+
+
+class TestPatientsBulkLookup(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital = HospitalFactory()
+        cls.other_hospital = HospitalFactory()
+
+        cls.mapping = PatientHospitalMappingFactory(
+            hospital=cls.hospital, patient_hospital_id="001"
+        )
+        cls.other_mapping = PatientHospitalMappingFactory(
+            hospital=cls.other_hospital, patient_hospital_id="002"
+        )
+        # matches the hospitals and the ids of the requested pairs, but not
+        # a requested pair
+        PatientHospitalMappingFactory(
+            hospital=cls.hospital, patient_hospital_id="002"
+        )
+        cls.patient = PatientFactory()
+        EpisodeFactory(patient_hospital_mapping=cls.mapping)
+
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def lookup(self, data):
+        return self.client.post(
+            "/api/v1/patients/bulk-lookup/", data, format="json"
+        )
+
+    def test_lookup_by_ids_and_hospital_identifiers(self):
+        response = self.lookup(
+            {
+                "ids": [self.patient.id, -1],
+                "hospital_identifiers": [
+                    {
+                        "hospital_id": self.hospital.id,
+                        "patient_hospital_id": "001",
+                    },
+                    {
+                        "hospital_id": self.other_hospital.id,
+                        "patient_hospital_id": "002",
+                    },
+                    {
+                        "hospital_id": self.other_hospital.id,
+                        "patient_hospital_id": "001",
+                    },
+                ],
+            }
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            sorted(
+                [
+                    self.patient.id,
+                    self.mapping.patient_id,
+                    self.other_mapping.patient_id,
+                ]
+            ),
+            [patient["id"] for patient in response.data["patients"]],
+        )
+        self.assertEqual(
+            [
+                {
+                    "hospital_id": self.hospital.id,
+                    "patient_hospital_id": "001",
+                    "patient_id": self.mapping.patient_id,
+                },
+                {
+                    "hospital_id": self.other_hospital.id,
+                    "patient_hospital_id": "002",
+                    "patient_id": self.other_mapping.patient_id,
+                },
+            ],
+            response.data["hospital_identifiers"],
+        )
+        self.assertEqual([-1], response.data["missing_ids"])
+        self.assertEqual(
+            [
+                {
+                    "hospital_id": self.other_hospital.id,
+                    "patient_hospital_id": "001",
+                }
+            ],
+            response.data["missing_hospital_identifiers"],
+        )
+
+    def test_number_of_queries_is_constant(self):
+        def count_queries(mappings):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.lookup(
+                    {
+                        "hospital_identifiers": [
+                            {
+                                "hospital_id": mapping.hospital_id,
+                                "patient_hospital_id": mapping.patient_hospital_id,
+                            }
+                            for mapping in mappings
+                        ]
+                    }
+                )
+            self.assertEqual(len(mappings), len(response.data["patients"]))
+            return len(queries)
+
+        mappings = PatientHospitalMappingFactory.create_batch(
+            20, hospital=self.hospital
+        )
+        for mapping in mappings:
+            EpisodeFactory(patient_hospital_mapping=mapping)
+
+        self.assertEqual(count_queries(mappings[:1]), count_queries(mappings))
+
+    def test_without_keys(self):
+        response = self.lookup({})
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+    @patch(
+        "tmh_registry.registry.api.serializers.PATIENT_BULK_LOOKUP_LIMIT", 1
+    )
+    def test_too_many_keys(self):
+        response = self.lookup({"ids": [self.patient.id, -1]})
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
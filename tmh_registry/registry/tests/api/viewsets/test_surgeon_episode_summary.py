@@ -0,0 +1,65 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK
+from rest_framework.test import APIClient
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+from ....factories import EpisodeFactory
+
+
+class TestSurgeonEpisodeSummaryViewSet(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def test_without_episodes(self):
+        response = self.client.get("/api/v1/surgeon-episode-summary/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            {"episode_count": 0, "last_episode_date": None}, response.data
+        )
+
+    def test_with_episodes(self):
+        for surgery_date in [date(2023, 1, 2), date(2023, 5, 6)]:
+            EpisodeFactory(
+                surgery_date=surgery_date,
+                medical_personnel=[self.medical_personnel],
+            )
+        EpisodeFactory(surgery_date=date(2024, 1, 1))  # irrelevant data
+
+        response = self.client.get("/api/v1/surgeon-episode-summary/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            {"episode_count": 2, "last_episode_date": "2023-05-06"},
+            response.data,
+        )
+
+    @override_settings(STATS_CACHE_TIMEOUT=60)
+    def test_cached_summary_is_invalidated_by_new_episodes(self):
+        cache.clear()
+        EpisodeFactory(
+            surgery_date=date(2023, 1, 2),
+            medical_personnel=[self.medical_personnel],
+        )
+        self.client.get("/api/v1/surgeon-episode-summary/")
+
+        EpisodeFactory(
+            surgery_date=date(2023, 5, 6),
+            medical_personnel=[self.medical_personnel],
+        )
+        response = self.client.get("/api/v1/surgeon-episode-summary/")
+
+        self.assertEqual(
+            {"episode_count": 2, "last_episode_date": "2023-05-06"},
+            response.data,
+        )
@@ -0,0 +1,181 @@
+from datetime import date
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_403_FORBIDDEN
+from rest_framework.test import APIClient
+from tmh_registry.users.factories import MedicalPersonnelFactory
+from tmh_registry.users.models import MedicalPersonnel
+
+from ....factories import (
+    DischargeFactory,
+    EpisodeFactory,
+    FollowUpFactory,
+    HospitalFactory,
+    HospitalRegionMappingFactory,
+    RegionFactory,
+    RegionZoneMappingFactory,
+    ZoneFactory,
+)
+from ....models import PreferredHospital
+
+
+class TestSurgeonLeaderboardViewSet(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        zone = ZoneFactory()
+        region = RegionFactory()
+        other_region = RegionFactory()
+        RegionZoneMappingFactory(region=region, zone=zone)
+        RegionZoneMappingFactory(region=other_region, zone=zone)
+
+        cls.hospital = HospitalFactory()
+        cls.regional_hospital = HospitalFactory()
+        cls.zonal_hospital = HospitalFactory()
+        cls.other_hospital = HospitalFactory()
+        HospitalRegionMappingFactory(hospital=cls.hospital, region=region)
+        HospitalRegionMappingFactory(
+            hospital=cls.regional_hospital, region=region
+        )
+        HospitalRegionMappingFactory(
+            hospital=cls.zonal_hospital, region=other_region
+        )
+
+        cls.surgeon = MedicalPersonnelFactory(
+            level=MedicalPersonnel.Level.SURGEON
+        )
+        cls.busy_surgeon = MedicalPersonnelFactory(
+            level=MedicalPersonnel.Level.SURGEON
+        )
+
+        first_episode = EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.hospital,
+            surgery_date=date(2023, 1, 2),
+            medical_personnel=[cls.surgeon, cls.busy_surgeon],
+        )
+        second_episode = EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.hospital,
+            surgery_date=date(2023, 5, 6),
+            medical_personnel=[cls.busy_surgeon],
+        )
+        DischargeFactory(episode=first_episode)
+        DischargeFactory(episode=second_episode)
+        FollowUpFactory(episode=first_episode)
+        FollowUpFactory(episode=first_episode)
+
+        for hospital in [cls.regional_hospital, cls.zonal_hospital]:
+            EpisodeFactory(
+                patient_hospital_mapping__hospital=hospital,
+                medical_personnel=[cls.busy_surgeon],
+            )
+        EpisodeFactory(
+            patient_hospital_mapping__hospital=cls.other_hospital,
+            medical_personnel=[cls.busy_surgeon],
+        )
+
+    def get_client(self, level):
+        medical_personnel = MedicalPersonnelFactory(level=level)
+        PreferredHospital.objects.create(
+            medical_personnel=medical_personnel, hospital=self.hospital
+        )
+
+        token = Token.objects.create(user=medical_personnel.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        return client
+
+    def get_episode_counts(self, level):
+        response = self.get_client(level).get("/api/v1/surgeon-leaderboard/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        return {
+            row["medical_personnel_id"]: row["episode_count"]
+            for row in response.data["results"]
+        }
+
+    def test_centre_lead(self):
+        response = self.get_client(MedicalPersonnel.Level.LEAD_SURGEON).get(
+            "/api/v1/surgeon-leaderboard/"
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        busy_surgeon, surgeon = response.data["results"]
+
+        self.assertEqual(
+            self.busy_surgeon.id, busy_surgeon["medical_personnel_id"]
+        )
+        self.assertEqual(2, busy_surgeon["episode_count"])
+        self.assertEqual("2023-05-06", busy_surgeon["last_episode_date"])
+        self.assertEqual(2, busy_surgeon["discharged_episodes"])
+        self.assertEqual(1, busy_surgeon["followed_up_episodes"])
+        self.assertEqual(1, busy_surgeon["discharge_completion"])
+        self.assertEqual(0.5, busy_surgeon["follow_up_completion"])
+
+        self.assertEqual(self.surgeon.id, surgeon["medical_personnel_id"])
+        self.assertEqual(self.surgeon.user.username, surgeon["username"])
+        self.assertEqual(1, surgeon["episode_count"])
+        self.assertEqual("2023-01-02", surgeon["last_episode_date"])
+        self.assertEqual(1, surgeon["follow_up_completion"])
+
+    def test_scope_per_level(self):
+        for level, busy_surgeon_episodes in [
+            (MedicalPersonnel.Level.REGIONAL_LEAD, 3),
+            (MedicalPersonnel.Level.ZONAL_LEAD, 4),
+            (MedicalPersonnel.Level.NATIONAL_LEAD, 5),
+        ]:
+            self.assertEqual(
+                {
+                    self.busy_surgeon.id: busy_surgeon_episodes,
+                    self.surgeon.id: 1,
+                },
+                self.get_episode_counts(level),
+            )
+
+    def test_without_preferred_hospital(self):
+        medical_personnel = MedicalPersonnelFactory(
+            level=MedicalPersonnel.Level.REGIONAL_LEAD
+        )
+        token = Token.objects.create(user=medical_personnel.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        response = client.get("/api/v1/surgeon-leaderboard/")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual([], response.data["results"])
+
+    def test_surgeons_are_forbidden(self):
+        response = self.get_client(MedicalPersonnel.Level.SURGEON).get(
+            "/api/v1/surgeon-leaderboard/"
+        )
+
+        self.assertEqual(HTTP_403_FORBIDDEN, response.status_code)
+
+    def test_keyset_pagination(self):
+        client = self.get_client(MedicalPersonnel.Level.LEAD_SURGEON)
+
+        response = client.get("/api/v1/surgeon-leaderboard/?page_size=1")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [self.busy_surgeon.id],
+            [row["medical_personnel_id"] for row in response.data["results"]],
+        )
+        self.assertIn("cursor=", response.data["next"])
+
+        response = client.get(response.data["next"])
+
+        self.assertEqual(
+            [self.surgeon.id],
+            [row["medical_personnel_id"] for row in response.data["results"]],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_single_grouped_query(self):
+        client = self.get_client(MedicalPersonnel.Level.ZONAL_LEAD)
+
+        # request savepoint and release, token authentication, permission
+        # check, preferred hospital and the grouped leaderboard query
+        with self.assertNumQueries(6):
+            client.get("/api/v1/surgeon-leaderboard/")
@@ -0,0 +1,237 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST
+from rest_framework.test import APIClient
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+from ....factories import (
+    DischargeFactory,
+    EpisodeFactory,
+    HospitalFactory,
+    PatientFactory,
+)
+from ....models import (
+    Discharge,
+    Episode,
+    EpisodeRollup,
+    FollowUp,
+    Patient,
+    PatientHospitalMapping,
+)
+
+
+class TestSyncViewSet(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital = HospitalFactory()
+        cls.medical_personnel = MedicalPersonnelFactory()
+
+    def setUp(self) -> None:
+        self.token = Token.objects.create(user=self.medical_personnel.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+
+    def get_graph(self, suffix="1"):
+        return {
+            "patients": [
+                {
+                    "temp_id": f"patient-{suffix}",
+                    "full_name": "Jane Doe",
+                    "national_id": None,
+                    "age": 40,
+                    "year_of_birth": None,
+                    "gender": "Female",
+                    "phone_1": "0712 345 678",
+                }
+            ],
+            "patient_hospital_mappings": [
+                {
+                    "temp_id": f"mapping-{suffix}",
+                    "patient": f"patient-{suffix}",
+                    "hospital_id": self.hospital.id,
+                    "patient_hospital_id": f"100{suffix}",
+                }
+            ],
+            "episodes": [
+                {
+                    "temp_id": f"episode-{suffix}",
+                    "patient_hospital_mapping": f"mapping-{suffix}",
+                    "surgery_date": "2023-03-01",
+                    "episode_type": Episode.EpisodeChoices.UMBILICAL.label,
+                    "surgeon_ids": [self.medical_personnel.id],
+                    "cepod": Episode.CepodChoices.PLANNED.label,
+                    "side": Episode.SideChoices.LEFT.label,
+                    "occurence": Episode.OccurenceChoices.RECURRENT.label,
+                    "type": Episode.TypeChoices.INDIRECT.label,
+                    "size": Episode.SizeChoices.MEDIUM.label,
+                    "complexity": Episode.ComplexityChoices.SIMPLE.label,
+                    "mesh_type": Episode.MeshTypeChoices.TNMHP.label,
+                    "anaesthetic_type": Episode.AnaestheticChoices.SPINAL.label,
+                    "diathermy_used": True,
+                    "antibiotic_used": False,
+                }
+            ],
+            "discharges": [
+                {
+                    "temp_id": f"discharge-{suffix}",
+                    "episode": f"episode-{suffix}",
+                    "date": "2023-03-02",
+                    "aware_of_mesh": True,
+                }
+            ],
+            "follow_ups": [
+                {
+                    "temp_id": f"follow-up-{suffix}",
+                    "episode": f"episode-{suffix}",
+                    "date": "2023-04-01",
+                    "pain_severity": "Mild",
+                    "attendee_ids": [self.medical_personnel.id],
+                    "mesh_awareness": True,
+                    "seroma": False,
+                    "infection": False,
+                    "numbness": False,
+                    "recurrence": None,
+                    "further_surgery_need": False,
+                }
+            ],
+        }
+
+    def sync(self, data):
+        return self.client.post("/api/v1/sync/", data, format="json")
+
+    def test_sync_graph(self):
+        response = self.sync(self.get_graph())
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+        id_map = response.data["id_map"]
+
+        patient = Patient.objects.get(id=id_map["patients"]["patient-1"])
+        self.assertEqual("FEMALE", patient.gender)
+        self.assertEqual("0712345678", patient.phone_1_digits)
+
+        mapping = PatientHospitalMapping.objects.get(
+            id=id_map["patient_hospital_mappings"]["mapping-1"]
+        )
+        self.assertEqual(patient, mapping.patient)
+        self.assertEqual(1, mapping.episode_count)
+
+        episode = Episode.objects.get(id=id_map["episodes"]["episode-1"])
+        self.assertEqual(mapping, episode.patient_hospital_mapping)
+        self.assertEqual(
+            [self.medical_personnel], list(episode.surgeons.all())
+        )
+        self.assertEqual(
+            1,
+            EpisodeRollup.objects.get(hospital=self.hospital).episode_count,
+        )
+
+        discharge = Discharge.objects.get(
+            id=id_map["discharges"]["discharge-1"]
+        )
+        self.assertEqual(episode, discharge.episode)
+
+        follow_up = FollowUp.objects.get(
+            id=id_map["follow_ups"]["follow-up-1"]
+        )
+        self.assertEqual(episode, follow_up.episode)
+        self.assertEqual("MILD", follow_up.pain_severity)
+        self.assertEqual(
+            [self.medical_personnel], list(follow_up.attendees.all())
+        )
+
+    def test_reference_existing_records(self):
+        episode = EpisodeFactory(surgery_date="2023-01-01")
+        DischargeFactory(episode=episode, date="2023-01-02")
+        follow_up = self.get_graph()["follow_ups"][0]
+        follow_up["episode"] = episode.id
+
+        response = self.sync({"follow_ups": [follow_up]})
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+        self.assertEqual(1, episode.followup_set.count())
+
+    def test_invalid_record_rolls_back_the_sync(self):
+        graph = self.get_graph()
+        graph["follow_ups"][0]["date"] = "2023-03-01"
+
+        response = self.sync(graph)
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn("follow_ups[0]", response.data["errors"][0])
+        self.assertFalse(Patient.objects.exists())
+        self.assertFalse(Episode.objects.exists())
+
+    def test_invalid_references(self):
+        graph = self.get_graph()
+        graph["patient_hospital_mappings"][0]["patient"] = "unknown"
+        graph["episodes"] = []
+        graph["discharges"] = []
+        graph["follow_ups"] = []
+
+        response = self.sync(graph)
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn(
+            "patient_hospital_mappings[0]", response.data["errors"][0]
+        )
+
+    def test_duplicate_temp_ids(self):
+        graph = self.get_graph()
+        graph["patients"] *= 2
+
+        response = self.sync(graph)
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_concurrently_registered_national_id(self):
+        graph = self.get_graph()
+        graph["patients"][0]["national_id"] = "123456"
+        # Registered by another request after the national ids are checked
+        PatientFactory(national_id="123456")
+        filter_patients = Patient.objects.filter
+        results = [Patient.objects.none()]
+
+        with patch.object(
+            Patient.objects,
+            "filter",
+            side_effect=lambda *args, **lookup: (
+                results.pop() if results else filter_patients(*args, **lookup)
+            ),
+        ):
+            response = self.sync(graph)
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn("patients[0]", response.data["errors"][0])
+        self.assertIn(
+            "A patient with national_id 123456 already exists.",
+            response.data["errors"][0],
+        )
+        self.assertEqual(1, Patient.objects.count())
+        self.assertFalse(Episode.objects.exists())
+
+    def test_number_of_queries_is_constant(self):
+        def count_queries(suffixes):
+            graphs = [self.get_graph(suffix) for suffix in suffixes]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.sync(
+                    {
+                        section: [
+                            record
+                            for graph in graphs
+                            for record in graph[section]
+                        ]
+                        for section in graphs[0]
+                    }
+                )
+            self.assertEqual(HTTP_201_CREATED, response.status_code)
+            return len(queries)
+
+        # the first sync creates the rollup rows, later ones update them
+        count_queries(["0"])
+
+        self.assertEqual(
+            count_queries(["1"]), count_queries(["2", "3", "4", "5"])
+        )
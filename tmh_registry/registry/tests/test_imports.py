@@ -0,0 +1,217 @@
+import csv
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from pytest import mark
+
+from ..factories import HospitalFactory, PatientHospitalMappingFactory
+from ..imports import import_patients
+from ..models import Patient, PatientHospitalMapping
+
+HEADER = [
+    "full_name",
+    "national_id",
+    "age",
+    "year_of_birth",
+    "gender",
+    "phone_1",
+    "hospital_id",
+    "patient_hospital_id",
+]
+
+
+def write_csv(rows, header=None):
+    if header is None:
+        header = HEADER
+
+    file = StringIO()
+    writer = csv.writer(file)
+    writer.writerow(header)
+    writer.writerows(rows)
+    file.seek(0)
+    return file
+
+
+@mark.skipif(connection.vendor != "postgresql", reason="COPY needs PostgreSQL")
+class TestImportPatients(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.hospital = HospitalFactory()
+        cls.mapping = PatientHospitalMappingFactory(
+            hospital=cls.hospital,
+            patient_hospital_id="900",
+            patient__national_id="99999999",
+        )
+
+    def import_rows(self, rows, **kwargs):
+        rejected_file = StringIO()
+        result = import_patients(write_csv(rows), rejected_file, **kwargs)
+        rejected_file.seek(0)
+        return result, list(csv.DictReader(rejected_file))
+
+    def test_import(self):
+        progress = []
+        rows = [
+            [
+                f"Patient {index}",
+                f"12-34-{index}",
+                "",
+                "1980",
+                "female",
+                "0712 345 678",
+                self.hospital.id,
+                f"10{index}",
+            ]
+            for index in range(5)
+        ]
+        rows[1][1] = ""
+        rows[2][2:4] = ["40", ""]
+
+        (imported, rejected), rejected_rows = self.import_rows(
+            rows,
+            chunk_size=2,
+            progress=lambda *counts: progress.append(counts),
+        )
+
+        self.assertEqual((5, 0), (imported, rejected))
+        self.assertEqual([], rejected_rows)
+        self.assertEqual([(2, 0), (4, 0), (5, 0)], progress)
+
+        mappings = PatientHospitalMapping.objects.filter(
+            patient_hospital_id__in=[row[7] for row in rows]
+        ).select_related("patient")
+        self.assertEqual(5, len(mappings))
+        patients = {
+            mapping.patient.full_name: mapping.patient for mapping in mappings
+        }
+        self.assertEqual("FEMALE", patients["Patient 0"].gender)
+        self.assertEqual("12340", patients["Patient 0"].national_id_digits)
+        self.assertEqual("0712345678", patients["Patient 0"].phone_1_digits)
+        self.assertIsNone(patients["Patient 1"].national_id)
+        self.assertEqual(
+            Patient.get_year_of_birth_from_age(40),
+            patients["Patient 2"].year_of_birth,
+        )
+        self.assertIsNotNone(patients["Patient 3"].created_at)
+
+    def test_rejected_rows(self):
+        valid = [
+            "Patient",
+            "11111111",
+            "",
+            "1980",
+            "Male",
+            "0712345678",
+            self.hospital.id,
+            "100",
+        ]
+        rows = [
+            valid,
+            # duplicates of the first row
+            [*valid[:7], "101"],
+            [*valid[:1], "22222222", *valid[2:]],
+            # conflicting with the existing mapping
+            [*valid[:1], "99999999", *valid[2:7], "101"],
+            [*valid[:1], "33333333", *valid[2:7], "900"],
+            # invalid
+            [*valid[:1], "44444444", "", "", *valid[4:7], "102"],
+            [*valid[:1], "55555555", *valid[2:4], "other", *valid[5:7], "103"],
+            [*valid[:1], "66666666", *valid[2:6], "0", "104"],
+        ]
+
+        (imported, rejected), rejected_rows = self.import_rows(rows)
+
+        self.assertEqual((1, 7), (imported, rejected))
+        rejected_rows = {row["row"]: row for row in rejected_rows}
+        self.assertEqual(
+            {
+                "3": "national_id: patient with this national id already "
+                "exists.",
+                "4": "error: The patient hospital id 100 is already "
+                "registered to another patient of this hospital.",
+                "5": "national_id: patient with this national id already "
+                "exists.",
+                "6": "error: The patient hospital id 900 is already "
+                "registered to another patient of this hospital.",
+                "7": "error: Either 'age' or 'year_of_birth' should be "
+                "populated.",
+                "8": 'gender: "other" is not a valid choice.',
+                "9": "error: The hospital you are trying to register this "
+                "patient does not exist.",
+            },
+            {row: values["errors"] for row, values in rejected_rows.items()},
+        )
+        self.assertEqual("55555555", rejected_rows["8"]["national_id"])
+        self.assertTrue(
+            Patient.objects.filter(
+                national_id="11111111",
+                hospital_mappings__patient_hospital_id="100",
+            ).exists()
+        )
+        self.assertEqual(2, Patient.objects.count())
+
+    def test_missing_columns(self):
+        with self.assertRaisesMessage(
+            ValueError, "Missing required columns: gender, phone_1."
+        ):
+            import_patients(
+                write_csv([], header=HEADER[:4] + HEADER[6:]), StringIO()
+            )
+
+    def test_command(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "patients.csv")
+            with open(path, "w", newline="") as file:
+                file.write(
+                    write_csv(
+                        [
+                            [
+                                "Patient",
+                                "",
+                                "30",
+                                "",
+                                "Male",
+                                "0712345678",
+                                self.hospital.id,
+                                hospital_id,
+                            ]
+                            for hospital_id in ["100", "100"]
+                        ]
+                    ).getvalue()
+                )
+
+            stdout = StringIO()
+            call_command("import_patients", path, stdout=stdout)
+
+            output = stdout.getvalue()
+            self.assertIn("Read 2 rows, 0 rejected.", output)
+            self.assertIn("Imported 1 patients.", output)
+            self.assertIn("Rejected 1 rows", output)
+            with open(os.path.join(directory, "patients.rejected.csv")) as f:
+                self.assertEqual(2, len(list(csv.reader(f))))
+
+            with self.assertRaises(CommandError):
+                call_command(
+                    "import_patients",
+                    os.path.join(directory, "missing.csv"),
+                    stdout=StringIO(),
+                )
+
+
+class TestImportPatientsBackend(TestCase):
+    def test_other_databases_are_not_supported(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "patients.csv")
+            with open(path, "w", newline="") as file:
+                file.write(write_csv([]).getvalue())
+
+            with mock.patch.object(connection, "vendor", "sqlite"):
+                with self.assertRaisesMessage(
+                    CommandError, "Importing patients needs PostgreSQL"
+                ):
+                    call_command("import_patients", path, stdout=StringIO())
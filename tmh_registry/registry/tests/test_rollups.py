@@ -0,0 +1,216 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+from ..factories import EpisodeFactory, PatientHospitalMappingFactory
+from ..models import (
+    Episode,
+    EpisodeRollup,
+    PatientHospitalMapping,
+    SurgeonEpisodeRollup,
+)
+from ..rollups import update_episode_rollup, update_surgeon_rollup
+
+
+def get_episode_rollups():
+    return set(
+        EpisodeRollup.objects.filter(episode_count__gt=0).values_list(
+            "hospital_id", "surgery_date", "episode_type", "episode_count"
+        )
+    )
+
+
+def get_surgeon_rollups():
+    return set(
+        SurgeonEpisodeRollup.objects.filter(episode_count__gt=0).values_list(
+            "medical_personnel_id", "surgery_date", "episode_count"
+        )
+    )
+
+
+class TestEpisodeRollups(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.mapping = PatientHospitalMappingFactory()
+        cls.hospital_id = cls.mapping.hospital_id
+        cls.surgeon = MedicalPersonnelFactory()
+        cls.surgery_date = date(2022, 3, 14)
+
+    def create_episode(self, **kwargs):
+        return EpisodeFactory(
+            patient_hospital_mapping=self.mapping,
+            surgery_date=self.surgery_date,
+            episode_type=Episode.EpisodeChoices.INGUINAL,
+            medical_personnel=[self.surgeon],
+            **kwargs,
+        )
+
+    def test_create_episode_increments_rollups(self):
+        self.create_episode()
+        self.create_episode()
+
+        self.assertEqual(
+            {(self.hospital_id, self.surgery_date, "INGUINAL", 2)},
+            get_episode_rollups(),
+        )
+        self.assertEqual(
+            {(self.surgeon.id, self.surgery_date, 2)}, get_surgeon_rollups()
+        )
+
+    def test_update_episode_moves_rollups(self):
+        episode = self.create_episode()
+        other_mapping = PatientHospitalMappingFactory()
+
+        episode.surgery_date = date(2022, 3, 15)
+        episode.episode_type = Episode.EpisodeChoices.FEMORAL
+        episode.patient_hospital_mapping = other_mapping
+        episode.save()
+
+        self.assertEqual(
+            {(other_mapping.hospital_id, date(2022, 3, 15), "FEMORAL", 1)},
+            get_episode_rollups(),
+        )
+        self.assertEqual(
+            {(self.surgeon.id, date(2022, 3, 15), 1)}, get_surgeon_rollups()
+        )
+
+    def test_delete_episode_decrements_rollups(self):
+        episode = self.create_episode()
+        self.create_episode()
+
+        episode.delete()
+
+        self.assertEqual(
+            {(self.hospital_id, self.surgery_date, "INGUINAL", 1)},
+            get_episode_rollups(),
+        )
+        self.assertEqual(
+            {(self.surgeon.id, self.surgery_date, 1)}, get_surgeon_rollups()
+        )
+
+    def test_cascaded_delete_decrements_rollups(self):
+        self.create_episode()
+
+        self.mapping.patient.delete()
+
+        self.assertEqual(set(), get_episode_rollups())
+        self.assertEqual(set(), get_surgeon_rollups())
+
+    def test_surgeon_changes_update_surgeon_rollups(self):
+        episode = self.create_episode()
+        other_surgeon = MedicalPersonnelFactory()
+
+        episode.surgeons.set([other_surgeon])
+        self.assertEqual(
+            {(other_surgeon.id, self.surgery_date, 1)}, get_surgeon_rollups()
+        )
+
+        episode.surgeons.clear()
+        self.assertEqual(set(), get_surgeon_rollups())
+
+        other_surgeon.episode_set.add(episode)
+        self.assertEqual(
+            {(other_surgeon.id, self.surgery_date, 1)}, get_surgeon_rollups()
+        )
+
+    def test_concurrent_creation_of_undated_rollups(self):
+        def missed_update(model):
+            # The row is created by another writer after the first update
+            filter_rows = model.objects.filter
+            results = [model.objects.none()]
+            return mock.patch.object(
+                model.objects,
+                "filter",
+                side_effect=lambda **lookup: (
+                    results.pop() if results else filter_rows(**lookup)
+                ),
+            )
+
+        EpisodeRollup.objects.create(
+            hospital_id=self.hospital_id,
+            episode_type="INGUINAL",
+            episode_count=1,
+        )
+        SurgeonEpisodeRollup.objects.create(
+            medical_personnel=self.surgeon, episode_count=1
+        )
+
+        with missed_update(EpisodeRollup):
+            update_episode_rollup(self.hospital_id, None, "INGUINAL", 1)
+        with missed_update(SurgeonEpisodeRollup):
+            update_surgeon_rollup([self.surgeon.id], None, 1)
+
+        self.assertEqual(
+            [(self.hospital_id, None, "INGUINAL", 2)],
+            list(
+                EpisodeRollup.objects.values_list(
+                    "hospital_id",
+                    "surgery_date",
+                    "episode_type",
+                    "episode_count",
+                )
+            ),
+        )
+        self.assertEqual(
+            [(self.surgeon.id, None, 2)],
+            list(
+                SurgeonEpisodeRollup.objects.values_list(
+                    "medical_personnel_id", "surgery_date", "episode_count"
+                )
+            ),
+        )
+
+    def test_rebuild_command_repairs_drift(self):
+        self.create_episode()
+        EpisodeFactory.create_batch(3)
+        expected_episode_rollups = get_episode_rollups()
+        expected_surgeon_rollups = get_surgeon_rollups()
+
+        EpisodeRollup.objects.all().delete()
+        SurgeonEpisodeRollup.objects.update(episode_count=7)
+
+        call_command("rebuild_episode_rollups", stdout=StringIO())
+
+        self.assertEqual(expected_episode_rollups, get_episode_rollups())
+        self.assertEqual(expected_surgeon_rollups, get_surgeon_rollups())
+
+
+class TestMappingEpisodeCounts(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.mapping = PatientHospitalMappingFactory()
+        cls.other_mapping = PatientHospitalMappingFactory()
+
+    def get_episode_counts(self):
+        self.mapping.refresh_from_db()
+        self.other_mapping.refresh_from_db()
+        return self.mapping.episode_count, self.other_mapping.episode_count
+
+    def test_episode_changes_update_episode_counts(self):
+        episode = EpisodeFactory(patient_hospital_mapping=self.mapping)
+        EpisodeFactory(patient_hospital_mapping=self.mapping)
+        self.assertEqual((2, 0), self.get_episode_counts())
+
+        episode.patient_hospital_mapping = self.other_mapping
+        episode.save()
+        self.assertEqual((1, 1), self.get_episode_counts())
+
+        episode.delete()
+        self.assertEqual((1, 0), self.get_episode_counts())
+
+    def test_repair_command(self):
+        EpisodeFactory(patient_hospital_mapping=self.mapping)
+        PatientHospitalMapping.objects.update(episode_count=3)
+
+        with self.assertRaises(CommandError):
+            call_command("repair_episode_counts", "--check", stdout=StringIO())
+        self.assertEqual((3, 3), self.get_episode_counts())
+
+        call_command("repair_episode_counts", stdout=StringIO())
+        self.assertEqual((1, 0), self.get_episode_counts())
+
+        call_command("repair_episode_counts", "--check", stdout=StringIO())
@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..factories import PatientFactory
+from ..models import Patient
+from ..search import get_identifier_digits
+
+
+class TestIdentifierDigits(TestCase):
+    def test_identifier_search_terms(self):
+        self.assertEqual(
+            "255712345678", get_identifier_digits("+255 712-345-678")
+        )
+        self.assertEqual("0712345678", get_identifier_digits("(0712) 345.678"))
+        self.assertIsNone(get_identifier_digits("12345"))
+        self.assertIsNone(get_identifier_digits("John 712345678"))
+
+    def test_digits_are_maintained_on_save(self):
+        patient = PatientFactory(
+            national_id="AB-1234-5678",
+            phone_1="+255 712 345 678",
+            phone_2=None,
+        )
+
+        self.assertEqual("12345678", patient.national_id_digits)
+        self.assertEqual("255712345678", patient.phone_1_digits)
+        self.assertIsNone(patient.phone_2_digits)
+
+        patient.phone_2 = "0712 000 111"
+        patient.save(update_fields=["phone_2"])
+        patient.refresh_from_db()
+
+        self.assertEqual("0712000111", patient.phone_2_digits)
+
+    def test_backfill_command(self):
+        patients = PatientFactory.create_batch(3, phone_1="0712-345-678")
+        Patient.objects.update(
+            national_id_digits=None, phone_1_digits=None, phone_2_digits=None
+        )
+
+        stdout = StringIO()
+        call_command(
+            "backfill_identifier_digits", "--batch-size=2", stdout=stdout
+        )
+
+        self.assertIn("3 patients", stdout.getvalue())
+        for patient in patients:
+            patient.refresh_from_db()
+            self.assertEqual("0712345678", patient.phone_1_digits)
+            self.assertEqual(patient.national_id, patient.national_id_digits)
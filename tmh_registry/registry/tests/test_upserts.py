@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST
+from rest_framework.test import APIClient
+from tmh_registry.users.factories import MedicalPersonnelFactory
+
+from ..factories import HospitalFactory, PatientFactory
+from ..models import Patient, PatientHospitalMapping
+from ..upserts import insert_ignoring_conflicts
+
+
+class TestInsertIgnoringConflicts(TestCase):
+    def test_conflicts_are_detected(self):
+        existing = PatientFactory(national_id="12345678")
+
+        patient = Patient(
+            full_name="New", national_id="87654321", year_of_birth=1980
+        )
+        self.assertTrue(insert_ignoring_conflicts(patient))
+        self.assertEqual(
+            "New",
+            Patient.objects.values_list("full_name", flat=True).get(
+                pk=patient.pk
+            ),
+        )
+
+        duplicate = Patient(
+            full_name="Duplicate", national_id="12345678", year_of_birth=1980
+        )
+        self.assertFalse(insert_ignoring_conflicts(duplicate))
+        self.assertIsNone(duplicate.pk)
+        self.assertEqual(
+            [existing.pk, patient.pk],
+            list(Patient.objects.order_by("pk").values_list("pk", flat=True)),
+        )
+
+
+class TestConcurrentRegistrations(TransactionTestCase):
+    requests = 4
+
+    def setUp(self) -> None:
+        self.hospital = HospitalFactory()
+        self.token = Token.objects.create(user=MedicalPersonnelFactory().user)
+
+    def get_patient_data(self, index, **kwargs):
+        return {
+            "full_name": f"Patient {index}",
+            "national_id": f"1000{index}",
+            "age": None,
+            "year_of_birth": 1980,
+            "gender": "Female",
+            "phone_1": "0712345678",
+            "hospital_id": self.hospital.id,
+            "patient_hospital_id": f"200{index}",
+            **kwargs,
+        }
+
+    def post_in_parallel(self, url, payloads):
+        barrier = Barrier(len(payloads))
+
+        def post(data):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+            try:
+                barrier.wait()
+                return client.post(url, data=data, format="json").status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(payloads)) as executor:
+            return sorted(executor.map(post, payloads))
+
+    def assert_one_created(self, status_codes):
+        self.assertEqual(
+            [HTTP_201_CREATED] + [HTTP_400_BAD_REQUEST] * (self.requests - 1),
+            status_codes,
+        )
+
+    def test_same_national_id(self):
+        status_codes = self.post_in_parallel(
+            "/api/v1/patients/",
+            [
+                self.get_patient_data(index, national_id="12345678")
+                for index in range(self.requests)
+            ],
+        )
+
+        self.assert_one_created(status_codes)
+        self.assertEqual(1, Patient.objects.count())
+        self.assertEqual(1, PatientHospitalMapping.objects.count())
+
+    def test_same_patient_hospital_id(self):
+        status_codes = self.post_in_parallel(
+            "/api/v1/patients/",
+            [
+                self.get_patient_data(index, patient_hospital_id="12345")
+                for index in range(self.requests)
+            ],
+        )
+
+        self.assert_one_created(status_codes)
+        # the patients of the conflicting mappings are rolled back
+        self.assertEqual(1, Patient.objects.count())
+        self.assertEqual(1, PatientHospitalMapping.objects.count())
+
+    def test_same_mapping(self):
+        patient = PatientFactory()
+
+        status_codes = self.post_in_parallel(
+            "/api/v1/patient-hospital-mappings/",
+            [
+                {
+                    "patient_id": patient.id,
+                    "hospital_id": self.hospital.id,
+                    "patient_hospital_id": f"300{index}",
+                }
+                for index in range(self.requests)
+            ],
+        )
+
+        self.assert_one_created(status_codes)
+        self.assertEqual(
+            1, PatientHospitalMapping.objects.filter(patient=patient).count()
+        )
@@ -0,0 +1,156 @@
+from django.db import connections, router, transaction
+from django.db.models.sql import InsertQuery
+
+from .cache import bump_stats_version
+from .models import Patient, PatientHospitalMapping
+
+MAPPING_EXISTS_ERROR = (
+    "PatientHospitalMapping for patient_id {patient_id} and hospital_id "
+    "{hospital_id} already exists!"
+)
+PATIENT_HOSPITAL_ID_EXISTS_ERROR = (
+    "Patient Hospital ID {patient_hospital_id} already exists for another "
+    "patient in this hospital"
+)
+HOSPITAL_DOES_NOT_EXIST_ERROR = (
+    "The hospital you are trying to register this patient does not exist."
+)
+PATIENT_HOSPITAL_ID_REGISTERED_ERROR = (
+    "The patient hospital id {patient_hospital_id} is already registered to "
+    "another patient of this hospital."
+)
+
+
+class InsertConflict(Exception):
+    """
+    Raised when a record conflicts with an existing one.
+
+    :param dict errors: The validation errors describing the conflict
+    :param str code: The code of the errors
+    """
+
+    def __init__(self, errors, code="invalid"):
+        super().__init__(errors)
+        self.errors = errors
+        self.code = code
+
+
+def insert_ignoring_conflicts(instance):
+    """
+    Insert `instance` with `INSERT ... ON CONFLICT DO NOTHING RETURNING`, or
+    the `INSERT ... IGNORE` of the backend.
+
+    The unique constraints are checked by the insert itself. A concurrent
+    duplicate is skipped instead of failing the transaction, which the row
+    count of the insert tells on every backend. Like `bulk_create`, no
+    signals are sent.
+
+    :param Model instance: The unsaved record
+    :return: Whether it was inserted, in which case its primary key is set
+    :rtype: bool
+    """
+    model = type(instance)
+    meta = model._meta
+    using = router.db_for_write(model, instance=instance)
+    connection = connections[using]
+    fields = [
+        field
+        for field in meta.local_concrete_fields
+        if field is not meta.auto_field
+    ]
+
+    query = InsertQuery(model, ignore_conflicts=True)
+    query.insert_values(fields, [instance])
+    compiler = query.get_compiler(using=using)
+    if connection.features.can_return_columns_from_insert:
+        compiler.returning_fields = meta.db_returning_fields
+
+    with connection.cursor() as cursor:
+        for sql, params in compiler.as_sql():
+            cursor.execute(sql, params)
+        if cursor.rowcount != 1:
+            return False
+
+        if compiler.returning_fields:
+            values = cursor.fetchone()
+        else:
+            values = [
+                connection.ops.last_insert_id(
+                    cursor, meta.db_table, meta.pk.column
+                )
+            ]
+
+    for value, field in zip(values, meta.db_returning_fields):
+        setattr(instance, field.attname, value)
+    instance._state.adding = False
+    instance._state.db = using
+
+    return True
+
+
+def get_national_id_conflict_error():
+    # The message of the `UniqueValidator` ModelSerializer builds for the
+    # field
+    field = Patient._meta.get_field("national_id")
+    return field.error_messages["unique"] % {
+        "model_name": Patient._meta.verbose_name,
+        "field_label": field.verbose_name,
+    }
+
+
+def create_mapping(mapping):
+    """
+    Insert a patient hospital mapping in one statement.
+
+    :param PatientHospitalMapping mapping: The unsaved mapping
+    :raises InsertConflict: If the patient is already mapped to the hospital
+        or the patient hospital id is taken in the hospital
+    """
+    if insert_ignoring_conflicts(mapping):
+        bump_stats_version()
+        return
+
+    # Only a conflict costs a second query, to tell the constraints apart
+    if PatientHospitalMapping.objects.filter(
+        patient_id=mapping.patient_id, hospital_id=mapping.hospital_id
+    ).exists():
+        error = MAPPING_EXISTS_ERROR.format(
+            patient_id=mapping.patient_id, hospital_id=mapping.hospital_id
+        )
+    else:
+        error = PATIENT_HOSPITAL_ID_EXISTS_ERROR.format(
+            patient_hospital_id=mapping.patient_hospital_id
+        )
+    raise InsertConflict({"error": error})
+
+
+@transaction.atomic
+def register_patient(patient, mapping):
+    """
+    Insert a patient and its first hospital mapping. Both inserts skip a
+    conflicting row instead of failing, and the patient is rolled back if
+    the mapping conflicts.
+
+    :param Patient patient: The unsaved patient
+    :param PatientHospitalMapping mapping: The unsaved mapping of the patient
+    :raises InsertConflict: If the national id is taken, or the patient
+        hospital id is taken in the hospital
+    """
+    patient.set_identifier_digits()
+    if not insert_ignoring_conflicts(patient):
+        raise InsertConflict(
+            {"national_id": [get_national_id_conflict_error()]},
+            code="unique",
+        )
+
+    mapping.patient = patient
+    if not insert_ignoring_conflicts(mapping):
+        raise InsertConflict(
+            {
+                "error": PATIENT_HOSPITAL_ID_REGISTERED_ERROR.format(
+                    patient_hospital_id=mapping.patient_hospital_id
+                )
+            }
+        )
+
+    bump_stats_version()
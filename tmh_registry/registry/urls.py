@@ -5,6 +5,7 @@ from .api.viewsets import (
     AnnouncementViewSet,
     DischargeViewset,
     EpisodeViewset,
+    FollowUpDueEpisodesViewSet,
     FollowUpViewset,
     HospitalViewSet,
     OwnedEpisodesViewSet,
@@ -12,6 +13,8 @@ from .api.viewsets import (
     PatientViewSet,
     PreferredHospitalViewSet,
     SurgeonEpisodeSummaryViewSet,
+    SurgeonLeaderboardViewSet,
+    SyncViewSet,
     UnlinkedPatientsViewSet,
 )
 
@@ -32,15 +35,26 @@ router.register(
     SurgeonEpisodeSummaryViewSet,
     basename="surgeon-episode-summary",
 )
+router.register(
+    r"surgeon-leaderboard",
+    SurgeonLeaderboardViewSet,
+    basename="surgeon-leaderboard",
+)
 router.register(
     r"owned-episodes", OwnedEpisodesViewSet, basename="owned-episodes"
 )
+router.register(
+    r"follow-up-due-episodes",
+    FollowUpDueEpisodesViewSet,
+    basename="follow-up-due-episodes",
+)
 router.register(
     r"unlinked-patients", UnlinkedPatientsViewSet, basename="unlinked-patients"
 )
 router.register(
     r"announcements", AnnouncementViewSet, basename="announcements"
 )
+router.register(r"sync", SyncViewSet, basename="sync")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_auto_20251211_2039'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalpersonnel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -28,6 +28,8 @@ class MedicalPersonnel(models.Model):
         choices=Level.choices,
         default=Level.SURGEON,
     )
+    # Also moved when the user is saved, see `signals`
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Medical Personnel"
@@ -0,0 +1,15 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from .models import MedicalPersonnel
+
+
+@receiver(post_save, sender=User)
+def touch_medical_personnel_on_user_save(sender, instance, created, **kwargs):
+    # The user is serialized with the medical personnel, so editing it
+    # changes the versions of the episodes they operated on, see
+    # `registry.api.conditional`.
+    if not created:
+        MedicalPersonnel.objects.filter(user=instance).update(updated_at=now())